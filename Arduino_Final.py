@@ -1,12 +1,43 @@
-import serial
+from startup import PROFILE_STARTUP, StartupTimeline, init_pygame # First, so the startup timeline covers the imports
+timeline = StartupTimeline()
+
 import time
 import sys
+import queue
 import pygame
+from concurrent.futures import ThreadPoolExecutor
+
+from aggregator import BuzzAggregator
+from analytics import Analytics
+from assets import SoundLoader
+from broadcast import StateBroadcaster
+from buzz_protocol import BINARY_BAUD_RATE
+from core import BUZZED, WAITING, GameCore
+from discovery import DeviceFinder
+from journal import Journal
+from latency import LatencyTracker
+from event_loop import SERIAL_PRESS, EventLoop, post_event
+from frame_profiler import FrameProfiler
+from recording import InputRecorder, recording_path
+from render import DirtyRenderer, Label
+from serial_reader import FrameReader, SerialReader
+timeline.step("imports")
 
 # --- Configuration ---
-# List of potential serial ports to check
+# Serial ports to check besides the ones the OS reports (and the last one that worked)
 SERIAL_PORTS_TO_CHECK = ['COM7', 'COM8', 'COM3', '/dev/ttyACM0', '/dev/ttyUSB0'] # Add ports relevant to your OS
-BAUD_RATE = 9600 # Must match the baud rate set in the Arduino code (Serial.begin(9600))
+# Serial protocol: "text" for the "Player N pressed" lines, "binary" for the
+# timestamped frames (set BINARY_PROTOCOL to 1 in BuzzerV2.ino)
+PROTOCOL = "text"
+BAUD_RATE = 9600 if PROTOCOL == "text" else BINARY_BAUD_RATE # Must match Serial.begin() in the Arduino code
+
+# Bigger games over several boards: one (port, number of buttons) entry per board.
+# Boards always use the binary protocol, and their clocks are synchronised so presses
+# on different boards are judged on one timeline (see aggregator.py). Players are
+# numbered across the boards in order: [("COM7", 8), ("COM8", 8)] gives players 1-8
+# on COM7 and 9-16 on COM8. Leave empty for a single board found automatically.
+BOARDS = []
+NUM_PLAYERS = sum(count for _, count in BOARDS) if BOARDS else 2
 
 # Screen dimensions
 screen_width = 600
@@ -22,46 +53,104 @@ BLUE = (0, 0, 255)
 # Cooldown duration in milliseconds (5 seconds) - Applied after a round ends (ESC pressed)
 COOLDOWN_DURATION = 5000
 
+# Maximum redraws per second; the loop sleeps between events instead of spinning
+MAX_FPS = 60
+
+# Every round, buzz and score change is appended here and replayed on start,
+# so scores survive a crash or an early exit. Delete it to start a new tournament.
+JOURNAL_FILE = "arduino_journal.jsonl"
+
+# Per-stage latency of every buzz (press -> pickup -> decision -> sound -> display).
+# F3 toggles the overlay; the histograms are written here at exit.
+LATENCY_CSV = "arduino_latency.csv"
+
+# F5 shows how long each phase of the main loop takes (events, serial, drawing, ...);
+# F6 starts and stops a cProfile capture of the main loop, written to arduino_profile_<time>.prof
+PROFILE_PREFIX = "arduino_profile"
+
+# Reaction times, contested wins and conflicts of every round, kept across sessions.
+# F4 toggles the stats screen; the per-player table and the trend are written here at exit.
+STATS_FILE = "arduino_stats.bin"
+STATS_CSV = "arduino_stats.csv"
+
+# Remote scoreboards (viewer.py on audience screens and tablets) subscribe to this UDP
+# port and get state deltas instead of a screen capture. Off (None) unless set, e.g. to 5005;
+# the port is open to the whole network.
+BROADCAST_PORT = None
+
+# Every byte from the board and every key is recorded to <prefix>_<time>.bzin, so a
+# disputed buzz can be replayed later (python replay.py <file>). None turns it off.
+# Games over several BOARDS are not recorded.
+RECORD_PREFIX = "arduino_input"
+
+# --- Serial Connection ---
+# Every candidate port is probed at once, and a port only counts once the sketch's
+# "Arduino Button Detector Ready" banner is read from it (see discovery.py).
+# The port that worked is tried first on the next start. The probing (about 1.5 s,
+# an Uno resets when its port is opened) runs on a background thread while the window comes up.
+def find_boards():
+    """Returns (finders, serials): one DeviceFinder and Serial (None if not found) per board."""
+    with timeline.phase("device connect"):
+        if BOARDS:
+            # Each board is only looked for on its own port, all of them at once
+            finders = [DeviceFinder([port], BINARY_BAUD_RATE, read_timeout=0.1, last_port_file=None, scan_all=False)
+                       for port, _ in BOARDS]
+            with ThreadPoolExecutor(max_workers=len(BOARDS)) as pool:
+                return finders, list(pool.map(lambda finder: finder.find()[1], finders))
+        finder = DeviceFinder(SERIAL_PORTS_TO_CHECK, BAUD_RATE, read_timeout=0.1) # Read timeout only bounds how long the reader thread takes to stop
+        return [finder], [finder.find()[1]]
+
+print("Attempting to connect to serial port...")
+board_search = ThreadPoolExecutor(max_workers=1).submit(find_boards)
+
 # --- Initialize Pygame ---
-pygame.init()
-pygame.mixer.init() # Initialize the mixer for sound
-pygame.font.init() # Initialize the font module for text rendering
+# Only the subsystems this script uses; the mixer is started by the sound loader's thread
+init_pygame(timeline, display=True, font=True)
 screen = pygame.display.set_mode((screen_width, screen_height))
 pygame.display.set_caption("Arduino Button Buzzer with Scoring")
+timeline.step("window")
 
 # --- Font Setup ---
 # Use the default system font
 font = pygame.font.Font(None, 30)
 small_font = pygame.font.Font(None, 20)
+timeline.step("fonts")
 
 # --- Sound Setup ---
-buzzer_sound = None # Initialize to None
-try:
-    buzzer_sound = pygame.mixer.Sound("buzzer.wav")
-    print("Buzzer sound loaded successfully.")
-except pygame.error as e:
-    print(f"Warning: Could not load buzzer.wav: {e}")
-    print("Buzzer sound will not play.")
-
-
-# --- Serial Connection ---
-ser = None # Initialize serial object to None
-connected_port = None
-print("Attempting to connect to serial port...")
-
-for port in SERIAL_PORTS_TO_CHECK:
-    try:
-        # Attempt to open the serial port
-        ser = serial.Serial(port, BAUD_RATE, timeout=0.01) # Use a small timeout for non-blocking read
-        time.sleep(2) # Give the Arduino time to reset after opening the port
-        if ser.isOpen():
-            connected_port = port
-            print(f"Successfully connected to serial port {connected_port}")
-            break # Exit the loop once connected
-    except serial.SerialException:
-        # print(f"Could not connect to {port}") # Uncomment for debugging connection attempts
-        if ser and ser.isOpen():
-            ser.close() # Close the port if it was partially opened
+# Loaded in the background (from a pre-converted cache, see assets.py) while the serial port is probed.
+# If buzzer.wav cannot be loaded, a warning is printed and the buzzer sound will not play.
+sounds = SoundLoader({"buzzer": "buzzer.wav"}, timeline=timeline).start()
+
+# Show the window straight away and keep it responsive until the board answers
+screen.fill(BLACK)
+screen.blit(font.render("Connecting to the Arduino...", True, WHITE), (50, screen_height // 2 - 20))
+pygame.display.flip()
+timeline.mark("window shown")
+while not board_search.done():
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_p):
+            print("Exiting while the serial ports are probed...")
+            pygame.quit()
+            sys.exit(0)
+    pygame.time.wait(20)
+board_finders, board_serials = board_search.result()
+timeline.step("waiting for the board")
+
+if BOARDS:
+    missing_ports = [port for (port, _), board_ser in zip(BOARDS, board_serials) if board_ser is None]
+    if missing_ports:
+        print(f"No board answered on: {', '.join(missing_ports)}")
+        for board_ser in board_serials:
+            if board_ser is not None:
+                board_ser.close()
+        connected_port = None
+    else:
+        connected_port = ", ".join(port for port, _ in BOARDS)
+else:
+    device_finder, ser = board_finders[0], board_serials[0]
+    connected_port = ser.port if ser is not None else None
+if connected_port:
+    print(f"Successfully connected to serial port {connected_port}")
 
 
 if not connected_port:
@@ -80,141 +169,277 @@ if not connected_port:
     sys.exit(1) # Exit the script if connection fails
 
 
+# --- Serial Reader Thread ---
+# Lines are read and timestamped on a background thread as soon as they arrive,
+# which also wakes the main loop with a SERIAL_PRESS event.
+# If the board is unplugged, the reader waits for it to come back instead of exiting.
+serial_presses = queue.Queue()
+wake_main_loop = lambda: post_event(SERIAL_PRESS)
+player_lines = {b"Player 1 pressed": 1, b"Player 2 pressed": 2}
+
+# Raw input is recorded from the first byte on; replay.py needs the rules to feed it through
+recorder = None
+if RECORD_PREFIX and not BOARDS:
+    recorder = InputRecorder(recording_path(RECORD_PREFIX)).open({
+        "script": "arduino", "protocol": PROTOCOL, "players": list(range(1, NUM_PLAYERS + 1)),
+        "lines": [[line.decode(), player] for line, player in player_lines.items()], "player_map": None,
+        "tie_window_ns": 0, "cooldown_ns": None, "journal": JOURNAL_FILE,
+    })
+
+if BOARDS:
+    boards = []
+    first_player = 1
+    for (port, count), board_ser, finder in zip(BOARDS, board_serials, board_finders):
+        boards.append((board_ser, first_player, count, finder.wait_for_device))
+        first_player += count
+    serial_reader = BuzzAggregator(boards, serial_presses, notify=wake_main_loop)
+elif PROTOCOL == "binary":
+    serial_reader = FrameReader(ser, serial_presses, notify=wake_main_loop, reconnect=device_finder.wait_for_device,
+                                recorder=recorder)
+else:
+    serial_reader = SerialReader(ser, player_lines, serial_presses, notify=wake_main_loop,
+                                 reconnect=device_finder.wait_for_device, recorder=recorder)
+serial_reader.start()
+timeline.step("serial reader")
+
+
 # --- Game State ---
-# States: waiting, buzzed
-game_state = "waiting"
-player_scores = {1: 0, 2: 0} # Initialize scores
-buzzed_player = None
-waiting_start_time = pygame.time.get_ticks() # Record time when waiting starts
+# States: waiting, buzzed (see core.py). The game core holds the state, the scores
+# and the arbiter: first press wins, then presses are ignored until the next round.
+# Scores are restored from the journal; new events are written by a background thread
+journal = Journal(JOURNAL_FILE)
+analytics = Analytics(range(1, NUM_PLAYERS + 1), STATS_FILE).open()
+core = GameCore(range(1, NUM_PLAYERS + 1), tie_window_ns=0, cooldown_ns=None, journal=journal, analytics=analytics)
+core.restore_scores(journal.open())
+core.round_start_ns = time.monotonic_ns() # Reaction times count from here (same clock as the serial reader)
+if recorder is not None:
+    recorder.start(core.round_start_ns, scores=list(core.scores.items()), journal_seq=journal.seq)
 cooldown_end_time = 0 # Time when the current cooldown period ends (applies to waiting state)
-reaction_time = 0 # Store reaction time when buzzed
 
-# Variable to hold the first valid buzz message received in the current frame
-# Format: (player_number, buzz_time_in_pygame_ticks) or None
+latency = LatencyTracker()
+profiler = FrameProfiler(("events", "input", "serial", "game", "draw", "present"), PROFILE_PREFIX)
+broadcaster = StateBroadcaster(BROADCAST_PORT).start() # Sends from its own thread
+broadcast_version = None # Core version the remote scoreboards have
+
+timeline.step("game state") # Journal replay, statistics, broadcast port
+
+# The winning buzz decided since the last frame (the arbiter's Decision), or None
 first_buzz_this_frame = None
 
 # --- Text Rendering Helper ---
-def draw_text(text, font, color, surface, x, y):
-    textobj = font.render(text, True, color)
-    textrect = textobj.get_rect()
-    textrect.topleft = (x, y)
-    surface.blit(textobj, textrect)
+# Rendered text is cached and only the areas that changed are pushed to the display
+renderer = DirtyRenderer(screen, BLACK)
+
+def draw_text(text, font, color, x, y):
+    renderer.text(text, font, color, x, y)
+
+def change_score(delta):
+    if core.score(delta): # Scores the player who buzzed, and journals it
+        print(f"Player {core.winner} score {delta:+d}. New score: {core.scores[core.winner]}")
+
+# Two columns of scores, four for big multi-board games; rows get tighter with more players
+score_font = font if NUM_PLAYERS <= 4 else small_font
+score_columns, score_left, score_step = (2, 50, screen_width - 300) if NUM_PLAYERS <= 8 else (4, 10, screen_width // 4)
+score_top, score_row = (50, 25) if NUM_PLAYERS <= 4 else (20, 18) if NUM_PLAYERS <= 8 else (10, 16)
+score_positions = {
+    player: (score_left + (player - 1) % score_columns * score_step, score_top + (player - 1) // score_columns * score_row)
+    for player in core.players
+}
+
+# Text that changes during the game is only formatted again when its value changes,
+# so an unchanged frame builds no new strings (see render.Label)
+score_labels = {player: Label(f"Player {player} Score: {{}}") for player in core.players}
+winner_label = Label("PLAYER {} BUZZED FIRST!")
+reaction_label = Label("Reaction Time: {:.3f} ms")
+cooldown_label = Label("Next buzz in: {:.1f} s", scale=0.1) # Given whole tenths of a second
 
 # --- Main Game Loop ---
+event_loop = EventLoop(max_fps=MAX_FPS)
+startup_reported = False
 running = True
 while running:
-    current_time = pygame.time.get_ticks()
+    # Sleep until a key, a serial press or a pending redraw needs attention
+    profiler.begin()
+    events = event_loop.wait()
+    profiler.lap("events", event_loop.idle_ns) # pygame.event.get(), not the time slept
+    current_time = time.monotonic_ns() // 1_000_000 # ms; the SDL timer is not started (see startup.py)
 
     # Reset the first_buzz_this_frame at the start of each loop iteration
     first_buzz_this_frame = None
 
+    if events:
+        event_loop.mark_dirty() # Anything that woke us may have changed the screen
+
     # --- Event Handling (Pygame Window) ---
-    for event in pygame.event.get():
+    for event in events:
         if event.type == pygame.QUIT:
             running = False
 
+        # The window was uncovered, repaint all of it
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            renderer.invalidate()
+
         # Handle keyboard input for scoring, resetting, and exiting
         if event.type == pygame.KEYDOWN:
+            key_ns = time.monotonic_ns()
+            if recorder is not None:
+                recorder.key(key_ns, pygame.key.name(event.key))
+
             # Exit key - always active
             if event.key == pygame.K_p:
                 running = False # Set running to False to exit the main loop
 
+            # Latency overlay - always active
+            if event.key == pygame.K_F3:
+                latency.toggle()
+
+            # Stats screen - always active
+            if event.key == pygame.K_F4:
+                analytics.toggle()
+
+            # Frame profiler overlay and cProfile capture - always active
+            if event.key == pygame.K_F5:
+                profiler.toggle()
+            if event.key == pygame.K_F6:
+                profiler.toggle_capture()
+
             # Handle actions based on current game state
-            if game_state == "buzzed" and buzzed_player is not None:
+            if core.state == BUZZED:
                 # Scoring keys - active when a player has buzzed
                 if event.key == pygame.K_f:
-                    player_scores[buzzed_player] += 10
-                    print(f"Player {buzzed_player} score +10. New score: {player_scores[buzzed_player]}")
+                    change_score(10)
                     # State remains 'buzzed' after scoring
                 elif event.key == pygame.K_g:
-                    player_scores[buzzed_player] += 5
-                    print(f"Player {buzzed_player} score +5. New score: {player_scores[buzzed_player]}")
+                    change_score(5)
                      # State remains 'buzzed' after scoring
                 elif event.key == pygame.K_h:
-                    player_scores[buzzed_player] -= 10
-                    print(f"Player {buzzed_player} score -10. New score: {player_scores[buzzed_player]}")
+                    change_score(-10)
                      # State remains 'buzzed' after scoring
                 # Reset key in buzzed state (to go to next round)
                 elif event.key == pygame.K_ESCAPE:
                     print("\n--- Next Round ---")
-                    game_state = "waiting"
-                    buzzed_player = None
-                    
+                    core.next_round(key_ns) # Reaction time is measured from the start of each round
+
 
 
+    profiler.lap("input")
+
     # --- Read from Serial Port ---
-    # Read all available lines from the serial buffer in this frame
-    while ser.in_waiting > 0:
+    # Drain every press the reader thread queued since the last frame and let the
+    # core's arbiter pick the earliest one (the queue is in arrival order).
+    while True:
         try:
-            line = ser.readline().decode('utf-8').strip()
-            if line: # Check if the line is not empty
-                # print(f"Received from Arduino: {line}") # Uncomment for debugging serial input
-
-                # Process the received message only if in the waiting state
-                if game_state == "waiting":
-                     # Check if cooldown has passed before processing a new buzz
-                    if current_time >= cooldown_end_time:
-                        if line == "Player 1 pressed":
-                            # If this is the first buzz detected in this frame's serial buffer
-                            if first_buzz_this_frame is None:
-                                first_buzz_this_frame = (1, current_time) # Store player and time
-                                # print("P1 buzz recorded for this frame") # Debugging
-                        elif line == "Player 2 pressed":
-                             # If this is the first buzz detected in this frame's serial buffer
-                            if first_buzz_this_frame is None:
-                                first_buzz_this_frame = (2, current_time) # Store player and time
-                                # print("P2 buzz recorded for this frame") # Debugging
-
-        except serial.SerialException as e:
-            print(f"Serial read error: {e}")
-            running = False # Exit loop on serial error
-            break # Exit the while ser.in_waiting loop
+            player, t_ns = serial_presses.get_nowait()
+        except queue.Empty:
+            break
+        picked_ns = time.monotonic_ns()
+        # Process the press only once the cooldown has passed; the core ignores presses
+        # after the buzz but counts the player as a contender for the statistics
+        if current_time >= cooldown_end_time:
+            decision = core.press(player, t_ns)
+            if decision is not None:
+                first_buzz_this_frame = decision
+                latency.begin(decision.t_ns)
+                latency.mark("arrival", picked_ns)
+                latency.mark("decision")
+
+    if serial_reader.error is not None:
+        print("Serial connection lost.")
+        running = False # Exit loop if the reader gave up
+    profiler.lap("serial")
 
     # --- Process the winning buzz for this frame (after all serial data is read) ---
     # Check if a winning buzz was recorded during the serial reading for this frame
-    if game_state == "waiting" and first_buzz_this_frame is not None:
-        buzzed_player, buzz_time = first_buzz_this_frame
-        reaction_time = buzz_time - waiting_start_time # Calculate reaction time
-        game_state = "buzzed" # Change state after processing the buzz
+    if first_buzz_this_frame is not None: # The core is now in the 'buzzed' state
+        buzzer_sound = sounds.get("buzzer") # None if not loaded
         if buzzer_sound:
             buzzer_sound.play()
-        print(f"\n!!! PLAYER {buzzed_player} BUZZED FIRST !!! Reaction Time: {reaction_time} ms")
+            latency.mark("sound")
+        print(f"\n!!! PLAYER {core.winner} BUZZED FIRST !!! Reaction Time: {core.reaction_ms:.3f} ms")
+        running_stats = analytics.running[core.winner] # This buzz is counted when the round ends
+        if running_stats.buzzes:
+            print(f"Player {core.winner} average: {running_stats.mean_ms:.0f} ms over {running_stats.buzzes} buzzes")
         # Stay in 'buzzed' state to allow scoring via keyboard
 
 
-    # --- Drawing ---
-    screen.fill(BLACK) # Clear the screen
-
-    # Display scores
-    draw_text(f"Player 1 Score: {player_scores[1]}", font, WHITE, screen, 50, 50)
-    draw_text(f"Player 2 Score: {player_scores[2]}", font, WHITE, screen, screen_width - 250, 50) # Adjust position for Player 2
-
-    # Display game state/instructions
-    if game_state == "waiting":
-        draw_text("Waiting for a buzz...", font, GREEN, screen, 50, screen_height // 2 - 20)
-        # Optionally show cooldown timer if currently in the cooldown period within waiting state
-        if current_time < cooldown_end_time:
-             remaining_cooldown = max(0, cooldown_end_time - current_time)
-             draw_text(f"Next buzz in: {remaining_cooldown/1000:.1f} s", small_font, RED, screen, 50, screen_height // 2 + 20)
-             draw_text("Press P to exit.", small_font, WHITE, screen, 50, screen_height // 2 + 40)
-        else:
-            draw_text("Press P to exit.", small_font, WHITE, screen, 50, screen_height // 2 + 20)
-
+    # --- Remote scoreboards ---
+    if core.version != broadcast_version:
+        broadcaster.publish(core, time.monotonic_ns()) # Only hands the state over
+        broadcast_version = core.version
 
-    elif game_state == "buzzed":
-        # Display the reaction time calculated when buzzing occurred
-        draw_text(f"PLAYER {buzzed_player} BUZZED FIRST!", font, BLUE, screen, 50, screen_height // 2 - 40)
-        draw_text(f"Reaction Time: {reaction_time} ms", font, BLUE, screen, 50, screen_height // 2)
-        draw_text("Press F (+10), G (+5), H (-10) to score.", small_font, WHITE, screen, 50, screen_height // 2 + 40)
-        draw_text("Press ESC for next round.", small_font, WHITE, screen, 50, screen_height // 2 + 60) # Changed instruction
-        draw_text("Press P to exit.", small_font, WHITE, screen, 50, screen_height // 2 + 80)
+    # Keep the cooldown countdown ticking on screen, and the frame profile up to date
+    if current_time < cooldown_end_time or profiler.due():
+        event_loop.mark_dirty()
+    profiler.lap("game")
 
+    # --- Drawing ---
+    # Only when something changed, and at most MAX_FPS times per second
+    if event_loop.should_draw():
+        renderer.begin() # Start listing this frame's text
 
-    pygame.display.flip() # Update the display
+        if analytics.visible:
+            analytics.draw_screen(renderer, small_font, WHITE, 20, 20)
+        else:
+            # Display scores
+            for player, (x, y) in score_positions.items():
+                draw_text(score_labels[player].format(core.scores[player]), score_font, WHITE, x, y)
+
+            # Display game state/instructions
+            if core.state == WAITING:
+                draw_text("Waiting for a buzz...", font, GREEN, 50, screen_height // 2 - 20)
+                # Optionally show cooldown timer if currently in the cooldown period within waiting state
+                if current_time < cooldown_end_time:
+                     remaining_cooldown = max(0, cooldown_end_time - current_time)
+                     draw_text(cooldown_label.format((remaining_cooldown + 50) // 100), small_font, RED, 50, screen_height // 2 + 20)
+                     draw_text("Press P to exit.", small_font, WHITE, 50, screen_height // 2 + 40)
+                else:
+                    draw_text("Press P to exit.", small_font, WHITE, 50, screen_height // 2 + 20)
+
+
+            elif core.state == BUZZED:
+                # Display the reaction time calculated when buzzing occurred
+                draw_text(winner_label.format(core.winner), font, BLUE, 50, screen_height // 2 - 40)
+                draw_text(reaction_label.format(core.reaction_ms), font, BLUE, 50, screen_height // 2)
+                draw_text("Press F (+10), G (+5), H (-10) to score.", small_font, WHITE, 50, screen_height // 2 + 40)
+                draw_text("Press ESC for next round.", small_font, WHITE, 50, screen_height // 2 + 60) # Changed instruction
+                draw_text("Press P to exit.", small_font, WHITE, 50, screen_height // 2 + 80)
+
+
+        if not serial_reader.connected:
+            draw_text("Arduino disconnected - reconnecting...", small_font, RED, 50, screen_height - 40)
+
+        if latency.visible:
+            latency.draw_overlay(renderer, small_font, WHITE, screen_width - 330, screen_height - 100)
+
+        if profiler.visible:
+            profiler.draw_overlay(renderer, small_font, WHITE, screen_width - 330, 10)
+        profiler.lap("draw")
+
+        renderer.present() # Update only the parts of the display that changed
+        profiler.lap("present")
+        latency.mark("display") # Only counts the first frame after a buzz
+        if PROFILE_STARTUP and not startup_reported:
+            timeline.mark("first game frame")
+            timeline.report()
+            startup_reported = True
 
 # --- Cleanup ---
-if ser and ser.isOpen():
-    ser.close()
-    print("Serial port closed.")
+profiler.stop() # Writes out a capture still running
+journal.close() # Writes whatever is still queued
+if recorder is not None:
+    recorder.close(journal_seq=journal.seq)
+core.finish() # Counts the last round
+analytics.close()
+analytics.export_csv(STATS_CSV)
+broadcaster.stop()
+latency.dump_csv(LATENCY_CSV)
+latency.print_summary()
+serial_reader.stop()
+serial_reader.join(timeout=1)
+for reader in getattr(serial_reader, "readers", [serial_reader]): # One reader per board
+    ser = reader.ser # May have been replaced by a reconnect
+    if ser and ser.isOpen():
+        ser.close()
+        print("Serial port closed.")
 pygame.quit()
 sys.exit()
@@ -1,20 +1,124 @@
 // Simple Arduino Button Detection (2 Players)
 // Detects presses on digital pins 2 and 4 and reports via Serial.
+//
+// Two report formats are available:
+//  - Text (default): "Player N pressed" lines at 9600 baud, repeated every
+//    100 ms while the button is held.
+//  - Binary: set BINARY_PROTOCOL to 1. Every press and release edge is sent
+//    at once as a 10-byte frame at 115200 baud, carrying the micros() time of
+//    the edge, so one player's press is never held back behind another's.
+//    Frame layout (little endian), decoded by buzz_protocol.py:
+//      0xA5 | kind (1 = press, 2 = release) | player | seq (u16) | micros (u32) | checksum
+//    The checksum is the low byte of the sum of the first 9 bytes.
+//    The host may send ping frames (kind 3, ping id in the player field); the
+//    board answers each with a pong (kind 4, same id, its micros()) so the
+//    host can line up the clocks of several boards (aggregator.py).
+#define BINARY_PROTOCOL 0
 
 const int button1 = 4;  // Player 1 button connected to digital pin 2
 const int button2 = 6;  // Player 2 button connected to digital pin 4
 
+#if BINARY_PROTOCOL
+const unsigned long DEBOUNCE_US = 5000; // Ignore contact bounce for 5 ms after an edge
+
+const byte FRAME_SYNC = 0xA5;
+const byte FRAME_PRESS = 1;
+const byte FRAME_RELEASE = 2;
+const byte FRAME_PING = 3;
+const byte FRAME_PONG = 4;
+
+// Add more pins here for more players on this board; they report as players 3, 4, ...
+const int buttons[] = {button1, button2};
+const int NUM_BUTTONS = sizeof(buttons) / sizeof(buttons[0]);
+int lastState[NUM_BUTTONS];
+unsigned long lastEdgeUs[NUM_BUTTONS];
+unsigned int seq = 0;
+byte rxFrame[10];
+int rxLen = 0;
+
+void sendFrame(byte kind, byte player, unsigned long us) {
+  byte frame[10];
+  frame[0] = FRAME_SYNC;
+  frame[1] = kind;
+  frame[2] = player;
+  frame[3] = seq & 0xFF;
+  frame[4] = (seq >> 8) & 0xFF;
+  frame[5] = us & 0xFF;
+  frame[6] = (us >> 8) & 0xFF;
+  frame[7] = (us >> 16) & 0xFF;
+  frame[8] = (us >> 24) & 0xFF;
+  byte sum = 0;
+  for (int i = 0; i < 9; i++) {
+    sum += frame[i];
+  }
+  frame[9] = sum;
+  Serial.write(frame, sizeof(frame)); // Goes into the TX buffer, does not wait for the line
+  seq++;
+}
+
+// Answers the host's clock-sync pings with the current micros()
+void handlePings() {
+  while (Serial.available() > 0) {
+    byte b = Serial.read();
+    if (rxLen == 0 && b != FRAME_SYNC) {
+      continue; // Wait for the start of a frame
+    }
+    rxFrame[rxLen++] = b;
+    if (rxLen < 10) {
+      continue;
+    }
+    rxLen = 0;
+    byte sum = 0;
+    for (int i = 0; i < 9; i++) {
+      sum += rxFrame[i];
+    }
+    if (sum == rxFrame[9] && rxFrame[1] == FRAME_PING) {
+      sendFrame(FRAME_PONG, rxFrame[2], micros());
+    }
+  }
+}
+#endif
+
 void setup() {
   // Configure button pins with internal pull-up resistors
   pinMode(button1, INPUT_PULLUP);
   pinMode(button2, INPUT_PULLUP);
+#if BINARY_PROTOCOL
+  for (int i = 0; i < NUM_BUTTONS; i++) {
+    pinMode(buttons[i], INPUT_PULLUP);
+  }
+#endif
 
   // Initialize serial communication
+#if BINARY_PROTOCOL
+  Serial.begin(115200);
+  for (int i = 0; i < NUM_BUTTONS; i++) {
+    lastState[i] = HIGH;
+    lastEdgeUs[i] = 0;
+  }
+#else
   Serial.begin(9600);
+#endif
   Serial.println("Arduino Button Detector Ready");
   Serial.println("Press Player 1 (Pin 2) or Player 2 (Pin 4) button.");
 }
 
+#if BINARY_PROTOCOL
+void loop() {
+  // Sample every button each pass and report edges only; no delays anywhere
+  for (int i = 0; i < NUM_BUTTONS; i++) {
+    int reading = digitalRead(buttons[i]);
+    unsigned long now = micros();
+    if (reading != lastState[i] && now - lastEdgeUs[i] >= DEBOUNCE_US) {
+      lastState[i] = reading;
+      lastEdgeUs[i] = now;
+      // LOW means pressed because of INPUT_PULLUP
+      sendFrame(reading == LOW ? FRAME_PRESS : FRAME_RELEASE, i + 1, now);
+    }
+  }
+  handlePings();
+}
+#else
 void loop() {
   // Read the current state of the buttons
   int reading1 = digitalRead(button1);
@@ -38,3 +142,4 @@ void loop() {
   // For more robust detection, consider adding debounce logic
   // delay(1); // Optional small delay if needed
 }
+#endif
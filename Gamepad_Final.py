@@ -1,7 +1,23 @@
+from startup import PROFILE_STARTUP, StartupTimeline, init_pygame # First, so the startup timeline covers the imports
+timeline = StartupTimeline()
+
 import pygame
 import sys
 import time # Import the time module for tracking cooldown and reaction time
 
+from analytics import Analytics
+from assets import SoundLoader
+from broadcast import StateBroadcaster
+from core import BUZZED, WAITING, GameCore
+from event_loop import EventLoop
+from frame_profiler import FrameProfiler
+from gamepad_input import GamepadInput
+from journal import Journal
+from latency import LatencyTracker
+from recording import InputRecorder, recording_path
+from render import DirtyRenderer, Label
+timeline.step("imports")
+
 print("""
 .-------------------------------------------------------.
 | ____   ___   ____ ____ ____    ____   ___ ____  ____  |
@@ -12,11 +28,8 @@ print("""
 '-------------------------------------------------------'
 """)
 
-# Initialize Pygame
-pygame.init()
-pygame.joystick.init()
-pygame.mixer.init() # Initialize the mixer for sound
-pygame.font.init() # Initialize the font module for text rendering
+# Initialize Pygame: only the subsystems this script uses; the mixer is started by the sound loader's thread
+init_pygame(timeline, display=True, font=True, joystick=True)
 
 # --- Configuration ---
 # Screen dimensions
@@ -24,6 +37,7 @@ screen_width = 600
 screen_height = 400
 screen = pygame.display.set_mode((screen_width, screen_height))
 pygame.display.set_caption("POGSS 2025 SCOREBOARD")
+timeline.step("window")
 
 # Colors
 WHITE = (255, 255, 255)
@@ -35,26 +49,54 @@ BLUE = (0, 0, 255)
 # Cooldown duration in milliseconds (5 seconds)
 COOLDOWN_DURATION = 5000
 
+# Number of players; each one maps a button on any connected controller
+NUM_PLAYERS = 2
+
+# Maximum redraws per second; the loop sleeps between events instead of spinning
+MAX_FPS = 60
+
+# Every round, buzz and score change is appended here and replayed on start,
+# so scores survive a crash or an early exit. Delete it to start a new tournament.
+JOURNAL_FILE = "gamepad_journal.jsonl"
+
+# Per-stage latency of every buzz (press -> decision -> sound -> display).
+# F3 toggles the overlay; the histograms are written here at exit.
+LATENCY_CSV = "gamepad_latency.csv"
+
+# F5 shows how long each phase of the main loop takes (events, buttons, drawing, ...);
+# F6 starts and stops a cProfile capture of the main loop, written to gamepad_profile_<time>.prof
+PROFILE_PREFIX = "gamepad_profile"
+
+# Reaction times, contested wins and conflicts of every round, kept across sessions.
+# F4 toggles the stats screen; the per-player table and the trend are written here at exit.
+STATS_FILE = "gamepad_stats.bin"
+STATS_CSV = "gamepad_stats.csv"
+
+# Remote scoreboards (viewer.py on audience screens and tablets) subscribe to this UDP
+# port and get state deltas instead of a screen capture. Off (None) unless set, e.g. to 5005;
+# the port is open to the whole network.
+BROADCAST_PORT = None
+
+# Every controller button and key is recorded to <prefix>_<time>.bzin, so a disputed
+# buzz can be replayed later (python replay.py <file>). None turns it off.
+RECORD_PREFIX = "gamepad_input"
+
 # --- Font Setup ---
 # Use the default system font
 font = pygame.font.Font(None, 30)
 small_font = pygame.font.Font(None, 20)
+timeline.step("fonts")
 
 # --- Sound Setup ---
-try:
-    buzzer_sound = pygame.mixer.Sound("buzzer.wav")
-except pygame.error as e:
-    print(f"Warning: Could not load buzzer.wav: {e}")
-    buzzer_sound = None # Set to None if loading fails
+# Loaded in the background from a pre-converted cache (see assets.py); prints a warning if loading fails
+sounds = SoundLoader({"buzzer": "buzzer.wav"}, timeline=timeline).start()
 
 # --- Joystick Setup ---
-joysticks = []
-for i in range(pygame.joystick.get_count()):
-    joysticks.append(pygame.joystick.Joystick(i))
-    joysticks[-1].init()
-    print(f"Detected Joystick {i}: {joysticks[-1].get_name()}")
+# Every controller is opened, and controllers plugged in later are picked up too
+gamepads = GamepadInput()
+timeline.step("device connect")
 
-if not joysticks:
+if not gamepads.joysticks:
     print("No joysticks detected. Please connect a gamepad and restart the script.")
     # Display error message on screen before quitting
     error_text = font.render("No joysticks detected. Connect gamepad and restart.", True, RED)
@@ -65,153 +107,247 @@ if not joysticks:
     pygame.quit()
     sys.exit()
 
-
-joystick = joysticks[0]
-
 # --- Game State ---
-game_state = "mapping_p1" # States: mapping_p1, mapping_p2, waiting, buzzed
-player_buttons = {1: None, 2: None}
-player_scores = {1: 0, 2: 0} # Initialize scores
-buzzed_player = None
-last_buzz_time = 0 # Variable to store the time of the last valid buzz for cooldown
-waiting_start_time = 0 # Variable to store the time when the game enters the 'waiting' state
-
-# Variable to hold the winning buzz event for the current frame
-# Format: (player_number, buzz_time) or None
+mapping = True # Buttons are being assigned to players; the game core runs after that
+mapping_player = 1 # Player whose button is being mapped
+last_buzz_time = 0 # Time of the last valid buzz for cooldown (monotonic ns)
+
+# The game core holds the other states (waiting, buzzed, see core.py), the scores and
+# the arbiter: first press wins, then presses are ignored until the game is reset.
+# Scores are restored from the journal; new events are written by a background thread
+journal = Journal(JOURNAL_FILE)
+analytics = Analytics(range(1, NUM_PLAYERS + 1), STATS_FILE).open()
+core = GameCore(range(1, NUM_PLAYERS + 1), tie_window_ns=0, cooldown_ns=None, journal=journal, analytics=analytics)
+core.restore_scores(journal.open())
+core.round_start_ns = time.monotonic_ns() # Set again when the buttons are mapped; until then it marks the session start
+recorder = None
+if RECORD_PREFIX:
+    recorder = InputRecorder(recording_path(RECORD_PREFIX)).open({
+        "script": "gamepad", "players": list(core.players), "tie_window_ns": 0, "cooldown_ns": None,
+        "cooldown_ms": COOLDOWN_DURATION, "journal": JOURNAL_FILE,
+    })
+    recorder.start(core.round_start_ns, scores=list(core.scores.items()), journal_seq=journal.seq)
+latency = LatencyTracker()
+profiler = FrameProfiler(("events", "buttons", "input", "game", "draw", "present"), PROFILE_PREFIX)
+broadcaster = StateBroadcaster(BROADCAST_PORT).start() # Sends from its own thread
+broadcast_version = None # Core version the remote scoreboards have
+timeline.step("game state") # Journal replay, statistics, broadcast port
+
+# The winning buzz decided in the current frame (the arbiter's Decision), or None
 winning_buzz_this_frame = None
 
 # --- Text Rendering Helper ---
-def draw_text(text, font, color, surface, x, y):
-    textobj = font.render(text, True, color)
-    textrect = textobj.get_rect()
-    textrect.topleft = (x, y)
-    surface.blit(textobj, textrect)
+# Rendered text is cached and only the areas that changed are pushed to the display
+renderer = DirtyRenderer(screen, BLACK)
+
+def draw_text(text, font, color, x, y):
+    renderer.text(text, font, color, x, y)
+
+def change_score(delta):
+    if core.score(delta): # Scores the player who buzzed, and journals it
+        print(f"Player {core.winner} score {delta:+d}. New score: {core.scores[core.winner]}")
+
+# Score positions: two columns, as many rows as needed (smaller text for big games)
+score_font = font if NUM_PLAYERS <= 4 else small_font
+score_top, score_row = (50, 25) if NUM_PLAYERS <= 4 else (20, 18)
+score_positions = {
+    player: (50 if player % 2 else screen_width - 250, score_top + (player - 1) // 2 * score_row)
+    for player in core.players
+}
+
+# Text that changes during the game is only formatted again when its value changes,
+# so an unchanged frame builds no new strings (see render.Label)
+score_labels = {player: Label(f"Player {player} Score: {{}}") for player in core.players}
+winner_label = Label("PLAYER {} BUZZED FIRST!")
+reaction_label = Label("Reaction Time: {:.3f} ms")
 
 print("\n--- Game Setup ---")
 print("Press the button for Player 1.")
 
 # --- Main Game Loop ---
+event_loop = EventLoop(max_fps=MAX_FPS)
+startup_reported = False
 running = True
 while running:
-    # Get current time in milliseconds
-    current_time = pygame.time.get_ticks()
+    # Sleep until a button, a key or a pending redraw needs attention.
+    # While a buzz is possible, wake every millisecond so SDL reads the controllers at a fixed rate.
+    profiler.begin()
+    events = event_loop.wait(gamepads.POLL_INTERVAL_MS if not mapping and core.state == WAITING else None)
+    profiler.lap("events", event_loop.idle_ns) # pygame.event.get(), not the time slept
 
     # Reset winning buzz for this frame at the start of each loop iteration
     winning_buzz_this_frame = None
 
+    if events:
+        event_loop.mark_dirty() # Anything that woke us may have changed the screen
+
+    # --- Joystick Button Presses ---
+    # Stamped the moment this loop picked them up, in SDL's queue order
+    for instance_id, button, t_ns in gamepads.presses(events):
+        if recorder is not None:
+            recorder.joy_button(t_ns, instance_id, button)
+        # print(f"Button {button} pressed on Joystick {instance_id}") # Uncomment for debugging button presses
+
+        if mapping:
+            # Assign this button to the player being mapped
+            if not gamepads.assign(mapping_player, instance_id, button):
+                print(f"This button is already assigned to Player {gamepads.player_for(instance_id, button)}. Please choose a different button for Player {mapping_player}.")
+            else:
+                print(f"Button {button} on Joystick {instance_id} assigned to Player {mapping_player}.")
+                mapping_player += 1
+                if mapping_player <= NUM_PLAYERS:
+                    print(f"Press the button for Player {mapping_player}.")
+                else:
+                    mapping = False
+                    core.round_start_ns = t_ns # Record the time when waiting starts
+                    print("\n--- Game Started ---")
+                    print("Waiting for a buzz...")
+                    print("Press the ESC key to reset.")
+
+        elif core.state == WAITING:
+            # Check if the cooldown has passed before processing a buzz
+            if t_ns - last_buzz_time > COOLDOWN_DURATION * 1_000_000:
+                # Check if the pressed button belongs to a player (one table lookup)
+                buzzer_player = gamepads.player_for(instance_id, button)
+                if buzzer_player:
+                    decision = core.press(buzzer_player, t_ns)
+                    if decision is not None:
+                        winning_buzz_this_frame = decision
+                        latency.begin(decision.t_ns)
+                        latency.mark("arrival", t_ns) # Stamped when this loop picked it up
+                        latency.mark("decision")
+
+            # else:
+                # print("Cooldown active. Please wait.") # Uncomment for debugging cooldown
+
+        elif core.state == BUZZED:
+            # Too late to win, but the player counts as a contender in the statistics
+            core.press(gamepads.player_for(instance_id, button), t_ns)
+
+    profiler.lap("buttons")
+
     # --- Event Handling ---
     # Process all events in the queue for this frame
-    for event in pygame.event.get():
+    for event in events:
         if event.type == pygame.QUIT:
             running = False
 
-        # Handle joystick button presses
-        if event.type == pygame.JOYBUTTONDOWN:
-            button = event.button
-            # print(f"Button {button} pressed on Joystick {event.joy}") # Uncomment for debugging button presses
-
-            if game_state == "mapping_p1":
-                # Assign this button to Player 1
-                player_buttons[1] = button
-                print(f"Button {button} assigned to Player 1.")
-                game_state = "mapping_p2"
-                print("Press the button for Player 2.")
-
-            elif game_state == "mapping_p2":
-                # Assign this button to Player 2
-                if button == player_buttons[1]:
-                    print("This button is already assigned to Player 1. Please choose a different button for Player 2.")
-                else:
-                    player_buttons[2] = button
-                    print(f"Button {button} assigned to Player 2.")
-                    game_state = "waiting"
-                    waiting_start_time = current_time # Record the time when waiting starts
-                    print("\n--- Game Started ---")
-                    print("Waiting for a buzz...")
-                    print("Press the ESC key to reset.")
+        # The window was uncovered, repaint all of it
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            renderer.invalidate()
 
-            elif game_state == "waiting":
-                # Check if the cooldown has passed before processing a buzz
-                if current_time - last_buzz_time > COOLDOWN_DURATION:
-                    # Check if the pressed button is one of the player buttons
-                    if button == player_buttons[1] or button == player_buttons[2]:
-                        # If this is the first valid buzz detected in this frame's event queue
-                        if winning_buzz_this_frame is None:
-                            buzzer_player = 1 if button == player_buttons[1] else 2
-                            # Use the current_time from the main loop as the buzz time
-                            # Pygame event queue order determines which event is processed first
-                            buzz_time = current_time
-                            winning_buzz_this_frame = (buzzer_player, buzz_time)
-
-                # else:
-                    # print("Cooldown active. Please wait.") # Uncomment for debugging cooldown
+        # Controllers plugged in or removed
+        gamepads.handle_device_event(event)
 
         # Handle keyboard input for scoring, resetting, and exiting
         if event.type == pygame.KEYDOWN:
+            key_ns = time.monotonic_ns()
+            if recorder is not None:
+                recorder.key(key_ns, pygame.key.name(event.key))
+            if event.key == pygame.K_F3:
+                latency.toggle() # Latency overlay
+            if event.key == pygame.K_F4:
+                analytics.toggle() # Stats screen
+            if event.key == pygame.K_F5:
+                profiler.toggle() # Frame profiler overlay
+            if event.key == pygame.K_F6:
+                profiler.toggle_capture() # cProfile capture of the main loop
             if event.key == pygame.K_ESCAPE:
-                if game_state == "buzzed":
+                if not mapping and core.state == BUZZED:
                     print("\n--- Game Reset ---")
-                    game_state = "waiting"
-                    buzzed_player = None
                     last_buzz_time = 0 # Reset cooldown timer on game reset
-                    waiting_start_time = pygame.time.get_ticks() # Reset waiting start time
+                    core.next_round(key_ns) # Reset waiting start time
                     print("Waiting for a buzz...")
             # Scoring keys - only active when a player has buzzed
-            elif game_state == "buzzed" and buzzed_player is not None:
+            elif not mapping and core.state == BUZZED:
                 if event.key == pygame.K_f:
-                    player_scores[buzzed_player] += 10
-                    print(f"Player {buzzed_player} score +10. New score: {player_scores[buzzed_player]}")
+                    change_score(10)
                 elif event.key == pygame.K_g:
-                    player_scores[buzzed_player] += 5
-                    print(f"Player {buzzed_player} score +5. New score: {player_scores[buzzed_player]}")
+                    change_score(5)
                 elif event.key == pygame.K_h:
-                    player_scores[buzzed_player] -= 10
-                    print(f"Player {buzzed_player} score -10. New score: {player_scores[buzzed_player]}")
+                    change_score(-10)
             # Exit key
             elif event.key == pygame.K_p:
                 running = False # Set running to False to exit the main loop
+    profiler.lap("input")
 
 
     # --- Process the winning buzz for this frame (after all events are handled) ---
     # Check if a winning buzz was recorded during the event processing for this frame
-    if game_state == "waiting" and winning_buzz_this_frame is not None:
-        buzzed_player, buzz_time = winning_buzz_this_frame
-        game_state = "buzzed"
-        last_buzz_time = buzz_time # Record the time of this buzz
-        reaction_time = buzz_time - waiting_start_time # Calculate reaction time
+    if winning_buzz_this_frame is not None: # The core is now in the 'buzzed' state
+        last_buzz_time = winning_buzz_this_frame.t_ns # Record the time of this buzz
+        buzzer_sound = sounds.get("buzzer") # None if not loaded
         if buzzer_sound:
             buzzer_sound.play() # Play the buzzer sound
-        print(f"\n!!! PLAYER {buzzed_player} BUZZED FIRST !!! Reaction Time: {reaction_time} ms")
+            latency.mark("sound")
+        print(f"\n!!! PLAYER {core.winner} BUZZED FIRST !!! Reaction Time: {core.reaction_ms:.3f} ms")
+        running_stats = analytics.running[core.winner] # This buzz is counted when the round ends
+        if running_stats.buzzes:
+            print(f"Player {core.winner} average: {running_stats.mean_ms:.0f} ms over {running_stats.buzzes} buzzes")
         print("Press the ESC key to reset.")
 
 
+    # --- Remote scoreboards ---
+    if core.version != broadcast_version:
+        broadcaster.publish(core, time.monotonic_ns()) # Only hands the state over
+        broadcast_version = core.version
+
+    # Keep the frame profile up to date
+    if profiler.due():
+        event_loop.mark_dirty()
+    profiler.lap("game")
+
     # --- Drawing ---
-    screen.fill(BLACK) # Clear the screen
-
-    # Display scores
-    draw_text(f"Player 1 Score: {player_scores[1]}", font, WHITE, screen, 50, 50)
-    draw_text(f"Player 2 Score: {player_scores[2]}", font, WHITE, screen, screen_width - 250, 50) # Adjust position for Player 2
-
-    # Display game state/instructions
-    if game_state == "mapping_p1":
-        draw_text("Press the button for Player 1", font, WHITE, screen, 50, screen_height // 2 - 20)
-    elif game_state == "mapping_p2":
-        draw_text("Press the button for Player 2", font, WHITE, screen, 50, screen_height // 2 - 20)
-    elif game_state == "waiting":
-        draw_text("Waiting for a buzz...", font, GREEN, screen, 50, screen_height // 2 - 20)
-        draw_text("Press ESC to reset.", small_font, WHITE, screen, 50, screen_height // 2 + 20)
-        draw_text("Press P to exit.", small_font, WHITE, screen, 50, screen_height // 2 + 40) # Add exit instruction
-    elif game_state == "buzzed":
-        reaction_time = last_buzz_time - waiting_start_time # Recalculate for display
-        draw_text(f"PLAYER {buzzed_player} BUZZED FIRST!", font, BLUE, screen, 50, screen_height // 2 - 40)
-        draw_text(f"Reaction Time: {reaction_time} ms", font, BLUE, screen, 50, screen_height // 2)
-        draw_text("Press F (+10), G (+5), H (-10) to score.", small_font, WHITE, screen, 50, screen_height // 2 + 40)
-        draw_text("Press ESC to reset for next round.", small_font, WHITE, screen, 50, screen_height // 2 + 60)
-        draw_text("Press P to exit.", small_font, WHITE, screen, 50, screen_height // 2 + 80) # Add exit instruction
+    # Only when something changed, and at most MAX_FPS times per second
+    if event_loop.should_draw():
+        renderer.begin() # Start listing this frame's text
+
+        if analytics.visible:
+            analytics.draw_screen(renderer, small_font, WHITE, 20, 20)
+        else:
+            # Display scores
+            for player, (x, y) in score_positions.items():
+                draw_text(score_labels[player].format(core.scores[player]), score_font, WHITE, x, y)
+
+            # Display game state/instructions
+            if mapping:
+                draw_text(f"Press the button for Player {mapping_player}", font, WHITE, 50, screen_height // 2 - 20)
+            elif core.state == WAITING:
+                draw_text("Waiting for a buzz...", font, GREEN, 50, screen_height // 2 - 20)
+                draw_text("Press ESC to reset.", small_font, WHITE, 50, screen_height // 2 + 20)
+                draw_text("Press P to exit.", small_font, WHITE, 50, screen_height // 2 + 40) # Add exit instruction
+            elif core.state == BUZZED:
+                draw_text(winner_label.format(core.winner), font, BLUE, 50, screen_height // 2 - 40)
+                draw_text(reaction_label.format(core.reaction_ms), font, BLUE, 50, screen_height // 2)
+                draw_text("Press F (+10), G (+5), H (-10) to score.", small_font, WHITE, 50, screen_height // 2 + 40)
+                draw_text("Press ESC to reset for next round.", small_font, WHITE, 50, screen_height // 2 + 60)
+                draw_text("Press P to exit.", small_font, WHITE, 50, screen_height // 2 + 80) # Add exit instruction
 	
+        if latency.visible:
+            latency.draw_overlay(renderer, small_font, WHITE, screen_width - 330, screen_height - 100)
+
+        if profiler.visible:
+            profiler.draw_overlay(renderer, small_font, WHITE, screen_width - 330, 10)
+        profiler.lap("draw")
 
-    pygame.display.flip() # Update the display
+        renderer.present() # Update only the parts of the display that changed
+        profiler.lap("present")
+        latency.mark("display") # Only counts the first frame after a buzz
+        if PROFILE_STARTUP and not startup_reported:
+            timeline.mark("first game frame")
+            timeline.report()
+            startup_reported = True
 
 # --- Cleanup ---
+profiler.stop() # Writes out a capture still running
+journal.close() # Writes whatever is still queued
+if recorder is not None:
+    recorder.close(journal_seq=journal.seq)
+core.finish() # Counts the last round
+analytics.close()
+analytics.export_csv(STATS_CSV)
+broadcaster.stop()
+latency.dump_csv(LATENCY_CSV)
+latency.print_summary()
 pygame.quit()
 sys.exit()
@@ -0,0 +1,212 @@
+import heapq
+import queue
+import threading
+import time
+from collections import deque
+
+import serial
+
+from buzz_protocol import FRAME_PING, FRAME_PONG, FRAME_PRESS, DeviceClock, encode_frame
+from serial_reader import FrameReader
+
+PING_INTERVAL = 0.5 # Seconds between clock-sync pings to each board once synced
+FAST_PINGS = 8 # Pings sent 50 ms apart after start so the first estimate comes quickly
+MAX_ROUND_TRIP_NS = 50_000_000 # Exchanges slower than this say nothing useful about the offset
+SETTLE_NS = 10_000_000 # How long a press is held back for slower boards, see BuzzAggregator
+
+
+class ClockSync:
+    """Estimates one board's clock offset and drift from ping/echo exchanges.
+
+    Every exchange gives a sample: the board's micros() when it answered, and
+    the host time halfway between sending the ping and receiving the pong. The
+    midpoint is off by at most half the round trip, so only the faster half of
+    the recent exchanges is kept, and a least-squares line through them gives
+    the offset and the drift (an Uno's ceramic resonator can be off by a few
+    thousand ppm, i.e. milliseconds per second). Until the samples span
+    MIN_DRIFT_SPAN_NS only the offset is estimated; before the first exchange,
+    DeviceClock's arrival-based offset is used.
+    """
+
+    MIN_DRIFT_SPAN_NS = 2_000_000_000
+
+    def __init__(self, window=64):
+        self.clock = DeviceClock() # Unwraps micros() and provides the fallback
+        self.samples = deque(maxlen=window) # (device ns, host midpoint ns, round trip ns)
+        self.rate = 1.0 # Host ns per device ns
+        self._device_ref = None
+        self._host_ref = None
+
+    @property
+    def synced(self):
+        return self._device_ref is not None
+
+    @property
+    def drift_ppm(self):
+        """How fast the board's clock runs compared to the host's (positive = fast)."""
+        return (1.0 / self.rate - 1.0) * 1e6
+
+    def device_ns(self, micros):
+        """Unwrapped device time; must see every frame's micros in arrival order."""
+        return self.clock.device_ns(micros)
+
+    def add_sample(self, micros, sent_ns, received_ns):
+        device_ns = self.clock.device_ns(micros)
+        round_trip = received_ns - sent_ns
+        if round_trip > MAX_ROUND_TRIP_NS:
+            return
+        self.samples.append((device_ns, (sent_ns + received_ns) // 2, round_trip))
+        self._fit()
+
+    def to_host_ns(self, micros, arrival_ns):
+        if self._device_ref is None:
+            return self.clock.to_host_ns(micros, arrival_ns)
+        device_ns = self.clock.device_ns(micros)
+        return self._host_ref + round((device_ns - self._device_ref) * self.rate)
+
+    def _fit(self):
+        samples = sorted(self.samples, key=lambda sample: sample[2])
+        best = samples[:max(1, len(samples) // 2)]
+        # Work relative to the first sample so the sums stay small enough for floats
+        x0, y0 = best[0][0], best[0][1]
+        xs = [sample[0] - x0 for sample in best]
+        ys = [sample[1] - y0 for sample in best]
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(ys) / len(ys)
+        rate = 1.0
+        if max(xs) - min(xs) >= self.MIN_DRIFT_SPAN_NS:
+            variance = sum((x - mean_x) ** 2 for x in xs)
+            rate = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+        self.rate = rate
+        self._device_ref = x0 + round(mean_x)
+        self._host_ref = y0 + round(mean_y)
+
+
+class BoardReader(FrameReader):
+    """FrameReader for one board of a multi-board game.
+
+    The board's pongs feed its ClockSync, and its players 1..num_players are
+    renumbered from `first_player` so every board's buttons get their own ids.
+    """
+
+    def __init__(self, ser, first_player, num_players, presses, notify=None, reconnect=None):
+        super().__init__(ser, presses, notify=notify, reconnect=reconnect)
+        self.first_player = first_player
+        self.num_players = num_players
+        self.sync = ClockSync()
+        self._pings = {} # Ping id -> host time it was sent
+        self._next_ping = 0
+
+    def ping(self):
+        ping_id = self._next_ping
+        self._next_ping = (ping_id + 1) & 0xFF
+        frame = encode_frame(FRAME_PING, ping_id, 0, 0)
+        self._pings[ping_id] = time.monotonic_ns()
+        self.ser.write(frame)
+
+    def reset_stream(self):
+        super().reset_stream()
+        self.sync = ClockSync() # The board restarted, its clock starts over
+        self._pings.clear()
+
+    def handle_frame(self, kind, player, micros, arrival_ns):
+        if kind == FRAME_PONG:
+            sent_ns = self._pings.pop(player, None)
+            if sent_ns is not None:
+                self.sync.add_sample(micros, sent_ns, arrival_ns)
+            else:
+                self.sync.device_ns(micros)
+        elif kind == FRAME_PRESS and 1 <= player <= self.num_players:
+            self.put_press(self.first_player + player - 1, self.sync.to_host_ns(micros, arrival_ns))
+        else:
+            self.sync.device_ns(micros)
+
+    def put_press(self, player, t_ns):
+        self.presses.put((player, t_ns)) # The aggregator's merge thread is blocked on this queue
+
+
+class BuzzAggregator:
+    """Merges the presses of several boards onto one host timeline.
+
+    `boards` is a list of (Serial, first_player, num_players, reconnect) tuples;
+    reconnect may be None. Each board gets a BoardReader, and a ping thread
+    keeps every board's ClockSync up to date. Presses are converted to host time
+    and held for `settle_ns` before they are released into `presses` in
+    timestamp order, so a press that took longer to cross one board's USB link
+    still beats a later press on another board. `presses` carries the same
+    (player, t_ns) records as a single FrameReader, so the arbiter is unchanged.
+    """
+
+    def __init__(self, boards, presses=None, notify=None, settle_ns=SETTLE_NS, ping_interval=PING_INTERVAL):
+        self.presses = presses if presses is not None else queue.Queue()
+        self.notify = notify
+        self.settle_ns = settle_ns
+        self.ping_interval = ping_interval
+        self._incoming = queue.Queue()
+        self._stop_event = threading.Event()
+        self.readers = [
+            BoardReader(ser, first_player, num_players, self._incoming, notify=notify, reconnect=reconnect)
+            for ser, first_player, num_players, reconnect in boards
+        ]
+        self._threads = [
+            threading.Thread(target=self._merge, daemon=True),
+            threading.Thread(target=self._ping, daemon=True),
+        ]
+
+    @property
+    def connected(self):
+        return all(reader.connected for reader in self.readers)
+
+    @property
+    def error(self):
+        for reader in self.readers:
+            if reader.error is not None:
+                return reader.error
+        return None
+
+    def start(self):
+        for reader in self.readers:
+            reader.start()
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        for reader in self.readers:
+            reader.stop()
+
+    def join(self, timeout=None):
+        for thread in self.readers + self._threads:
+            thread.join(timeout)
+
+    def _ping(self):
+        sent = 0
+        while not self._stop_event.is_set():
+            for reader in self.readers:
+                if reader.connected:
+                    try:
+                        reader.ping()
+                    except (serial.SerialException, OSError):
+                        pass # The reader notices the failure and reconnects
+            sent += 1
+            self._stop_event.wait(0.05 if sent < FAST_PINGS else self.ping_interval)
+
+    def _merge(self):
+        pending = [] # Heap of (t_ns, player)
+        while not self._stop_event.is_set():
+            timeout = 0.1 # Only bounds how long stop() takes
+            if pending:
+                timeout = max(0, (pending[0][0] + self.settle_ns - time.monotonic_ns()) / 1_000_000_000)
+            try:
+                player, t_ns = self._incoming.get(timeout=timeout)
+                heapq.heappush(pending, (t_ns, player))
+            except queue.Empty:
+                pass
+            now = time.monotonic_ns()
+            released = False
+            while pending and pending[0][0] + self.settle_ns <= now:
+                t_ns, player = heapq.heappop(pending)
+                self.presses.put((player, t_ns))
+                released = True
+            if released and self.notify is not None:
+                self.notify()
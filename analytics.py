@@ -0,0 +1,401 @@
+"""Reaction-time and buzz statistics over whole tournaments.
+
+Every decided round is one row, kept in memory as columns (array.array, one
+per field) and appended to a small binary file, so the statistics carry on
+across sessions:
+
+    t           wall-clock time the round was decided (s)
+    session     0 for the first run of the game, then 1, 2, ...
+    winner      index into the player list, -1 for a conflict
+    conflict    1 if several players pressed inside the tie window
+    contenders  how many players pressed during the round
+    pressed     bit mask of the players who pressed
+    reaction    winner's reaction time (ms), NaN for a conflict
+
+Each record_round() updates running per-player statistics in constant time
+(count, mean and spread, wins, contested wins, conflicts, and a histogram
+for the percentiles). full_stats() recomputes exact distributions from the
+columns; it is vectorised with NumPy when that is installed and falls back
+to plain Python otherwise.
+"""
+import csv
+import math
+import struct
+import time
+from array import array
+
+from latency import NUM_BUCKETS, LatencyHistogram
+
+try:
+    import numpy as np # Optional: makes full_stats() on hundreds of thousands of rounds take milliseconds
+except ImportError:
+    np = None
+
+TREND_BIN_S = 15 * 60 # Width of the time-of-session bins
+MAX_PLAYERS = 64 # Players that fit in the `pressed` mask
+
+_MAGIC = b"BZST\x01\x00\x00\x00"
+_ROW = struct.Struct("<dIhBBQd") # t, session, winner, conflict, contenders, pressed, reaction
+_COLUMNS = (("t", "d"), ("session", "I"), ("winner", "h"), ("conflict", "B"), ("contenders", "B"),
+            ("pressed", "Q"), ("reaction", "d"))
+if np is not None:
+    _ROW_DTYPE = np.dtype([("t", "<f8"), ("session", "<u4"), ("winner", "<i2"), ("conflict", "u1"), ("contenders", "u1"),
+                           ("pressed", "<u8"), ("reaction", "<f8")])
+
+
+class PlayerStats:
+    """Running statistics for one player, updated once per round."""
+
+    __slots__ = ("buzzes", "mean_ms", "_m2", "rounds", "contested", "contested_wins", "conflicts", "histogram")
+
+    def __init__(self):
+        self.buzzes = 0 # Rounds won
+        self.mean_ms = 0.0 # Mean reaction time of those wins
+        self._m2 = 0.0 # Sum of squared deviations (Welford)
+        self.rounds = 0 # Rounds the player pressed in
+        self.contested = 0 # ... with at least one other player pressing too
+        self.contested_wins = 0
+        self.conflicts = 0
+        self.histogram = LatencyHistogram() # Reaction times, for running percentiles
+
+    def add_win(self, reaction_ms):
+        self.buzzes += 1
+        delta = reaction_ms - self.mean_ms
+        self.mean_ms += delta / self.buzzes
+        self._m2 += delta * (reaction_ms - self.mean_ms)
+        self.histogram.record(int(reaction_ms * 1_000_000))
+
+    @property
+    def stdev_ms(self):
+        return math.sqrt(self._m2 / (self.buzzes - 1)) if self.buzzes > 1 else 0.0
+
+    def percentile_ms(self, q):
+        """q-th quantile (0-1), approximate: the upper bound of its histogram bucket (~12% wide)."""
+        return self.histogram.percentile(q) / 1000
+
+
+class Analytics:
+    """Per-round records and statistics for the players of one game.
+
+    open() loads the earlier sessions from `path` (if given) and starts a new
+    session; record_round() adds a row; close() closes the file. A row is
+    written as soon as it is recorded, so a crash loses nothing but a torn
+    last row, which is dropped on the next open().
+    """
+
+    def __init__(self, players, path=None):
+        self.players = list(players)[:MAX_PLAYERS]
+        self.path = path
+        self.columns = {name: array(typecode) for name, typecode in _COLUMNS}
+        self.running = {player: PlayerStats() for player in self.players}
+        self.session = 0
+        self.version = 0 # Goes up with every row, so callers can cache full_stats()
+        self.visible = False # Whether the stats screen is shown
+        self._index = {player: i for i, player in enumerate(self.players)}
+        self._file = None
+        self._cached = (-1, None) # (version, full_stats()) for the stats screen
+
+    def __len__(self):
+        return len(self.columns["t"])
+
+    def open(self):
+        if self.path is None:
+            return self
+        try:
+            self._load()
+            self._file = open(self.path, "ab")
+            if self._file.tell() == 0:
+                self._file.write(_MAGIC)
+                self._file.flush()
+        except OSError as e:
+            print(f"Warning: Could not open {self.path}: {e}. Statistics will not be saved.")
+            self._file = None
+        return self
+
+    def record_round(self, winner, reaction_ms, pressed, conflict_players=(), t=None):
+        """Adds a decided round: its winner (None for a conflict), the winner's reaction time,
+        and every player who pressed during it."""
+        mask = 0
+        for player in (*pressed, *conflict_players, winner): # The winner always counts as having pressed
+            if player in self._index:
+                mask |= 1 << self._index[player]
+        contenders = bin(mask).count("1")
+        conflict = winner is None
+        row = (time.time() if t is None else t, self.session, -1 if conflict else self._index.get(winner, -1),
+               int(conflict), contenders, mask, math.nan if conflict else float(reaction_ms))
+        self._append(row)
+        if self._file is not None:
+            try:
+                self._file.write(_ROW.pack(*row))
+                self._file.flush()
+            except OSError as e:
+                print(f"Warning: Could not write {self.path}: {e}")
+                self._file = None
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # --- Full recompute ---
+
+    def full_stats(self):
+        """Exact statistics over every recorded round.
+
+        Returns {"players": {player: {...}}, "trend": [{...} per TREND_BIN_S of session time]}.
+        Player entries hold buzzes, mean_ms, median_ms, p95_ms, stdev_ms, rounds,
+        contested, contested_win_rate and conflict_rate (None where undefined).
+        """
+        if np is not None:
+            return self._full_stats_numpy()
+        return self._full_stats_python()
+
+    def _full_stats_numpy(self):
+        c = self._numpy_columns()
+        players = {}
+        for player, (reactions, rounds, contested, contested_wins, conflicts) in zip(self.players, self._per_player_numpy(c)):
+            reactions.sort()
+            mean = float(reactions.mean()) if len(reactions) else None
+            players[player] = _player_entry(len(reactions), mean, _percentile(reactions, 50), _percentile(reactions, 95),
+                                            float(reactions.std(ddof=1)) if len(reactions) > 1 else 0.0,
+                                            rounds, contested, contested_wins, conflicts)
+
+        trend = []
+        if len(c["t"]):
+            sessions = c["session"].astype(np.int64)
+            starts = np.full(sessions.max() + 1, np.inf)
+            np.minimum.at(starts, sessions, c["t"])
+            bins = ((c["t"] - starts[sessions]) // TREND_BIN_S).astype(np.int64)
+            rounds = np.bincount(bins)
+            conflicts = np.bincount(bins, weights=c["conflict"])
+            # Reaction times grouped by bin, so each bin is one slice
+            won = c["conflict"] == 0
+            won_bins, won_reactions = bins[won], c["reaction"][won]
+            order = np.argsort(won_bins, kind="stable")
+            won_reactions = won_reactions[order]
+            edges = np.searchsorted(won_bins[order], np.arange(len(rounds) + 1))
+            for b in range(len(rounds)):
+                r = np.sort(won_reactions[edges[b]:edges[b + 1]])
+                trend.append(_trend_entry(b, int(rounds[b]), float(r.mean()) if len(r) else None, _percentile(r, 50),
+                                          int(conflicts[b])))
+        return {"players": players, "trend": trend}
+
+    def _numpy_columns(self):
+        return {name: np.frombuffer(column, dtype=column.typecode) if len(column) else np.zeros(0, column.typecode)
+                for name, column in self.columns.items()}
+
+    def _per_player_numpy(self, c):
+        """Per player: reaction times of their wins, rounds pressed, contested rounds, contested wins, conflicts."""
+        contested = c["contenders"] > 1
+        contested_masks = c["pressed"][contested]
+        conflict_masks = c["pressed"][c["conflict"] == 1]
+        contested_wins = np.bincount(c["winner"][contested & (c["winner"] >= 0)], minlength=len(self.players))
+        result = []
+        for i in range(len(self.players)):
+            bit = np.uint64(1 << i)
+            result.append((c["reaction"][c["winner"] == i], int(np.count_nonzero(c["pressed"] & bit)),
+                           int(np.count_nonzero(contested_masks & bit)), int(contested_wins[i]),
+                           int(np.count_nonzero(conflict_masks & bit))))
+        return result
+
+    def _full_stats_python(self):
+        c = self.columns
+        reactions = {i: [] for i in range(len(self.players))}
+        pressed_n = [0] * len(self.players)
+        contested_n = [0] * len(self.players)
+        contested_wins = [0] * len(self.players)
+        conflicts = [0] * len(self.players)
+        starts = {}
+        for t, session in zip(c["t"], c["session"]):
+            if t < starts.get(session, math.inf):
+                starts[session] = t
+        bins = {}
+        for t, session, winner, conflict, contenders, mask, reaction in zip(*c.values()):
+            if winner >= 0:
+                reactions[winner].append(reaction)
+            for i in range(len(self.players)):
+                if mask >> i & 1:
+                    pressed_n[i] += 1
+                    if contenders > 1:
+                        contested_n[i] += 1
+                        contested_wins[i] += winner == i
+                    conflicts[i] += conflict
+            b = bins.setdefault(int((t - starts[session]) // TREND_BIN_S), [0, 0, []])
+            b[0] += 1
+            if conflict:
+                b[1] += 1
+            else:
+                b[2].append(reaction)
+
+        players = {}
+        for i, player in enumerate(self.players):
+            r = sorted(reactions[i])
+            mean = sum(r) / len(r) if r else None
+            stdev = math.sqrt(sum((x - mean) ** 2 for x in r) / (len(r) - 1)) if len(r) > 1 else 0.0
+            players[player] = _player_entry(len(r), mean, _percentile(r, 50), _percentile(r, 95), stdev,
+                                            pressed_n[i], contested_n[i], contested_wins[i], conflicts[i])
+        trend = []
+        for b in range(max(bins) + 1 if bins else 0):
+            rounds, conflict_rounds, r = bins.get(b, (0, 0, []))
+            r.sort()
+            trend.append(_trend_entry(b, rounds, sum(r) / len(r) if r else None, _percentile(r, 50), conflict_rounds))
+        return {"players": players, "trend": trend}
+
+    def stats(self):
+        """full_stats(), recomputed only after new rounds."""
+        if self._cached[0] != self.version:
+            self._cached = (self.version, self.full_stats())
+        return self._cached[1]
+
+    # --- Stats screen and export ---
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def screen_rows(self, stats=None):
+        """Header plus one row per player for a stats screen (strings)."""
+        stats = stats or self.stats()
+        rows = [["player", "buzz", "mean", "med", "p95", "cont.win", "confl."]]
+        for player, s in stats["players"].items():
+            rows.append([str(player), str(s["buzzes"]), _ms(s["mean_ms"]), _ms(s["median_ms"]), _ms(s["p95_ms"]),
+                         _pct(s["contested_win_rate"]), _pct(s["conflict_rate"])])
+        return rows
+
+    def trend_line(self, stats=None):
+        """Mean reaction time per TREND_BIN_S of session time, on one line."""
+        stats = stats or self.stats()
+        return "mean ms by session minute: " + "  ".join(
+            f"{entry['from_min']}': {_ms(entry['mean_ms'])}" for entry in stats["trend"][:8])
+
+    def draw_screen(self, renderer, font, color, x, y, row_height=20, column_width=70):
+        """Lists the stats screen's cells on a DirtyRenderer, one column per statistic."""
+        stats = self.stats()
+        rows = self.screen_rows(stats)
+        for row, cells in enumerate(rows):
+            renderer.text(cells[0], font, color, x, y + row * row_height)
+            for column, cell in enumerate(cells[1:]):
+                renderer.text(cell, font, color, x + 90 + column * column_width, y + row * row_height)
+        renderer.text(f"{len(self)} rounds over {self.session + 1} sessions", font, color, x, y + (len(rows) + 1) * row_height)
+        renderer.text(self.trend_line(stats), font, color, x, y + (len(rows) + 2) * row_height)
+
+    def export_csv(self, path, stats=None):
+        """Writes the per-player table and the time-of-session trend."""
+        stats = stats or self.stats()
+        try:
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                fields = ["buzzes", "mean_ms", "median_ms", "p95_ms", "stdev_ms", "rounds", "contested",
+                          "contested_win_rate", "conflict_rate"]
+                writer.writerow(["player"] + fields)
+                for player, s in stats["players"].items():
+                    writer.writerow([player] + [_round(s[field]) for field in fields])
+                writer.writerow([])
+                writer.writerow(["session_minutes", "rounds", "mean_ms", "median_ms", "conflict_rate"])
+                for entry in stats["trend"]:
+                    writer.writerow([entry["from_min"], entry["rounds"], _round(entry["mean_ms"]),
+                                     _round(entry["median_ms"]), _round(entry["conflict_rate"])])
+        except OSError as e:
+            print(f"Warning: Could not write {path}: {e}")
+
+    # --- Internals ---
+
+    def _append(self, row):
+        for column, value in zip(self.columns.values(), row):
+            column.append(value)
+        t, session, winner, conflict, contenders, mask, reaction = row
+        if winner >= 0:
+            self.running[self.players[winner]].add_win(reaction)
+        for i, player in enumerate(self.players):
+            if mask >> i & 1:
+                stats = self.running[player]
+                stats.rounds += 1
+                if contenders > 1:
+                    stats.contested += 1
+                    stats.contested_wins += winner == i
+                stats.conflicts += conflict
+        self.version += 1
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        if not data: # Created, but the process was killed before the header got out
+            return
+        if not data.startswith(_MAGIC):
+            raise OSError(f"{self.path} is not a statistics file")
+        body = len(data) - len(_MAGIC)
+        whole = body - body % _ROW.size
+        if whole != body:
+            with open(self.path, "r+b") as f:
+                f.truncate(len(_MAGIC) + whole) # Drop a row cut short by a crash
+        rows = memoryview(data)[len(_MAGIC):len(_MAGIC) + whole]
+        if np is None:
+            for row in _ROW.iter_unpack(rows):
+                self._append(row)
+        elif whole:
+            self._load_numpy(rows)
+        if len(self):
+            self.session = self.columns["session"][-1] + 1
+
+
+    def _load_numpy(self, rows):
+        """Same result as _append() for every row, in one pass per column."""
+        table = np.frombuffer(rows, dtype=_ROW_DTYPE)
+        for name, typecode in _COLUMNS:
+            self.columns[name] = array(typecode, table[name].tobytes())
+        for player, (reactions, rounds, contested, contested_wins, conflicts) in zip(
+                self.players, self._per_player_numpy(self._numpy_columns())):
+            stats = self.running[player]
+            stats.rounds, stats.contested, stats.contested_wins, stats.conflicts = rounds, contested, contested_wins, conflicts
+            if len(reactions):
+                stats.buzzes = len(reactions)
+                stats.mean_ms = float(reactions.mean())
+                stats._m2 = float(((reactions - stats.mean_ms) ** 2).sum())
+                us = (reactions * 1_000_000).astype(np.int64) // 1000 # As LatencyHistogram.record() rounds them
+                stats.histogram.counts = array("Q", np.bincount(_buckets(us), minlength=NUM_BUCKETS).astype(np.uint64).tobytes())
+                stats.histogram.count = len(reactions)
+                stats.histogram.max_us = max(0, int(us.max()))
+        self.version += len(table)
+
+
+def _buckets(us):
+    """latency._bucket() for a NumPy array: exact below 8 us, then 8 buckets per power of two."""
+    us = np.maximum(us, 0)
+    shift = np.maximum(np.frexp(us)[1] - 4, 0) # frexp's exponent is the bit length
+    return np.where(us < 8, us, np.minimum(NUM_BUCKETS - 1, (shift + 1) * 8 + ((us >> shift) & 7)))
+
+
+def _player_entry(buzzes, mean, median, p95, stdev, rounds, contested, contested_wins, conflicts):
+    return {"buzzes": buzzes, "mean_ms": mean, "median_ms": median, "p95_ms": p95, "stdev_ms": stdev,
+            "rounds": rounds, "contested": contested,
+            "contested_win_rate": contested_wins / contested if contested else None,
+            "conflict_rate": conflicts / rounds if rounds else None}
+
+
+def _trend_entry(b, rounds, mean, median, conflicts):
+    return {"from_min": b * TREND_BIN_S // 60, "rounds": rounds, "mean_ms": mean, "median_ms": median,
+            "conflict_rate": conflicts / rounds if rounds else None}
+
+
+def _percentile(ordered, q):
+    """Linear interpolation between closest ranks, like numpy.percentile's default."""
+    if not len(ordered):
+        return None
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return float(ordered[low] + (ordered[high] - ordered[low]) * (position - low))
+
+
+def _ms(value):
+    return "-" if value is None else f"{value:.0f}"
+
+
+def _pct(value):
+    return "-" if value is None else f"{value * 100:.0f}%"
+
+
+def _round(value):
+    return "" if value is None else round(value, 3)
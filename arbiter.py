@@ -0,0 +1,138 @@
+"""Buzz arbitration shared by buzzer.py, Arduino_Final.py and Gamepad_Final.py.
+
+The arbiter is fed timestamped presses as they arrive and decides who buzzed
+first. Every call does a constant amount of work, so it never falls behind no
+matter how many presses come in.
+"""
+
+WIN = "win"
+CONFLICT = "conflict"
+
+# Arbiter states
+_OPEN = 0 # Accepting presses
+_PENDING = 1 # First press seen, tie window still open
+_LOCKED = 2 # Decision made, ignoring presses until unlocked
+
+
+class Decision:
+    """Outcome of one round: a single winner, or a conflict between several players."""
+
+    __slots__ = ("kind", "player", "players", "t_ns")
+
+    def __init__(self, kind, player, players, t_ns):
+        self.kind = kind # WIN or CONFLICT
+        self.player = player # Winner, or None for a conflict
+        self.players = players # Every player who pressed inside the tie window, earliest first
+        self.t_ns = t_ns # Time of the earliest press
+
+    def __repr__(self):
+        return f"Decision({self.kind!r}, player={self.player!r}, players={self.players!r}, t_ns={self.t_ns})"
+
+
+class BuzzArbiter:
+    """Decides the first buzz of each round.
+
+    tie_window_ns: other players pressing within this long after the first
+        press make the round a conflict. 0 means the first press wins at once.
+    cooldown_ns: how long presses are ignored after a decision. None keeps the
+        arbiter locked until reset() is called (e.g. when the host starts the
+        next round).
+
+    press() and poll() return a Decision when one is reached, otherwise None.
+    With a tie window, call poll() once next_deadline() has passed so the
+    decision is not left waiting for another press.
+    """
+
+    __slots__ = ("tie_window_ns", "cooldown_ns", "ignored", "_state", "_unlock_at", "_window_end", "_first_t",
+                 "_contenders", "_seen")
+
+    def __init__(self, tie_window_ns=0, cooldown_ns=None):
+        self.tie_window_ns = tie_window_ns
+        self.cooldown_ns = cooldown_ns
+        self.ignored = 0 # Presses dropped because the arbiter was locked
+        self._state = _OPEN
+        self._unlock_at = None # When a locked arbiter opens again, or None to wait for reset()
+        self._window_end = 0
+        self._first_t = 0
+        self._contenders = [] # Players in the open window, in arrival order
+        self._seen = set()
+
+    def press(self, player, t_ns):
+        decision = None
+        if self._state == _PENDING and t_ns > self._window_end:
+            # The window closed before this press: settle it first, then treat the press normally
+            decision = self._close()
+        if self._state == _LOCKED:
+            if self._unlock_at is None or t_ns < self._unlock_at:
+                self.ignored += 1
+                return decision
+            self._state = _OPEN
+        if self._state == _OPEN:
+            if self.tie_window_ns <= 0:
+                return self._decide(Decision(WIN, player, (player,), t_ns))
+            self._state = _PENDING
+            self._first_t = t_ns
+            self._window_end = t_ns + self.tie_window_ns
+            self._contenders.append(player)
+            self._seen.add(player)
+            return decision
+        # Inside the tie window
+        if player not in self._seen:
+            self._seen.add(player)
+            if t_ns < self._first_t:
+                # Arrived late but happened first (e.g. from a slower device): it leads the list
+                self._first_t = t_ns
+                self._contenders.insert(0, player)
+            else:
+                self._contenders.append(player)
+        return None
+
+    def poll(self, now_ns):
+        if self._state == _PENDING and now_ns >= self._window_end:
+            return self._close()
+        if self._state == _LOCKED and self._unlock_at is not None and now_ns >= self._unlock_at:
+            self._state = _OPEN
+        return None
+
+    def next_deadline(self):
+        """Monotonic ns at which poll() has work to do, or None."""
+        if self._state == _PENDING:
+            return self._window_end
+        if self._state == _LOCKED:
+            return self._unlock_at
+        return None
+
+    def is_locked(self, now_ns):
+        """True while a decision is standing and presses are being ignored."""
+        if self._state != _LOCKED:
+            return False
+        return self._unlock_at is None or now_ns < self._unlock_at
+
+    def reset(self, now_ns=0, cooldown_ns=0):
+        """Starts a new round, accepting presses again after `cooldown_ns`."""
+        self._contenders.clear()
+        self._seen.clear()
+        if cooldown_ns > 0:
+            self._state = _LOCKED
+            self._unlock_at = now_ns + cooldown_ns
+        else:
+            self._state = _OPEN
+            self._unlock_at = None
+
+    def _close(self):
+        players = tuple(self._contenders)
+        self._contenders.clear()
+        self._seen.clear()
+        if len(players) == 1:
+            decision = Decision(WIN, players[0], players, self._first_t)
+        else:
+            decision = Decision(CONFLICT, None, players, self._first_t)
+        return self._decide(decision, self._window_end)
+
+    def _decide(self, decision, decided_at=None):
+        self._state = _LOCKED
+        if self.cooldown_ns is None:
+            self._unlock_at = None
+        else:
+            self._unlock_at = (decision.t_ns if decided_at is None else decided_at) + self.cooldown_ns
+        return decision
@@ -0,0 +1,140 @@
+import contextlib
+import hashlib
+import mmap
+import os
+import struct
+import threading
+
+import pygame
+
+CACHE_DIR = ".audio_cache"
+
+# Cache file header: magic, source mtime (ns), source size, source SHA-256.
+# The mixer-native PCM samples follow it.
+_MAGIC = b"BZPCM1\0\0"
+_HEADER = struct.Struct("<8sqq32s")
+
+
+class SoundLoader:
+    """Loads sounds on a background thread so the window can appear first.
+
+    Each WAV is decoded once into the mixer's native format and stored in
+    CACHE_DIR. Later starts memory-map that file and pass it straight to
+    pygame.mixer.Sound(buffer=...), skipping WAV parsing and resampling; the
+    only decoded copy kept in memory is the mixer's own. A cache entry is
+    reused while the source's mtime and size match, or, if they changed, while
+    its SHA-256 still does. The cache is keyed by the source's absolute path
+    and the mixer format, so two sounds with the same file name in different
+    folders never share an entry, and changing the frequency or channel count
+    simply creates new entries.
+
+    If the mixer is not initialised yet, the loader thread does that first, so
+    opening the audio device overlaps with the window coming up; if it fails,
+    a warning is printed and there is no sound. `timeline` (a
+    startup.StartupTimeline) gets both phases.
+    """
+
+    def __init__(self, files, cache_dir=CACHE_DIR, on_ready=None, timeline=None):
+        self.files = files # Key -> WAV path
+        self.cache_dir = cache_dir
+        self.on_ready = on_ready # Called from the loader thread once everything is loaded
+        self.timeline = timeline
+        self.sounds = {} # Key -> Sound, filled in as they load
+        self.ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def get(self, key):
+        """The sound for `key`, or None if it is not loaded (yet)."""
+        return self.sounds.get(key)
+
+    def _run(self):
+        if self._init_mixer():
+            with self._phase("sounds"):
+                for key, path in self.files.items():
+                    try:
+                        self.sounds[key] = self._load(path)
+                    except (pygame.error, OSError) as e:
+                        print(f"Warning: Could not load {path}: {e}")
+        self.ready.set()
+        if self.on_ready is not None:
+            self.on_ready()
+
+    def _init_mixer(self):
+        if pygame.mixer.get_init():
+            return True
+        with self._phase("audio init"):
+            try:
+                pygame.mixer.init()
+            except pygame.error as e:
+                print(f"Warning: Could not start the audio device: {e}. There will be no sound.")
+                return False
+        return True
+
+    def _phase(self, name):
+        return self.timeline.phase(name) if self.timeline is not None else contextlib.nullcontext()
+
+    def _load(self, path):
+        frequency, sample_format, channels = pygame.mixer.get_init()
+        name = os.path.splitext(os.path.basename(path))[0] # Kept readable; the hash tells same-named files apart
+        source = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+        cache_path = os.path.join(self.cache_dir, f"{name}.{source}.{frequency}_{sample_format}_{channels}.pcm")
+        stat = os.stat(path)
+
+        sound = self._load_cached(cache_path, path, stat)
+        if sound is not None:
+            return sound
+
+        sound = pygame.mixer.Sound(path) # Decodes and converts to the mixer format
+        try:
+            self._write_cache(cache_path, stat, _file_digest(path), sound.get_raw())
+        except OSError as e:
+            print(f"Warning: Could not cache {path}: {e}")
+        return sound
+
+    def _load_cached(self, cache_path, path, stat):
+        try:
+            with open(cache_path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError): # Missing, unreadable or empty
+            return None
+        try:
+            if len(mapped) < _HEADER.size:
+                return None
+            magic, mtime_ns, size, digest = _HEADER.unpack_from(mapped)
+            if magic != _MAGIC:
+                return None
+            if (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size):
+                # Touched or copied: still valid if the content is unchanged
+                if _file_digest(path) != digest:
+                    return None
+                self._write_header(cache_path, stat, digest)
+            with memoryview(mapped) as view:
+                return pygame.mixer.Sound(buffer=view[_HEADER.size:])
+        finally:
+            mapped.close()
+
+    def _write_cache(self, cache_path, stat, digest, samples):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, stat.st_mtime_ns, stat.st_size, digest))
+            f.write(samples)
+        os.replace(tmp_path, cache_path) # Never leave a half-written entry behind
+
+    def _write_header(self, cache_path, stat, digest):
+        try:
+            with open(cache_path, "r+b") as f:
+                f.write(_HEADER.pack(_MAGIC, stat.st_mtime_ns, stat.st_size, digest))
+        except OSError:
+            pass # Only costs a hash check on the next start
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.digest()
@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pygame
+
+
+class AudioScheduler:
+    """Plays the buzzer and then a player's clip on two dedicated mixer channels.
+
+    play_sequence() starts the first sound and hands the follow-up to a single
+    background thread, so the caller never sleeps and returns in microseconds.
+    A pending follow-up can be dropped with cancel() (conflict, reset, ...).
+    """
+
+    def __init__(self, first_channel=0, gap=0.5):
+        # Reserve our channels so Sound.play() elsewhere never grabs them
+        pygame.mixer.set_reserved(first_channel + 2)
+        self.buzzer_channel = pygame.mixer.Channel(first_channel)
+        self.voice_channel = pygame.mixer.Channel(first_channel + 1)
+        self.gap = gap # Seconds between the start of the buzzer and the follow-up clip
+        self._cond = threading.Condition()
+        self._pending = None # (due time in monotonic seconds, sound) or None
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def play_sequence(self, first, then=None):
+        with self._cond:
+            self._pending = None # A new sequence replaces any unfinished one
+            self.voice_channel.stop()
+            if first is not None:
+                self.buzzer_channel.play(first)
+            if then is not None:
+                self._pending = (time.monotonic() + self.gap, then)
+                self._cond.notify()
+
+    def cancel(self):
+        with self._cond:
+            self._pending = None
+            self.buzzer_channel.stop()
+            self.voice_channel.stop()
+
+    def _run(self):
+        with self._cond:
+            while True:
+                if self._pending is None:
+                    self._cond.wait()
+                    continue
+                due, sound = self._pending
+                remaining = due - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining) # Woken early if the sequence is replaced or cancelled
+                    continue
+                self._pending = None
+                self.voice_channel.play(sound)
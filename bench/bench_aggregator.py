@@ -0,0 +1,87 @@
+"""Checks that BuzzAggregator puts presses from several skewed boards in the right order.
+
+Four FakeBuzzer boards with 8 buttons each (32 players) run with clocks that
+start seconds apart and drift by up to +/-3000 ppm. After the ping/echo sync
+has settled, each round presses buttons on several boards within 3 ms of each
+other, and sends every press after a random transit delay of up to 4 ms, so
+the arrival order is often wrong. The aggregator's output order and timestamps
+are compared with the true press times.
+
+Run from the repository root:  python bench/bench_aggregator.py [rounds]   (POSIX only)
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serial
+
+from aggregator import BuzzAggregator
+from buzz_protocol import BINARY_BAUD_RATE
+from fake_device import FakeBuzzer
+
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+BOARDS = 4
+BUTTONS = 8
+SYNC_SECONDS = 5
+SPREAD_NS = 3_000_000 # Presses of one round fall within this
+TRANSIT_NS = 4_000_000 # Extra random delay before each press is sent
+
+rng = random.Random(42)
+devices = [FakeBuzzer("binary", offset_us=rng.randrange(0, 2_000_000_000), drift_ppm=rng.uniform(-3000, 3000))
+           for _ in range(BOARDS)]
+boards = [(serial.Serial(device.port, BINARY_BAUD_RATE, timeout=0.1), 1 + i * BUTTONS, BUTTONS, None)
+          for i, device in enumerate(devices)]
+aggregator = BuzzAggregator(boards)
+aggregator.start()
+
+print(f"Synchronising {BOARDS} boards for {SYNC_SECONDS} s...")
+time.sleep(SYNC_SECONDS)
+for device, reader in zip(devices, aggregator.readers):
+    print(f"  board {reader.first_player:2d}-{reader.first_player + BUTTONS - 1:2d}: "
+          f"true drift {(device.rate - 1) * 1e6:+8.1f} ppm, estimated {reader.sync.drift_ppm:+8.1f} ppm, "
+          f"{len(reader.sync.samples)} samples")
+
+errors = []
+rounds_in_order = 0
+pairs = misordered = close_pairs = 0
+for _ in range(ROUNDS):
+    start_ns = time.monotonic_ns() + 2_000_000
+    presses = [] # (true ns, board, button)
+    for board in rng.sample(range(BOARDS), rng.randrange(2, BOARDS + 1)):
+        presses.append((start_ns + rng.randrange(SPREAD_NS), board, rng.randrange(1, BUTTONS + 1)))
+    sends = sorted((true_ns + rng.randrange(TRANSIT_NS), true_ns, board, button) for true_ns, board, button in presses)
+    for send_ns, true_ns, board, button in sends:
+        while time.monotonic_ns() < send_ns:
+            pass # Spin, sleep() is too coarse for this
+        devices[board].press(button, devices[board].micros_at(true_ns))
+
+    results = [aggregator.presses.get(timeout=1) for _ in presses]
+    truth = sorted((true_ns, 1 + board * BUTTONS + button - 1) for true_ns, board, button in presses)
+    true_time = {player: true_ns for true_ns, player in truth}
+    for player, t_ns in results:
+        errors.append(t_ns - true_time[player])
+    if [player for player, _ in results] == [player for _, player in truth]:
+        rounds_in_order += 1
+    for i in range(len(results)):
+        for j in range(i + 1, len(results)):
+            gap = true_time[results[j][0]] - true_time[results[i][0]]
+            pairs += 1
+            if abs(gap) < 200_000:
+                close_pairs += 1
+            elif gap < 0:
+                misordered += 1
+
+aggregator.stop()
+aggregator.join(timeout=1)
+for device in devices:
+    device.close()
+
+errors.sort()
+pick = lambda q: errors[min(len(errors) - 1, int(q * len(errors)))] / 1000
+print(f"rounds in true order:         {rounds_in_order}/{ROUNDS}")
+print(f"misordered pairs (>= 0.2 ms): {misordered}/{pairs - close_pairs}  ({close_pairs} pairs closer than 0.2 ms not judged)")
+print(f"timestamp error (us):         p1 {pick(0.01):+.0f}  p50 {pick(0.5):+.0f}  p99 {pick(0.99):+.0f}  "
+      f"max |err| {max(abs(errors[0]), abs(errors[-1])) / 1000:.0f}")
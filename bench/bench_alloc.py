@@ -0,0 +1,190 @@
+"""Allocations and GC pauses of the scoreboard loop over an hour-long simulated game.
+
+Replays an hour of Arduino_Final.py at 60 frames a second (216,000 frames,
+every one redrawn, as during a cooldown countdown): a round every 20 s with
+a five-second cooldown, then one to three presses and a score 3 s later.
+Time is simulated, so the hour runs as fast as the loop allows.
+
+Two versions of the frame are compared:
+  formatted - every string built with an f-string each frame, and a renderer
+              that builds a new item tuple and diff per frame (as before)
+  labels    - render.Label strings, reused item tuples, no diff when nothing changed
+
+For each it reports the frame time, the garbage collections and their
+pauses over the whole hour, and, over a tracemalloc sample of FRAMES_TRACED
+frames, how many bytes a frame allocates at its peak and keeps afterwards.
+
+Run from the repository root:  python bench/bench_alloc.py [minutes]
+Uses SDL's dummy video driver unless SDL_VIDEODRIVER is already set.
+"""
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from analytics import Analytics
+from core import BUZZED, WAITING, GameCore
+from latency import LatencyHistogram
+from render import DirtyRenderer, Label
+
+MINUTES = float(sys.argv[1]) if len(sys.argv) > 1 else 60
+FPS = 60
+FRAMES = int(MINUTES * 60 * FPS)
+FRAMES_TRACED = 20_000
+ROUND_MS, COOLDOWN_MS, PRESS_MS, SCORE_MS = 20_000, 5_000, 5_000, 8_000 # Offsets within each round
+NUM_PLAYERS = 4
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+BLUE = (0, 0, 255)
+
+pygame.display.init()
+pygame.font.init()
+screen = pygame.display.set_mode((600, 400))
+font = pygame.font.Font(None, 30)
+small_font = pygame.font.Font(None, 20)
+score_positions = {player: (50 + (player - 1) % 2 * 300, 50 + (player - 1) // 2 * 25)
+                   for player in range(1, NUM_PLAYERS + 1)}
+
+
+class FormattingRenderer(DirtyRenderer):
+    """DirtyRenderer as it was: a new tuple per item and a full diff every frame."""
+
+    __slots__ = ()
+
+    def text(self, text, font, color, x, y):
+        self._items.append((text, font, color, x, y))
+        self._changed = True
+
+
+class Game:
+    """The scripted game: presses and host keys by simulated time."""
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.core = GameCore(range(1, NUM_PLAYERS + 1), analytics=Analytics(range(1, NUM_PLAYERS + 1)))
+        self.cooldown_end = 0
+
+    def step(self, now_ms):
+        core = self.core
+        in_round = now_ms % ROUND_MS
+        if in_round == 0 and now_ms:
+            core.next_round(now_ms * 1_000_000)
+            self.cooldown_end = now_ms + COOLDOWN_MS
+        elif in_round == PRESS_MS:
+            for player in self.rng.sample(core.players, self.rng.randint(1, 3)):
+                core.press(player, now_ms * 1_000_000)
+        elif in_round == SCORE_MS and core.state == BUZZED:
+            core.score(10)
+        core.next_deadline()
+
+
+def formatted_frame(renderer, game, now_ms):
+    core = game.core
+    renderer.begin()
+    for player, (x, y) in score_positions.items():
+        renderer.text(f"Player {player} Score: {core.scores[player]}", font, WHITE, x, y)
+    if core.state == WAITING:
+        renderer.text("Waiting for a buzz...", font, GREEN, 50, 180)
+        if now_ms < game.cooldown_end:
+            renderer.text(f"Next buzz in: {(game.cooldown_end - now_ms) / 1000:.1f} s", small_font, RED, 50, 220)
+        renderer.text("Press P to exit.", small_font, WHITE, 50, 240)
+    elif core.state == BUZZED:
+        renderer.text(f"PLAYER {core.winner} BUZZED FIRST!", font, BLUE, 50, 160)
+        renderer.text(f"Reaction Time: {core.reaction_ms:.3f} ms", font, BLUE, 50, 200)
+        renderer.text("Press P to exit.", small_font, WHITE, 50, 280)
+    renderer.present()
+
+
+score_labels = {player: Label(f"Player {player} Score: {{}}") for player in score_positions}
+winner_label = Label("PLAYER {} BUZZED FIRST!")
+reaction_label = Label("Reaction Time: {:.3f} ms")
+cooldown_label = Label("Next buzz in: {:.1f} s", scale=0.1)
+
+
+def label_frame(renderer, game, now_ms):
+    core = game.core
+    renderer.begin()
+    for player, (x, y) in score_positions.items():
+        renderer.text(score_labels[player].format(core.scores[player]), font, WHITE, x, y)
+    if core.state == WAITING:
+        renderer.text("Waiting for a buzz...", font, GREEN, 50, 180)
+        if now_ms < game.cooldown_end:
+            renderer.text(cooldown_label.format((game.cooldown_end - now_ms + 50) // 100), small_font, RED, 50, 220)
+        renderer.text("Press P to exit.", small_font, WHITE, 50, 240)
+    elif core.state == BUZZED:
+        renderer.text(winner_label.format(core.winner), font, BLUE, 50, 160)
+        renderer.text(reaction_label.format(core.reaction_ms), font, BLUE, 50, 200)
+        renderer.text("Press P to exit.", small_font, WHITE, 50, 280)
+    renderer.present()
+
+
+def run(name, frame, renderer_class):
+    # Whole hour: frame times and every collection's pause
+    game = Game(seed=22)
+    renderer = renderer_class(screen, BLACK)
+    frame_times = LatencyHistogram()
+    pauses = LatencyHistogram()
+    collections = [0, 0, 0]
+    gc_start = [0]
+
+    def on_gc(phase, info):
+        if phase == "start":
+            gc_start[0] = time.perf_counter_ns()
+        else:
+            pauses.record(time.perf_counter_ns() - gc_start[0])
+            collections[info["generation"]] += 1
+
+    gc.collect()
+    gc.callbacks.append(on_gc)
+    start = time.perf_counter()
+    for n in range(FRAMES):
+        now_ms = n * 1000 // FPS
+        t = time.perf_counter_ns()
+        game.step(now_ms)
+        frame(renderer, game, now_ms)
+        frame_times.record(time.perf_counter_ns() - t)
+    elapsed = time.perf_counter() - start
+    gc.callbacks.remove(on_gc)
+    pixels = pygame.image.tobytes(screen, "RGB")
+
+    # Sample: bytes allocated per frame, at the frame's peak and kept afterwards
+    game = Game(seed=22)
+    renderer = renderer_class(screen, BLACK)
+    tracemalloc.start()
+    peak_total = kept_total = 0
+    peak_max = 0
+    for n in range(FRAMES_TRACED):
+        now_ms = n * 1000 // FPS
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        game.step(now_ms)
+        frame(renderer, game, now_ms)
+        current, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - before
+        peak_max = max(peak_max, peak - before)
+        kept_total += current - before
+    tracemalloc.stop()
+
+    print(f"{name:<10} {elapsed / FRAMES * 1e6:6.1f} us/frame  p99 {frame_times.percentile(0.99):5d} us  "
+          f"max {frame_times.max_us:6d} us  |  GC gen0/1/2 {collections[0]}/{collections[1]}/{collections[2]}, "
+          f"pause p50 {pauses.percentile(0.5)} us p99 {pauses.percentile(0.99)} us max {pauses.max_us} us  |  "
+          f"per frame: peak {peak_total / FRAMES_TRACED:6.0f} B (max {peak_max}), kept {kept_total / FRAMES_TRACED:5.1f} B")
+    return pixels
+
+
+if __name__ == "__main__":
+    print(f"{FRAMES:,} frames ({MINUTES:g} simulated minutes at {FPS} fps), {len(score_positions)} players")
+    formatted_pixels = run("formatted", formatted_frame, FormattingRenderer)
+    label_pixels = run("labels", label_frame, DirtyRenderer)
+    print(f"identical final frame: {formatted_pixels == label_pixels}")
+    pygame.quit()
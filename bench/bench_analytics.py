@@ -0,0 +1,101 @@
+"""Benchmark for the round analytics (analytics.py).
+
+Records ROUNDS simulated rounds (8 players, 1-4 pressing per round, a tenth
+of the contested ones ending in a conflict, 40 rounds an hour over several
+sessions) one at a time as the game does and reports what record_round()
+costs, then times the full recompute over all of them with NumPy and with
+the plain-Python fallback, reloads the file both ways, and checks that
+both paths and the running statistics agree.
+
+Run from the repository root:  python bench/bench_analytics.py [rounds]
+"""
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analytics
+from analytics import Analytics
+
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+PLAYERS = [f"P{n}" for n in range(1, 9)]
+ROUNDS_PER_SESSION = 200 # A five-hour session at 40 rounds an hour
+
+rng = random.Random(18)
+path = os.path.join(tempfile.mkdtemp(), "bench_stats.bin")
+stats = Analytics(PLAYERS, path).open()
+speed = {player: rng.uniform(250, 450) for player in PLAYERS} # Each player's typical reaction time
+
+costs = []
+t = 1_700_000_000.0
+for n in range(ROUNDS):
+    if n and n % ROUNDS_PER_SESSION == 0:
+        stats.session += 1
+        t += 3 * 24 * 3600 # Next game night
+    t += 90
+    pressed = rng.sample(PLAYERS, rng.randint(1, 4))
+    if len(pressed) > 1 and rng.random() < 0.1:
+        winner, reaction, conflict = None, 0.0, pressed[:2]
+    else:
+        reactions = {player: rng.gauss(speed[player], 60) + n % ROUNDS_PER_SESSION * 0.2 for player in pressed}
+        winner = min(reactions, key=reactions.get)
+        reaction, conflict = reactions[winner], ()
+    t0 = time.perf_counter_ns()
+    stats.record_round(winner, reaction, pressed, conflict, t=t)
+    costs.append(time.perf_counter_ns() - t0)
+stats.close()
+costs.sort()
+print(f"record_round(): p50 {costs[ROUNDS // 2] / 1000:.1f} us, p99 {costs[ROUNDS * 99 // 100] / 1000:.1f} us "
+      f"(row written and flushed each time), file {os.path.getsize(path) / 1e6:.1f} MB for {ROUNDS} rounds")
+
+numpy = analytics.np
+for label in ("numpy", "plain Python"):
+    analytics.np = numpy if label == "numpy" else None
+    if label == "numpy" and numpy is None:
+        continue
+    t0 = time.perf_counter()
+    reloaded = Analytics(PLAYERS, path).open()
+    print(f"reload with {label}: {(time.perf_counter() - t0) * 1000:.0f} ms, next session is {reloaded.session}")
+    reloaded.close()
+    assert len(reloaded) == ROUNDS
+    assert all(reloaded.columns[name].tobytes() == column.tobytes() for name, column in stats.columns.items()) # NaN-safe
+    for player, running in reloaded.running.items(): # Rebuilt running statistics match the incremental ones
+        assert running.histogram.counts == stats.running[player].histogram.counts
+        assert math.isclose(running.mean_ms, stats.running[player].mean_ms)
+        assert running.contested_wins == stats.running[player].contested_wins
+analytics.np = numpy
+
+results = {}
+for label in ("numpy", "plain Python"):
+    if label == "numpy" and numpy is None:
+        print("full_stats() with numpy: not installed")
+        continue
+    analytics.np = numpy if label == "numpy" else None
+    t0 = time.perf_counter()
+    results[label] = stats.full_stats()
+    print(f"full_stats() with {label}: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+print()
+for row in stats.screen_rows(results["plain Python"]):
+    print("".join(f"{cell:>9}" for cell in row))
+print(stats.trend_line(results["plain Python"]))
+
+# Both recomputes give the same numbers, and the running statistics agree with them
+for label, result in results.items():
+    for player, entry in result["players"].items():
+        expected = results["plain Python"]["players"][player]
+        for field, value in entry.items():
+            assert value == expected[field] or math.isclose(value, expected[field], rel_tol=1e-9), (label, field)
+    for entry, expected in zip(result["trend"], results["plain Python"]["trend"], strict=True):
+        assert all(value == expected[field] or math.isclose(value, expected[field], rel_tol=1e-9)
+                   for field, value in entry.items()), (label, entry)
+for player, running in stats.running.items():
+    entry = results["plain Python"]["players"][player]
+    assert running.buzzes == entry["buzzes"] and math.isclose(running.mean_ms, entry["mean_ms"])
+    assert math.isclose(running.stdev_ms, entry["stdev_ms"])
+    assert abs(running.percentile_ms(0.95) / entry["p95_ms"] - 1) < 0.13 # Within a histogram bucket
+os.remove(path)
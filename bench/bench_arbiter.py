@@ -0,0 +1,79 @@
+"""Replays millions of synthetic presses through BuzzArbiter and checks every decision.
+
+Each synthetic round has a first press, optional rivals (some inside the tie
+window, some just outside), held-button repeats and presses during the lockout.
+The expected outcome of every round is known when it is generated.
+
+Run from the repository root:  python bench/bench_arbiter.py [rounds]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arbiter import CONFLICT, WIN, BuzzArbiter
+
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+NUM_PLAYERS = 8
+TIE_WINDOW_NS = 500_000_000
+COOLDOWN_NS = 5_000_000_000
+
+rng = random.Random(1234)
+players = []
+times = []
+expected = []
+
+t = 0
+for _ in range(ROUNDS):
+    first = rng.randrange(1, NUM_PLAYERS + 1)
+    round_events = [(t, first)]
+    # Rivals spread over twice the tie window, so about half land inside it
+    for _ in range(rng.randrange(0, 3)):
+        round_events.append((t + rng.randrange(1, 2 * TIE_WINDOW_NS), rng.randrange(1, NUM_PLAYERS + 1)))
+    # The first player holding the button inside the window is not a conflict
+    if rng.random() < 0.3:
+        round_events.append((t + rng.randrange(1, TIE_WINDOW_NS), first))
+    round_events.sort()
+
+    contenders = []
+    for event_t, player in round_events:
+        if event_t <= t + TIE_WINDOW_NS and player not in contenders:
+            contenders.append(player)
+    if len(contenders) == 1:
+        expected.append((WIN, first))
+    else:
+        expected.append((CONFLICT, tuple(contenders)))
+
+    for event_t, player in round_events:
+        times.append(event_t)
+        players.append(player)
+    # Next round starts some time after the lockout ends
+    t += TIE_WINDOW_NS + COOLDOWN_NS + rng.randrange(1, 1_000_000_000)
+
+print(f"generated {len(times):,} presses in {ROUNDS:,} rounds")
+
+arbiter = BuzzArbiter(tie_window_ns=TIE_WINDOW_NS, cooldown_ns=COOLDOWN_NS)
+decisions = []
+press = arbiter.press
+start = time.perf_counter()
+for i in range(len(times)):
+    decision = press(players[i], times[i])
+    if decision is not None:
+        decisions.append(decision)
+decision = arbiter.poll(t)
+if decision is not None:
+    decisions.append(decision)
+elapsed = time.perf_counter() - start
+
+mismatches = 0
+for decision, (kind, detail) in zip(decisions, expected):
+    got = decision.player if decision.kind == WIN else decision.players
+    if decision.kind != kind or got != detail:
+        mismatches += 1
+mismatches += abs(len(decisions) - len(expected))
+
+print(f"arbitrated {len(times):,} presses in {elapsed:.3f} s "
+      f"({len(times) / elapsed:,.0f} presses/s, {elapsed / len(times) * 1e9:.0f} ns/press)")
+print(f"decisions={len(decisions):,} expected={len(expected):,} mismatches={mismatches} ignored={arbiter.ignored:,}")
@@ -0,0 +1,169 @@
+"""Fan-out benchmark for the remote scoreboard broadcast (broadcast.py), on localhost.
+
+Starts VIEWERS ScoreboardClients in a separate process, a few of which drop
+a share of their packets, then plays a game on a GameCore at RATE changes
+per second for SECONDS and publishes every change. Reports what publish()
+costs the game loop, packet sizes for deltas and keyframes, the delay from
+publish to each viewer applying the update, and checks that every viewer
+(including the lossy ones) ends up with the host's state.
+
+First it checks that keyframes arriving during a cooldown keep a viewer's
+countdown on time rather than restarting it from the published value.
+
+Run from the repository root:  python bench/bench_broadcast.py [viewers] [seconds]
+"""
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from broadcast import StateBroadcaster, follow, state_fields
+from core import BUZZED, GameCore
+
+VIEWERS = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1] != "--viewers" else 200
+SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[1] != "--viewers" else 5.0
+RATE = 50 # State changes per second, far more than a real game
+LOSSY_VIEWERS = 0.1 # Share of viewers that drop packets
+LOSS = 0.05 # Share of packets they drop
+MS = 1_000_000
+
+
+def run_viewers(port, count):
+    """Viewer process: follows the host until stdin closes, then prints a JSON summary."""
+    rng = random.Random(16)
+    lags = []
+    updates = 0
+
+    def on_update(client):
+        nonlocal updates
+        updates += 1
+        lags.append(client.lag_s)
+
+    def drop_some(client):
+        deliver = client.datagram_received
+        client.datagram_received = lambda data, address: None if rng.random() < LOSS else deliver(data, address)
+
+    async def main():
+        clients = [await follow("127.0.0.1", port, on_update) for _ in range(count)]
+        for client in clients[:int(count * LOSSY_VIEWERS)]:
+            drop_some(client)
+        done = asyncio.get_running_loop().create_future()
+        threading.Thread(target=lambda: (sys.stdin.read(), loop.call_soon_threadsafe(done.set_result, None)),
+                         daemon=True).start()
+        await done
+        for client in clients:
+            client.renew_task.cancel()
+            client.transport.close()
+        return clients
+
+    loop = asyncio.new_event_loop()
+    clients = loop.run_until_complete(main())
+    lags.sort()
+    finals = {json.dumps(client.state, sort_keys=True) for client in clients}
+    print(json.dumps({"updates": updates, "gaps": sum(client.gaps for client in clients),
+                      "lag_ms": [lags[len(lags) // 2] * 1000, lags[len(lags) * 99 // 100] * 1000, lags[-1] * 1000],
+                      "finals": sorted(finals)}))
+
+
+def check_cooldown_keyframes():
+    """A 2 s cooldown published once, then 0.3 s keyframes: the viewer's countdown must follow the host's."""
+    broadcaster = StateBroadcaster(port=0, host="127.0.0.1", keyframe_interval=0.3).start()
+    core = GameCore(["P1", "P2"], cooldown_ns=2000 * MS)
+    now = time.monotonic_ns()
+    core.press("P1", now)
+    core.poll(now)
+    unlock_at = now / 1e9 + 2.0
+    readings = []
+
+    async def main():
+        client = await follow("127.0.0.1", broadcaster.port,
+                              lambda client: readings.append((client.cooldown_left_s(), unlock_at - time.monotonic())))
+        while not broadcaster.subscribers:
+            await asyncio.sleep(0.01)
+        broadcaster.publish(core, time.monotonic_ns())
+        await asyncio.sleep(1.6)
+        client.renew_task.cancel()
+        client.transport.close()
+
+    asyncio.run(main())
+    broadcaster.stop()
+    shown = [left for left, _ in readings]
+    worst = max(abs(left - true) for left, true in readings)
+    print(f"cooldown over {len(readings)} packets: viewer {' -> '.join(f'{left:.2f}' for left in shown)} s, "
+          f"off by at most {worst * 1000:.0f} ms")
+    assert len(readings) >= 4 and worst < 0.05 and shown == sorted(shown, reverse=True)
+
+
+def play(rng, broadcaster):
+    players = [f"P{n}" for n in range(1, 9)]
+    core = GameCore(players, tie_window_ns=500 * MS, cooldown_ns=5000 * MS, message_ns=1000 * MS)
+    costs = []
+    now = time.monotonic_ns()
+    core.round_start_ns = now
+    end = time.monotonic() + SECONDS
+    while time.monotonic() < end:
+        time.sleep(1 / RATE)
+        # Simulated time runs faster than the wall clock so rounds keep turning over
+        now += 400 * MS
+        if core.state == BUZZED and rng.random() < 0.5:
+            core.score(rng.choice((10, 5, -10)))
+        elif not core.locked(now):
+            core.press(rng.choice(players), now)
+        core.poll(now)
+        message = f"Conflict: {' & '.join(core.conflict)}" if core.conflict else ""
+        t0 = time.perf_counter_ns()
+        broadcaster.publish(core, now, message)
+        costs.append(time.perf_counter_ns() - t0)
+    return core, now, costs
+
+
+if sys.argv[1:2] == ["--viewers"]:
+    run_viewers(int(sys.argv[2]), int(sys.argv[3]))
+    sys.exit()
+
+check_cooldown_keyframes()
+
+broadcaster = StateBroadcaster(port=0, host="127.0.0.1").start()
+viewers = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--viewers", str(broadcaster.port), str(VIEWERS)],
+                           stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+deadline = time.monotonic() + 10
+while len(broadcaster.subscribers) < VIEWERS and time.monotonic() < deadline:
+    time.sleep(0.05)
+print(f"{len(broadcaster.subscribers)} viewers subscribed")
+
+core, now, costs = play(random.Random(16), broadcaster)
+time.sleep(broadcaster.keyframe_interval * 1.5) # Lossy viewers catch up on the next keyframe
+expected = json.dumps(state_fields(core, now), sort_keys=True)
+
+# Back to back, most calls only replace the pending state: the cost of the hand-over itself
+t0 = time.perf_counter_ns()
+for _ in range(10_000):
+    broadcaster.publish(core, now)
+handover_us = (time.perf_counter_ns() - t0) / 10_000 / 1000
+time.sleep(0.2)
+summary = json.loads(viewers.communicate("", timeout=30)[0])
+broadcaster.stop()
+
+costs.sort()
+n = len(costs)
+keyframe = len(json.dumps({"seq": 0, "key": 1, "t": time.time(), "state": state_fields(core, now)}, separators=(",", ":")))
+print(f"{os.cpu_count()} CPU(s); publish() back to back: {handover_us:.1f} us per call")
+print(f"publish() while fanning out: {n} calls, p50 {costs[n // 2] / 1000:.1f} us, p99 {costs[n * 99 // 100] / 1000:.1f} us, "
+      f"max {costs[-1] / 1000:.0f} us")
+print(f"sent {broadcaster.packets_sent} packets, {broadcaster.bytes_sent / broadcaster.packets_sent:.0f} bytes on average "
+      f"(a keyframe is {keyframe} bytes)")
+lag = summary["lag_ms"]
+print(f"viewers applied {summary['updates']} updates: publish to applied p50 {lag[0]:.2f} ms, p99 {lag[1]:.2f} ms, "
+      f"max {lag[2]:.1f} ms; {summary['gaps']} gaps noticed and recovered")
+finals = summary["finals"]
+# cooldown_ms is relative to when each packet was sent, so compare everything else
+strip = lambda state: {key: value for key, value in json.loads(state).items() if key != "cooldown_ms"}
+in_step = all(strip(final) == strip(expected) for final in finals)
+print(f"every viewer ends with the host's state: {in_step}")
+assert in_step
@@ -0,0 +1,118 @@
+"""Load test for the headless game core and its shared-memory scoreboard, without SDL.
+
+First drives GameCore (8 players, buzzer.py's tie window, cooldown and
+conflict message) through simulated rounds with bursts of presses and
+reports what press() and poll() cost. Then publishes states as fast as it
+can while another process reads them through the seqlock, checking every
+snapshot for a torn read (each published state has all scores equal to the
+message), and reports publish cost and read/retry rates on both sides.
+
+Run from the repository root:  python bench/bench_core.py [rounds] [seconds]
+"""
+import os
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import BUZZED, CONFLICT_SHOWN, GameCore
+from shared_state import ScoreboardReader, SharedScoreboard
+
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1] != "--reader" else 100_000
+SECONDS = float(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[1] != "--reader" else 2.0
+PLAYERS = [f"P{n}" for n in range(1, 9)]
+MS = 1_000_000
+
+
+def check_snapshots(name, seconds):
+    """Reader process (started like scoreboard.py): snapshots the block until `seconds` pass
+    and prints how many reads, retries and inconsistent snapshots it saw."""
+    board = ScoreboardReader(name)
+    reads = torn = 0
+    last_seq = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        state = board.read()
+        reads += 1
+        if not state.scores:
+            continue # The block as created, before the first publish
+        if any(score != state.scores[0] for score in state.scores) or state.message != str(state.scores[0]):
+            torn += 1
+        if state.seq < last_seq:
+            torn += 1 # Went back in time
+        last_seq = state.seq
+    board.close()
+    print(reads, torn, board.retries)
+
+
+def bench_core(rng):
+    core = GameCore(PLAYERS, tie_window_ns=500 * MS, cooldown_ns=5000 * MS, message_ns=1000 * MS)
+    now = 0
+    press_costs = []
+    poll_ns = polls = 0
+    outcomes = {BUZZED: 0, CONFLICT_SHOWN: 0}
+    for _ in range(ROUNDS):
+        # Players react 100-900 ms into the round; some are inside each other's tie window
+        start = now
+        for player in rng.sample(PLAYERS, rng.randint(1, 4)):
+            t = start + rng.randint(100, 900) * MS
+            t0 = time.perf_counter_ns()
+            decision = core.press(player, t)
+            press_costs.append(time.perf_counter_ns() - t0)
+            if decision is not None: # A late press closed the tie window
+                outcomes[core.state] += 1
+        # Wake at each deadline, as buzzer.py's loop does, until the round is over
+        now = start + 900 * MS
+        while (deadline := core.next_deadline()) is not None:
+            now = max(now, deadline)
+            t0 = time.perf_counter_ns()
+            decision = core.poll(now)
+            poll_ns += time.perf_counter_ns() - t0
+            polls += 1
+            if decision is not None:
+                outcomes[core.state] += 1
+        if core.state == BUZZED:
+            core.score(10)
+    press_costs.sort()
+    n = len(press_costs)
+    print(f"{ROUNDS} rounds, {n} presses: {outcomes[BUZZED]} buzzes, {outcomes[CONFLICT_SHOWN]} conflicts")
+    print(f"press(): p50 {press_costs[n // 2] / 1000:.2f} us, p99 {press_costs[n * 99 // 100] / 1000:.2f} us; "
+          f"poll(): {poll_ns / polls / 1000:.2f} us average over {polls} wake-ups")
+    print(f"pygame imported: {'pygame' in sys.modules}")
+
+
+def bench_seqlock():
+    board = SharedScoreboard()
+    core = GameCore(PLAYERS)
+    reader = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--reader", board.name, str(SECONDS)],
+                              stdout=subprocess.PIPE, text=True)
+    time.sleep(0.2) # Let the reader attach
+
+    costs = []
+    k = 0
+    deadline = time.monotonic() + SECONDS - 0.3
+    while time.monotonic() < deadline:
+        k += 1
+        for player in core.scores:
+            core.scores[player] = k
+        t0 = time.perf_counter_ns()
+        board.publish(core, time.monotonic_ns(), message=str(k))
+        costs.append(time.perf_counter_ns() - t0)
+    reads, torn, retries = map(int, reader.communicate(timeout=SECONDS + 10)[0].split())
+    board.close()
+
+    costs.sort()
+    n = len(costs)
+    print(f"publish(): {n / (SECONDS - 0.3):.0f}/s, p50 {costs[n // 2] / 1000:.2f} us, "
+          f"p99 {costs[n * 99 // 100] / 1000:.2f} us, max {costs[-1] / 1000:.0f} us")
+    print(f"reader: {reads / SECONDS:.0f} snapshots/s, {retries} retried after overlapping a write, {torn} torn")
+    assert torn == 0
+
+
+if sys.argv[1:2] == ["--reader"]:
+    check_snapshots(sys.argv[2], float(sys.argv[3]))
+else:
+    bench_core(random.Random(15))
+    bench_seqlock()
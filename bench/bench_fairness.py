@@ -0,0 +1,204 @@
+"""Fairness and load benchmark against a virtual BuzzerV2 board (no hardware needed).
+
+For each gap size, plays rounds in which one player presses and a rival
+presses `gap` later (both hold their buttons, so the sketch's 100 ms
+repeats kick in), with random USB delivery jitter. Gaps shorter than one
+pass of the sketch's loop (20 us) can only be decided by pin order on the
+board. Each round's presses go through the same reader and arbiter
+settings as the front-ends:
+
+  Arduino_Final text    SerialReader, "Player N pressed", first press wins
+  Arduino_Final binary  FrameReader, first press (by device time) wins
+  buzzer.py text        SerialReader, PLAYER_n, TIE_WINDOW conflict window
+
+and the bench reports how often the wrong player won, how many presses
+were dropped (sent by the board but never queued) and the throughput of a
+flood where every player taps 25 times a second for 2 s, along with how
+many of those taps the sketch itself never reports.
+
+With --trace=FILE, a scripted trace (see fake_device.load_trace) is played
+against each pipeline instead, and the queued presses and the winner are
+printed.
+
+With --live, it also starts buzzer.py and Arduino_Final.py themselves with
+the dummy SDL drivers, points them at the virtual board through .last_port
+in a scratch directory, and checks the winner they print for a few rounds.
+
+Run from the repository root:  python bench/bench_fairness.py [rounds per gap] [--trace=FILE] [--live]   (POSIX only)
+"""
+import os
+import queue
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import serial
+
+from arbiter import CONFLICT, BuzzArbiter
+from buzz_protocol import BINARY_BAUD_RATE, FRAME_PRESS
+from fake_device import ARDUINO_LINE, BUZZER_LINE, FakeBuzzer, load_trace, sketch_schedule
+from serial_reader import FrameReader, SerialReader
+
+args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+ROUNDS = int(args[0]) if args else 10
+LIVE = "--live" in sys.argv
+TRACE = next((arg.split("=", 1)[1] for arg in sys.argv[1:] if arg.startswith("--trace=")), None)
+GAPS_MS = [0.01, 0.05, 0.5, 2, 10, 50, 150, 600]
+HOLD_S = 0.25
+JITTER_S = 0.001
+TIE_WINDOW_NS = 50_000_000 # buzzer.py's TIE_WINDOW
+
+PIPELINES = [
+    # name, protocol, line format, players, reader factory, arbiter tie window
+    # (text readers keep held-button repeats so every line the sketch sends is counted;
+    # the front-ends collapse them, see bench_line_ingest.py)
+    ("Arduino_Final text", "text", ARDUINO_LINE, 2,
+     lambda ser, q: SerialReader(ser, {b"Player 1 pressed": 1, b"Player 2 pressed": 2}, q, hold_timeout_ns=0), 0),
+    ("Arduino_Final binary", "binary", ARDUINO_LINE, 2, lambda ser, q: FrameReader(ser, q), 0),
+    ("buzzer.py text", "text", BUZZER_LINE, 3,
+     lambda ser, q: SerialReader(ser, {b"PLAYER_%d" % n: n for n in range(1, 4)}, q, hold_timeout_ns=0), TIE_WINDOW_NS),
+]
+
+
+def presses_sent(trace, protocol, num_players):
+    return sum(1 for _, _, kind, _ in sketch_schedule(trace, protocol, num_players) if kind == FRAME_PRESS)
+
+
+def drain(presses, quiet_s=0.05):
+    """Everything queued until nothing has arrived for `quiet_s`."""
+    got = []
+    while True:
+        try:
+            got.append(presses.get(timeout=quiet_s))
+        except queue.Empty:
+            return got
+
+
+def decide(got, tie_window_ns):
+    """Runs queued presses through a fresh arbiter; returns the Decision or None."""
+    arbiter = BuzzArbiter(tie_window_ns=tie_window_ns, cooldown_ns=None)
+    decision = None
+    for player, t_ns in got:
+        decision = arbiter.press(player, t_ns) or decision
+    if decision is None and got:
+        decision = arbiter.poll(got[0][1] + tie_window_ns)
+    return decision
+
+
+def run_pipeline(name, protocol, line_format, num_players, make_reader, tie_window_ns, rng):
+    device = FakeBuzzer(protocol, line_format=line_format)
+    ser = serial.Serial(device.port, BINARY_BAUD_RATE if protocol == "binary" else 9600, timeout=0.1)
+    presses = queue.Queue()
+    reader = make_reader(ser, presses)
+    reader.start()
+    print(f"\n{name}")
+    if TRACE:
+        trace = load_trace(TRACE)
+        start_ns = device.play_trace(trace, num_players, JITTER_S, rng)
+        got = drain(presses, 0.2)
+        print("  " + ", ".join(f"P{player} at {(t_ns - start_ns) / 1e6:.2f} ms" for player, t_ns in got))
+        print(f"  {decide(got, tie_window_ns)!r}")
+    else:
+        run_gaps(device, presses, protocol, num_players, tie_window_ns, rng)
+    reader.stop()
+    reader.join(timeout=1)
+    ser.close()
+    device.close()
+
+
+def run_gaps(device, presses, protocol, num_players, tie_window_ns, rng):
+    print(f"{'gap ms':>8} {'rounds':>7} {'right':>6} {'wrong':>6} {'conflict':>9} {'dropped':>8}")
+    for gap_ms in GAPS_MS:
+        right = wrong = conflicts = dropped = 0
+        for _ in range(ROUNDS):
+            first, rival = rng.sample(range(1, num_players + 1), 2)
+            phase = rng.uniform(0, 0.001) # Where the presses fall within the sketch's loop
+            trace = [(phase, first, HOLD_S), (phase + gap_ms / 1000, rival, HOLD_S)]
+            device.play_trace(trace, num_players, JITTER_S, rng)
+            got = drain(presses)
+            dropped += presses_sent(trace, protocol, num_players) - len(got)
+            decision = decide(got, tie_window_ns)
+            if decision is None:
+                continue
+            if decision.kind == CONFLICT:
+                conflicts += 1
+            elif decision.player == first:
+                right += 1
+            else:
+                wrong += 1
+        print(f"{gap_ms:>8} {ROUNDS:>7} {right:>6} {wrong:>6} {conflicts:>9} {dropped:>8}")
+
+    # Flood: every player taps (20 ms down, 20 ms up) for 2 s
+    trace = [(i * 0.04 + player * 0.003, player, 0.02) for i in range(50) for player in range(1, num_players + 1)]
+    sent = presses_sent(trace, protocol, num_players)
+    t0 = time.perf_counter()
+    device.play_trace(trace, num_players, JITTER_S, rng)
+    got = drain(presses, 0.2)
+    elapsed = time.perf_counter() - t0 - 0.2
+    print(f"flood: {len(trace)} taps, {sent} reported by the sketch, {len(got)} queued in {elapsed:.2f} s "
+          f"({len(got) / elapsed:.0f} presses/s), dropped {sent - len(got)}")
+
+
+def run_live(script, line_format, num_players, winner_text, rounds, rng):
+    """Runs a front-end headlessly against the virtual board and prints the winner it reports."""
+    for _ in range(rounds):
+        device = FakeBuzzer("text", line_format=line_format)
+        scratch = tempfile.mkdtemp()
+        with open(os.path.join(scratch, ".last_port"), "w") as f:
+            f.write(device.port) # Tried before any other port
+        env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+        process = subprocess.Popen([sys.executable, "-u", os.path.join(ROOT, script)], cwd=scratch, env=env,
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        lines = queue.Queue()
+        threading.Thread(target=lambda: [lines.put(line) for line in process.stdout], daemon=True).start()
+
+        # Keep sending the banner until the script has opened the port and seen it
+        connected = False
+        deadline = time.monotonic() + 20
+        while not connected and time.monotonic() < deadline:
+            device.send_banner()
+            try:
+                while True:
+                    if "onnected to" in lines.get(timeout=0.3):
+                        connected = True
+                        break
+            except queue.Empty:
+                pass
+        time.sleep(0.5)
+        first, rival = rng.sample(range(1, num_players + 1), 2)
+        device.play_trace([(0.0, first, HOLD_S), (0.02, rival, HOLD_S)], num_players, JITTER_S, rng)
+
+        winner = None
+        deadline = time.monotonic() + 5
+        while winner is None and time.monotonic() < deadline:
+            try:
+                line = lines.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            for player in range(1, num_players + 1):
+                if winner_text % player in line:
+                    winner = player
+            if "Conflict" in line:
+                winner = "conflict"
+        process.terminate()
+        process.wait()
+        device.close()
+        shutil.rmtree(scratch, ignore_errors=True)
+        print(f"  {script}: P{first} pressed 20 ms before P{rival}, script says {winner}")
+
+
+rng = random.Random(2025)
+for pipeline in PIPELINES:
+    run_pipeline(*pipeline, rng)
+
+if LIVE:
+    print("\nlive scripts (the sketch reports the rival after its 100 ms delay, past buzzer.py's 50 ms tie window, so the first press wins there too)")
+    run_live("Arduino_Final.py", ARDUINO_LINE, 2, "PLAYER %d BUZZED FIRST", 3, rng)
+    run_live("buzzer.py", BUZZER_LINE, 3, "P%d triggered", 2, rng)
@@ -0,0 +1,147 @@
+"""Micro-benchmark for the text-protocol ingest (serial_reader.LineIngest).
+
+1. Parsing only, in memory: LINES "Player N pressed" lines through
+   - readline().decode('utf-8').strip() and a string compare (Arduino_Final's old loop),
+   - readline().strip() and a dict lookup (SerialReader's old read_once),
+   - LineIngest.feed() on 4 KB chunks, as read(in_waiting) returns them, once
+     counting every line as a press and once collapsing held-button repeats
+     (the chunks are stamped 1 ms apart, a stuck-button flood).
+2. Through a pseudo-terminal: pyserial's readline() against SerialReader's
+   bulk reads, for PTY_LINES lines written as fast as the pty takes them.
+3. Held buttons: two players hold their buttons for HOLD_S on the virtual
+   BuzzerV2 board (which repeats the line every pass), then one of them
+   presses again; counts the lines the sketch sent and the presses queued.
+
+Run from the repository root:  python bench/bench_line_ingest.py  (POSIX only for parts 2 and 3)
+"""
+import io
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serial
+
+from fake_device import ARDUINO_LINE, FakeBuzzer, sketch_schedule
+from serial_reader import LineIngest, SerialReader
+
+LINES = 500_000
+PTY_LINES = 20_000
+HOLD_S = 3.0
+LINE_MAP = {b"Player 1 pressed": 1, b"Player 2 pressed": 2}
+
+rng = random.Random(17)
+lines = [ARDUINO_LINE % rng.randint(1, 2) for _ in range(LINES)]
+blob = b"".join(lines)
+
+
+def rate(label, seconds, count):
+    print(f"  {label:<44} {count / seconds / 1e6:6.2f} M lines/s")
+
+
+# --- 1. Parsing only ---
+print(f"parsing {LINES} lines in memory")
+stream = io.BytesIO(blob)
+t0 = time.perf_counter()
+found = 0
+while True:
+    raw = stream.readline()
+    if not raw:
+        break
+    line = raw.decode("utf-8").strip()
+    if line == "Player 1 pressed" or line == "Player 2 pressed":
+        found += 1
+rate("readline + decode + strip + compare", time.perf_counter() - t0, found)
+
+stream = io.BytesIO(blob)
+t0 = time.perf_counter()
+found = 0
+while True:
+    raw = stream.readline()
+    if not raw:
+        break
+    if LINE_MAP.get(raw.strip()) is not None:
+        found += 1
+rate("readline + strip + dict lookup", time.perf_counter() - t0, found)
+
+view = memoryview(blob)
+for label, hold_timeout_ns in (("LineIngest.feed, every line a press", 0), ("LineIngest.feed, repeats collapsed", None)):
+    ingest = LineIngest(LINE_MAP, hold_timeout_ns)
+    t0 = time.perf_counter()
+    found = 0
+    for offset in range(0, len(blob), 4096):
+        found += len(ingest.feed(view[offset:offset + 4096], offset // 4096 * 1_000_000))
+    rate(label, time.perf_counter() - t0, ingest.lines)
+    assert ingest.lines == LINES and found == (LINES if hold_timeout_ns == 0 else 2)
+
+
+# --- 2. Through a pseudo-terminal ---
+def pump(device, count):
+    chunk = b"".join(lines[:1000])
+    for _ in range(count // 1000):
+        device.write(chunk)
+
+
+def pty_readline(count):
+    device = FakeBuzzer("text")
+    ser = serial.Serial(device.port, 9600, timeout=1)
+    threading.Thread(target=pump, args=(device, count), daemon=True).start()
+    t0 = time.perf_counter()
+    got = 0
+    while got < count:
+        if LINE_MAP.get(ser.readline().strip()) is not None:
+            got += 1
+    elapsed = time.perf_counter() - t0
+    ser.close()
+    device.close()
+    return elapsed
+
+
+def pty_serial_reader(count):
+    device = FakeBuzzer("text")
+    ser = serial.Serial(device.port, 9600, timeout=1)
+    presses = queue.Queue()
+    reader = SerialReader(ser, LINE_MAP, presses, hold_timeout_ns=0)
+    reader.start()
+    t0 = time.perf_counter()
+    threading.Thread(target=pump, args=(device, count), daemon=True).start()
+    for _ in range(count):
+        presses.get(timeout=5)
+    elapsed = time.perf_counter() - t0
+    reader.stop()
+    reader.join(timeout=2)
+    ser.close()
+    device.close()
+    return elapsed
+
+
+print(f"\nreading {PTY_LINES} lines from a pseudo-terminal")
+rate("pyserial readline()", pty_readline(PTY_LINES), PTY_LINES)
+rate("SerialReader, read(in_waiting) + LineIngest", pty_serial_reader(PTY_LINES), PTY_LINES)
+
+
+# --- 3. Held buttons ---
+trace = [(0.0, 1, HOLD_S), (0.05, 2, HOLD_S), (HOLD_S + 1.0, 1, 0.2)]
+sent = sum(1 for _ in sketch_schedule(trace, "text", 2))
+device = FakeBuzzer("text")
+ser = serial.Serial(device.port, 9600, timeout=0.1)
+presses = queue.Queue()
+reader = SerialReader(ser, LINE_MAP, presses)
+reader.start()
+start_ns = device.play_trace(trace, 2, 0.001, rng)
+time.sleep(0.5)
+got = []
+while not presses.empty():
+    got.append(presses.get())
+reader.stop()
+reader.join(timeout=1)
+ser.close()
+device.close()
+print(f"\nheld buttons: the sketch sent {sent} lines for {len(trace)} presses; queued "
+      + ", ".join(f"P{player} at {(t_ns - start_ns) / 1e9:.2f} s" for player, t_ns in got)
+      + f" ({reader.ingest.dropped} lines dropped)")
+assert [player for player, _ in got] == [1, 2, 1]
@@ -0,0 +1,63 @@
+"""Benchmarks the binary buzz frame decoder, in memory and through a fake device.
+
+Run from the repository root:  python bench/bench_protocol.py
+The pty part needs a POSIX system.
+"""
+import os
+import queue
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serial
+
+from buzz_protocol import FRAME_PRESS, FrameDecoder, encode_frame
+from fake_device import FakeBuzzer
+from serial_reader import FrameReader
+
+NUM_FRAMES = 1_000_000
+CHUNK = 64 # Bytes per feed(), about one USB packet
+
+# --- In-memory decode throughput ---
+stream = b"".join(encode_frame(FRAME_PRESS, 1 + i % 2, i, i * 7) for i in range(NUM_FRAMES))
+decoder = FrameDecoder()
+decoded = 0
+start = time.perf_counter()
+view = memoryview(stream)
+for offset in range(0, len(stream), CHUNK):
+    decoded += len(decoder.feed(view[offset:offset + CHUNK]))
+elapsed = time.perf_counter() - start
+print(f"decode: {decoded} frames in {elapsed:.3f} s ({decoded / elapsed:,.0f} frames/s), "
+      f"bad={decoder.bad_frames} lost={decoder.lost_frames}")
+
+# --- Resync after garbage ---
+decoder = FrameDecoder()
+noisy = b"Arduino Button Detector Ready\r\n" + encode_frame(FRAME_PRESS, 2, 0, 123) + b"\xa5\x00junk" + encode_frame(FRAME_PRESS, 1, 1, 456)
+print(f"resync: {decoder.feed(noisy)}")
+
+# --- End to end through a pty ---
+PTY_FRAMES = 20_000
+device = FakeBuzzer("binary")
+ser = serial.Serial(device.port, 115200, timeout=0.1)
+reader = FrameReader(ser, queue.Queue())
+reader.start()
+device.send_banner()
+start = time.perf_counter()
+for i in range(0, PTY_FRAMES, 10):
+    device.write(b"".join(device.frame(FRAME_PRESS, 1 + j % 2) for j in range(10)))
+received = 0
+deadline = time.monotonic() + 5
+while received < PTY_FRAMES and time.monotonic() < deadline:
+    try:
+        reader.presses.get(timeout=0.5)
+        received += 1
+    except queue.Empty:
+        pass
+elapsed = time.perf_counter() - start
+print(f"pty: {received}/{PTY_FRAMES} presses in {elapsed:.3f} s ({received / elapsed:,.0f} presses/s), "
+      f"bad={reader.decoder.bad_frames} lost={reader.decoder.lost_frames}")
+reader.stop()
+reader.join()
+ser.close()
+device.close()
@@ -0,0 +1,87 @@
+"""Frame-time benchmark: full redraw every frame vs. cached text with dirty rectangles.
+
+Simulates the Arduino_Final.py scoreboard: mostly idle frames, a countdown
+that changes ten times a second and an occasional score change. Both paths
+must leave identical pixels on screen.
+
+Run from the repository root:  python bench/bench_render.py
+Uses SDL's dummy video driver unless SDL_VIDEODRIVER is already set.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from render import DirtyRenderer
+
+FRAMES = 20_000
+FPS = 1000 # Simulated frame rate of the uncapped loop
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+
+pygame.display.init()
+pygame.font.init()
+screen = pygame.display.set_mode((600, 400))
+font = pygame.font.Font(None, 30)
+small_font = pygame.font.Font(None, 20)
+
+
+def frame_items(frame):
+    """What the scoreboard shows on a given frame."""
+    scores = (frame // 5000 * 10, frame // 7000 * 5)
+    ms = frame * 1000 // FPS
+    items = [
+        (f"Player 1 Score: {scores[0]}", font, WHITE, 50, 50),
+        (f"Player 2 Score: {scores[1]}", font, WHITE, 350, 50),
+        ("Waiting for a buzz...", font, GREEN, 50, 180),
+    ]
+    remaining = 5000 - ms % 6000
+    if remaining > 0:
+        items.append((f"Next buzz in: {remaining / 1000:.1f} s", small_font, RED, 50, 220))
+        items.append(("Press P to exit.", small_font, WHITE, 50, 240))
+    else:
+        items.append(("Press P to exit.", small_font, WHITE, 50, 220))
+    return items
+
+
+def full_redraw():
+    for frame in range(FRAMES):
+        screen.fill(BLACK)
+        for text, item_font, color, x, y in frame_items(frame):
+            screen.blit(item_font.render(text, True, color), (x, y))
+        pygame.display.flip()
+
+
+def dirty_redraw():
+    renderer = DirtyRenderer(screen, BLACK)
+    pushed = 0
+    for frame in range(FRAMES):
+        renderer.begin()
+        for item in frame_items(frame):
+            renderer.text(*item)
+        if renderer.present():
+            pushed += 1
+    return pushed
+
+
+start = time.perf_counter()
+full_redraw()
+full_time = time.perf_counter() - start
+full_pixels = pygame.image.tobytes(screen, "RGB")
+
+start = time.perf_counter()
+pushed = dirty_redraw()
+dirty_time = time.perf_counter() - start
+dirty_pixels = pygame.image.tobytes(screen, "RGB")
+
+print(f"full redraw:  {full_time / FRAMES * 1e6:8.1f} us/frame")
+print(f"dirty redraw: {dirty_time / FRAMES * 1e6:8.1f} us/frame ({pushed} of {FRAMES} frames touched the display)")
+print(f"speedup: {full_time / dirty_time:.1f}x, identical final frame: {full_pixels == dirty_pixels}")
+pygame.quit()
@@ -0,0 +1,100 @@
+"""Cost of recording raw input, and how fast a long recording replays.
+
+Writes a synthetic Arduino_Final.py session of HOURS hours (text protocol,
+four players): a round every 20 s, one to three presses arriving as serial
+chunks, a score key and ESC for the next round. Reports what a record call
+costs the thread making it, the file size, and the time replay.py takes to
+run the whole session through the game core, which is checked against a
+journal of the same game played directly on a GameCore.
+
+Run from the repository root:  python bench/bench_replay.py [hours]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import replay
+from core import BUZZED, GameCore
+from latency import LatencyHistogram
+from recording import InputRecorder
+
+HOURS = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+ROUND_S = 20
+NUM_PLAYERS = 4
+SCORE_KEYS = {"f": 10, "g": 5, "h": -10}
+LINES = {f"Player {n} pressed".encode(): n for n in range(1, NUM_PLAYERS + 1)}
+
+
+def script(rng):
+    """The session's inputs in order: ("serial", t, bytes) and ("key", t, name)."""
+    inputs = []
+    t = 1_000_000_000
+    for _ in range(int(HOURS * 3600 / ROUND_S)):
+        press_t = t + rng.randint(500, 8000) * 1_000_000
+        for player in rng.sample(range(1, NUM_PLAYERS + 1), rng.randint(1, 3)):
+            press_t += rng.randint(1, 300_000) # A few hundred us apart, usually one chunk each
+            inputs.append(("serial", press_t, f"Player {player} pressed\r\n".encode()))
+        inputs.append(("key", press_t + 3_000_000_000, rng.choice(list(SCORE_KEYS))))
+        inputs.append(("key", press_t + 4_000_000_000, "escape"))
+        t += ROUND_S * 1_000_000_000
+    return inputs
+
+
+def play_live(inputs, start_ns):
+    """The same game on a GameCore with a list for a journal, as Arduino_Final.py would play it."""
+    events = []
+
+    class ListJournal:
+        def record(self, kind, **fields):
+            events.append({"type": kind, **fields})
+
+    core = GameCore(range(1, NUM_PLAYERS + 1), journal=ListJournal())
+    core.round_start_ns = start_ns
+    for kind, t, payload in inputs:
+        if kind == "serial":
+            core.press(LINES[payload.strip()], t)
+        elif core.state == BUZZED:
+            if payload in SCORE_KEYS:
+                core.score(SCORE_KEYS[payload])
+            elif payload == "escape":
+                core.next_round(t)
+        core.poll(t)
+    return json.loads(json.dumps(events))
+
+
+if __name__ == "__main__":
+    inputs = script(random.Random(23))
+    start_ns = 1_000_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench_input.bzin")
+        recorder = InputRecorder(path).open({"script": "arduino", "protocol": "text", "players": list(range(1, NUM_PLAYERS + 1)),
+                                             "lines": [[line.decode(), player] for line, player in LINES.items()],
+                                             "player_map": None, "tie_window_ns": 0, "cooldown_ns": None,
+                                             "journal": "bench_journal.jsonl"})
+        recorder.start(start_ns, scores=[[player, 0] for player in range(1, NUM_PLAYERS + 1)], journal_seq=0)
+        calls = LatencyHistogram()
+        for kind, t, payload in inputs:
+            before = time.perf_counter_ns()
+            if kind == "serial":
+                recorder.serial(t, payload)
+            else:
+                recorder.key(t, payload)
+            calls.record(time.perf_counter_ns() - before)
+        recorder.close(journal_seq=0)
+        size = os.path.getsize(path)
+
+        started = time.perf_counter()
+        session = replay.replay_recording(path)
+        took = time.perf_counter() - started
+
+    replayed = json.loads(json.dumps([event for _, event in session.log.events]))
+    print(f"{HOURS:g} hours, {len(inputs):,} inputs, {len(replayed):,} events")
+    print(f"record call: p50 {calls.percentile(0.5)} us  p99 {calls.percentile(0.99)} us  max {calls.max_us} us")
+    print(f"file: {size / 1024:.0f} KiB ({size / HOURS / 1024:.0f} KiB per hour)")
+    print(f"replay: {took:.2f} s, {HOURS * 3600 / took:,.0f}x real time")
+    print(f"matches the game played directly: {replayed == play_live(inputs, start_ns)}")
@@ -0,0 +1,91 @@
+"""Latency of the multi-room host (rooms.py) as rooms are added, against virtual boards.
+
+For each room count, starts a RoomHost with that many rooms over WORKERS
+processes, each room reading its own FakeBuzzer (text protocol, first
+press wins, 50 ms cooldown). Every room then gets PRESSES presses, one
+every PERIOD_S with a random offset, all rooms interleaved, and the bench
+reports how long each took from being written to the board to being
+decided in its room, and to the buzz event reaching the host process.
+
+Run from the repository root:  python bench/bench_rooms.py [workers] [room counts, e.g. 1,8,32,64]  (POSIX only)
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_device import ARDUINO_LINE, FakeBuzzer
+from rooms import RoomHost
+
+WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+ROOM_COUNTS = [int(n) for n in sys.argv[2].split(",")] if len(sys.argv) > 2 else [1, 8, 32, 64]
+PRESSES = 30
+PERIOD_S = 0.2
+PLAYERS = {b"Player 1 pressed": 1, b"Player 2 pressed": 2}
+
+
+def percentiles(values):
+    values = sorted(values)
+    n = len(values)
+    return values[n // 2] / 1e6, values[n * 99 // 100] / 1e6, values[-1] / 1e6
+
+
+def collect(host, received, stop):
+    while not stop.is_set():
+        for kind, room, fields in host.events(timeout=0.1):
+            if kind == "buzz":
+                received.append((room, fields["decided_ns"], time.monotonic_ns()))
+
+
+def bench(count, rng):
+    devices = [FakeBuzzer("text") for _ in range(count)]
+    rooms = [{"name": f"room{i}", "devices": [(device.port, "text", PLAYERS)], "cooldown_ns": 50_000_000,
+              "hold_timeout_ns": 0} for i, device in enumerate(devices)]
+    host = RoomHost(rooms, WORKERS).start()
+    received = []
+    stop = threading.Event()
+    collector = threading.Thread(target=collect, args=(host, received, stop))
+    collector.start()
+
+    # Every room presses once per period, at a random point in it
+    schedule = sorted((k * PERIOD_S + rng.uniform(0, PERIOD_S * 0.7), i)
+                      for i in range(count) for k in range(PRESSES))
+    written = {f"room{i}": [] for i in range(count)}
+    start = time.monotonic() + 0.1
+    for at, i in schedule:
+        delay = start + at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        written[f"room{i}"].append(time.monotonic_ns())
+        devices[i].write(ARDUINO_LINE % rng.randint(1, 2))
+    time.sleep(0.5)
+    stop.set()
+    collector.join()
+    host.stop()
+    for device in devices:
+        device.close()
+
+    to_decision = []
+    to_host = []
+    seen = {room: 0 for room in written}
+    for room, decided_ns, received_ns in received:
+        write_ns = written[room][seen[room]] # A room's buzzes come in the order its presses were written
+        seen[room] += 1
+        to_decision.append(decided_ns - write_ns)
+        to_host.append(received_ns - write_ns)
+    missing = sum(len(times) for times in written.values()) - len(received)
+    print(f"{count:>5} rooms {len(received):>6} buzzes  "
+          "press->decision p50 {:6.2f} p99 {:6.2f} max {:6.2f} ms   ".format(*percentiles(to_decision)) +
+          "press->host p50 {:6.2f} p99 {:6.2f} max {:6.2f} ms".format(*percentiles(to_host)) +
+          (f"   {missing} presses not decided" if missing else ""))
+
+
+if __name__ == "__main__":
+    print(f"{WORKERS} worker processes, {PRESSES} presses per room, one every {PERIOD_S * 1000:.0f} ms, "
+          f"{os.cpu_count()} CPUs")
+    rng = random.Random(19)
+    for count in ROOM_COUNTS:
+        bench(count, rng)
@@ -0,0 +1,72 @@
+"""Stress test for the single serial reader used by buzzer.py.
+
+Pushes PLAYER_n lines through a fake device at increasing rates and checks that
+every line is delivered exactly once, then measures the reader's idle CPU use.
+
+Run from the repository root:  python bench/bench_serial_ingest.py  (POSIX only)
+"""
+import os
+import queue
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serial
+
+from fake_device import FakeBuzzer
+from serial_reader import SerialReader
+
+RATES = [1_000, 5_000, 20_000, 50_000] # Lines per second
+DURATION = 2.0 # Seconds per rate
+BATCH = 50 # Lines written per os.write()
+
+LINE_MAP = {b"PLAYER_1": "P1", b"PLAYER_2": "P2", b"PLAYER_3": "P3"}
+
+device = FakeBuzzer("text")
+ser = serial.Serial(device.port, 9600, timeout=1)
+presses = queue.Queue()
+reader = SerialReader(ser, LINE_MAP, presses, hold_timeout_ns=0) # Every line counts, repeats included
+reader.start()
+
+for rate in RATES:
+    sent = {"P1": 0, "P2": 0, "P3": 0}
+    batch_interval = BATCH / rate
+    start = time.perf_counter()
+    next_write = start
+    while time.perf_counter() - start < DURATION:
+        lines = []
+        for i in range(BATCH):
+            player = 1 + (sum(sent.values()) + i) % 3
+            lines.append(b"PLAYER_%d\r\n" % player)
+        for line in lines:
+            sent["P" + chr(line[7])] += 1
+        device.write(b"".join(lines))
+        next_write += batch_interval
+        delay = next_write - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    received = {"P1": 0, "P2": 0, "P3": 0}
+    deadline = time.monotonic() + 5
+    while sum(received.values()) < sum(sent.values()) and time.monotonic() < deadline:
+        try:
+            player, _ = presses.get(timeout=0.5)
+            received[player] += 1
+        except queue.Empty:
+            pass
+    total = sum(sent.values())
+    lost = total - sum(received.values())
+    misrouted = sum(abs(sent[p] - received[p]) for p in sent) - lost
+    print(f"{rate:>6} lines/s: sent={total} lost={lost} misrouted={misrouted}")
+
+# --- Idle CPU ---
+cpu_start = time.process_time()
+time.sleep(2.0)
+idle_cpu = (time.process_time() - cpu_start) / 2.0 * 100
+print(f"idle CPU with the reader running: {idle_cpu:.2f}% of one core")
+
+reader.stop()
+reader.join()
+ser.close()
+device.close()
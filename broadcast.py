@@ -0,0 +1,314 @@
+"""Game state broadcast to remote scoreboards (viewer.py) over UDP.
+
+A viewer sends a "hello" datagram to the host's port and from then on gets
+every state change until it stops renewing the hello. Its first packet is a
+keyframe (the whole state); after that only the fields that changed are
+sent, as deltas chained by sequence number. Every KEYFRAME_INTERVAL seconds
+everyone gets a keyframe again, so a viewer that lost a packet (or joined
+late) is back in step within a second, and a viewer that notices a gap asks
+for one straight away.
+
+Hellos and keyframe requests are padded to REQUEST_SIZE bytes and shorter
+ones are ignored, and a keyframe only answers a request at least as large,
+so a forged request cannot make the host send more than it received. At
+most MAX_SUBSCRIBERS viewers are followed at a time. The scripts leave
+broadcasting off unless their BROADCAST_PORT is set.
+
+The sockets run on an asyncio loop in a background thread. The game loop's
+publish() only stores the latest state and wakes that loop, so fanning out
+to hundreds of viewers costs the buzz handling nothing more than a dict.
+
+Packets are compact JSON:
+    {"seq": 7, "key": 1, "t": <sender wall clock>, "state": {...every field...}}
+    {"seq": 8, "base": 7, "t": ..., "set": {...changed fields...}, "scores": {"<index>": score, ...}}
+"""
+import asyncio
+import json
+import threading
+import time
+
+BROADCAST_PORT = 5005 # The port viewers use by default; the scripts turn broadcasting on by setting theirs to it
+KEYFRAME_INTERVAL = 1.0 # seconds
+SUBSCRIBER_TIMEOUT = 10.0 # seconds without a hello before a viewer is dropped
+RENEW_INTERVAL = 3.0 # seconds between a viewer's hellos
+MAX_SUBSCRIBERS = 500 # New hellos beyond this are ignored until a subscription runs out
+REQUEST_SIZE = 1024 # Bytes a hello or keyframe request is padded to; larger than a keyframe of 32 named players
+
+HELLO = b"hello" # Subscribe (or renew); answered with a keyframe
+KEYFRAME_REQUEST = b"key" # A viewer missed a delta
+
+
+def _request(kind):
+    return kind.ljust(REQUEST_SIZE)
+
+
+def state_fields(core, now_ns, message=""):
+    """The GameCore state viewers show, as plain JSON values."""
+    unlock_ns = core.arbiter.next_deadline() if core.locked(now_ns) else None
+    return {
+        "players": list(core.players),
+        "scores": [core.scores[player] for player in core.players],
+        "state": core.state,
+        "winner": core.winner,
+        "reaction_ms": round(core.reaction_ms, 3),
+        "message": message,
+        "locked": core.locked(now_ns),
+        # Remaining cooldown at now_ns; the broadcaster brings it up to date in every packet it sends
+        "cooldown_ms": 0 if unlock_ns is None else max(0, (unlock_ns - now_ns) // 1_000_000),
+    }
+
+
+def _encode(packet):
+    return json.dumps(packet, separators=(",", ":")).encode()
+
+
+class StateBroadcaster:
+    """Sends game state deltas and keyframes to every subscribed viewer.
+
+    start() binds the port on a thread of its own (printing a warning and
+    staying idle if it cannot, or if `port` is None); a host that already runs
+    an asyncio loop awaits serve() instead. publish() may be called from any
+    thread and never blocks.
+    """
+
+    def __init__(self, port=BROADCAST_PORT, host="0.0.0.0", keyframe_interval=KEYFRAME_INTERVAL,
+                 subscriber_timeout=SUBSCRIBER_TIMEOUT, max_subscribers=MAX_SUBSCRIBERS):
+        self.port = port
+        self.host = host
+        self.keyframe_interval = keyframe_interval
+        self.subscriber_timeout = subscriber_timeout
+        self.max_subscribers = max_subscribers
+        self.subscribers = {} # Viewer address -> monotonic time its subscription runs out
+        self.packets_sent = 0
+        self.bytes_sent = 0
+        self.running = False
+        self._loop = None
+        self._transport = None
+        self._tick = None # Handle of the next keyframe tick
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = None # Latest state published by the game, not sent yet
+        self._wake_queued = False
+        self._state = None # State the viewers have
+        self._unlock_at = 0.0 # Monotonic time the cooldown in _state runs out
+        self._seq = 0
+
+    def start(self):
+        if self.port is None:
+            return self # Broadcasting turned off
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def publish(self, core, now_ns, message=""):
+        """Queues the core's current state for the viewers; only the latest state is kept."""
+        if not self.running:
+            return
+        fields = state_fields(core, now_ns, message)
+        unlock_at = time.monotonic() + fields["cooldown_ms"] / 1000 # On our clock, whichever one the core runs on
+        with self._lock:
+            self._pending = (fields, unlock_at)
+            if self._wake_queued:
+                return # The loop has not picked up the previous state yet
+            self._wake_queued = True
+        self._loop.call_soon_threadsafe(self._flush)
+
+    async def serve(self):
+        """Binds the port on the running loop and starts the keyframe ticks. Raises OSError if it cannot."""
+        self._loop = asyncio.get_running_loop()
+        self._transport, _ = await self._loop.create_datagram_endpoint(
+            lambda: _BroadcastProtocol(self), local_addr=(self.host, self.port))
+        self.port = self._transport.get_extra_info("sockname")[1] # The real port when 0 was asked for
+        self.running = True
+        self._tick = self._loop.call_later(self.keyframe_interval, self._keyframe_tick)
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=1)
+        else: # Serving on the caller's loop, called from it
+            self._tick.cancel()
+            self._transport.close()
+
+    # --- Broadcast thread ---
+
+    def _run(self, ready):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self.serve())
+        except OSError as e:
+            print(f"Warning: Could not open the scoreboard broadcast port {self.port}: {e}")
+            self._loop.close()
+            ready.set()
+            return
+        ready.set()
+        self._loop.run_forever()
+        self._transport.close()
+        self._loop.close()
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._wake_queued = False
+        if pending is None:
+            return
+        fields, unlock_at = pending
+        if self._state is None or fields["players"] != self._state["players"]:
+            self._state = fields
+            self._unlock_at = unlock_at
+            self._seq += 1
+            self._send_all(self._keyframe())
+            return
+        changed = {name: value for name, value in fields.items() if name != "scores" and value != self._state[name]}
+        scores = {str(i): score for i, (score, old) in enumerate(zip(fields["scores"], self._state["scores"]))
+                  if score != old}
+        if not changed and not scores:
+            return
+        self._state = fields
+        self._unlock_at = unlock_at
+        if "cooldown_ms" in changed:
+            changed["cooldown_ms"] = self._cooldown_ms()
+        self._seq += 1
+        packet = {"seq": self._seq, "base": self._seq - 1, "t": time.time(), "set": changed}
+        if scores:
+            packet["scores"] = scores
+        self._send_all(_encode(packet))
+
+    def _keyframe(self):
+        # Keyframes repeat the state, but the cooldown left is as of now, not as of when it was published
+        state = {**self._state, "cooldown_ms": self._cooldown_ms()}
+        return _encode({"seq": self._seq, "key": 1, "t": time.time(), "state": state})
+
+    def _cooldown_ms(self):
+        return max(0, int((self._unlock_at - time.monotonic()) * 1000))
+
+    def _keyframe_tick(self):
+        now = time.monotonic()
+        for address in [address for address, expiry in self.subscribers.items() if expiry < now]:
+            del self.subscribers[address]
+        if self._state is not None:
+            self._send_all(self._keyframe())
+        self._tick = self._loop.call_later(self.keyframe_interval, self._keyframe_tick)
+
+    def _send_all(self, data):
+        for address in self.subscribers:
+            self._send(data, address)
+
+    def _send(self, data, address):
+        self._transport.sendto(data, address)
+        self.packets_sent += 1
+        self.bytes_sent += len(data)
+
+    def _received(self, data, address):
+        if len(data) < REQUEST_SIZE:
+            return # Unpadded: answering it would send more than we got
+        request = data.strip()
+        if request == HELLO:
+            if address not in self.subscribers and len(self.subscribers) >= self.max_subscribers:
+                return
+            self.subscribers[address] = time.monotonic() + self.subscriber_timeout
+        elif request != KEYFRAME_REQUEST or address not in self.subscribers:
+            return
+        if self._state is not None:
+            keyframe = self._keyframe()
+            if len(keyframe) <= len(data): # Otherwise the next keyframe tick brings it
+                self._send(keyframe, address)
+
+
+class _BroadcastProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, broadcaster):
+        self.broadcaster = broadcaster
+
+    def datagram_received(self, data, address):
+        self.broadcaster._received(data, address)
+
+    def error_received(self, exc):
+        pass # A viewer went away (ICMP port unreachable); its subscription runs out
+
+
+class ScoreboardClient(asyncio.DatagramProtocol):
+    """Viewer side: subscribes to a StateBroadcaster and keeps a copy of the state.
+
+    on_update(client) is called after every applied packet. `state` is None
+    until the first keyframe arrives; `received_at` is the monotonic time of
+    the last applied packet, and `unlock_at` when the cooldown it last
+    heard of runs out.
+    """
+
+    def __init__(self, on_update=None):
+        self.on_update = on_update
+        self.state = None
+        self.seq = -1
+        self.received_at = 0.0
+        self.unlock_at = 0.0
+        self.lag_s = 0.0 # Sender wall clock to arrival, meaningful when both clocks are in sync
+        self.gaps = 0 # Deltas that did not follow on from our state
+        self.transport = None
+        self.renew_task = None # Set by follow()
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.sendto(_request(HELLO))
+
+    def datagram_received(self, data, address):
+        try:
+            packet = json.loads(data)
+        except ValueError:
+            return
+        seq = packet.get("seq", -1)
+        if packet.get("key"):
+            if seq < self.seq:
+                return # Older than what we already have
+            self.state = packet["state"]
+        elif self.state is not None and packet.get("base") == self.seq:
+            # Built aside and swapped in, so a reader on another thread never sees half a delta
+            state = {**self.state, **packet["set"], "scores": list(self.state["scores"])}
+            for index, score in packet.get("scores", {}).items():
+                state["scores"][int(index)] = score
+            self.state = state
+        else:
+            if seq > self.seq:
+                self.gaps += 1
+                self.transport.sendto(_request(KEYFRAME_REQUEST))
+            return
+        self.seq = seq
+        self.received_at = time.monotonic()
+        if packet.get("key") or "cooldown_ms" in packet["set"]:
+            # Counted from arrival; a delta that leaves the cooldown out keeps the running countdown
+            self.unlock_at = self.received_at + self.state["cooldown_ms"] / 1000
+        self.lag_s = time.time() - packet.get("t", time.time())
+        if self.on_update is not None:
+            self.on_update(self)
+
+    def error_received(self, exc):
+        pass # The host is not up yet; the next hello tries again
+
+    def cooldown_left_s(self):
+        if self.state is None:
+            return 0.0
+        return max(0.0, self.unlock_at - time.monotonic())
+
+
+async def follow(host, port=BROADCAST_PORT, on_update=None, renew_interval=RENEW_INTERVAL):
+    """Subscribes a ScoreboardClient to host:port and keeps renewing it; returns the client once connected.
+
+    The subscription is renewed from a task on the running loop until the
+    client's transport is closed.
+    """
+    loop = asyncio.get_running_loop()
+    _, client = await loop.create_datagram_endpoint(lambda: ScoreboardClient(on_update), remote_addr=(host, port))
+
+    async def renew():
+        while not client.transport.is_closing():
+            await asyncio.sleep(renew_interval)
+            if not client.transport.is_closing():
+                client.transport.sendto(_request(HELLO))
+
+    client.renew_task = loop.create_task(renew())
+    return client
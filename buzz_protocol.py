@@ -0,0 +1,169 @@
+import struct
+from collections import deque
+
+# --- Binary Buzz Protocol ---
+# Frame layout sent by BuzzerV2.ino when BINARY_PROTOCOL is enabled (little endian):
+#   sync (0xA5) | kind | player | seq (u16) | micros (u32) | checksum
+# The checksum is the low byte of the sum of the 9 bytes before it.
+#
+# For clock synchronisation the host sends FRAME_PING with a ping id in the
+# player field; the board answers FRAME_PONG with the same id and its micros()
+# at the moment it replied.
+SYNC = 0xA5
+FRAME_PRESS = 0x01
+FRAME_RELEASE = 0x02
+FRAME_PING = 0x03
+FRAME_PONG = 0x04
+
+BINARY_BAUD_RATE = 115200
+
+_HEADER = struct.Struct("<BBBHI")
+FRAME_SIZE = _HEADER.size + 1 # 10 bytes
+
+
+def encode_frame(kind, player, seq, micros):
+    """Builds one frame, exactly as the sketch sends it."""
+    frame = bytearray(FRAME_SIZE)
+    _HEADER.pack_into(frame, 0, SYNC, kind, player, seq & 0xFFFF, micros & 0xFFFFFFFF)
+    frame[-1] = sum(frame) & 0xFF
+    return bytes(frame)
+
+
+class FrameDecoder:
+    """Incremental frame decoder over a reusable bytearray.
+
+    Incoming bytes are appended to a fixed buffer and frames are unpacked in
+    place with struct.unpack_from, so no per-frame slices are created. Garbage
+    (such as the ASCII banner the sketch prints at boot) and corrupted frames
+    are skipped by resynchronising on the next sync byte.
+    """
+
+    def __init__(self, capacity=4096):
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._start = 0 # First unread byte
+        self._end = 0 # One past the last buffered byte
+        self._last_seq = None
+        self.bad_frames = 0 # Frames rejected by the checksum
+        self.lost_frames = 0 # Frames missing according to the sequence numbers
+
+    def feed(self, data):
+        """Adds raw bytes and returns a list of (kind, player, seq, micros) tuples."""
+        n = len(data)
+        if self._end + n > len(self._buf):
+            self._compact(n)
+        self._view[self._end:self._end + n] = data
+        self._end += n
+        return self._decode()
+
+    def _compact(self, incoming):
+        pending = self._end - self._start
+        if pending + incoming > len(self._buf):
+            # Grow instead of dropping data; only happens if a caller feeds huge chunks
+            new_buf = bytearray(max(len(self._buf) * 2, pending + incoming))
+            new_buf[:pending] = self._view[self._start:self._end]
+            self._view.release()
+            self._buf = new_buf
+            self._view = memoryview(new_buf)
+        else:
+            self._view[:pending] = self._view[self._start:self._end]
+        self._start = 0
+        self._end = pending
+
+    def _decode(self):
+        frames = []
+        buf = self._buf
+        start = self._start
+        end = self._end
+        while end - start >= FRAME_SIZE:
+            if buf[start] != SYNC:
+                start = buf.find(SYNC, start + 1, end)
+                if start < 0:
+                    start = end # Nothing useful buffered
+                    break
+                continue
+            checksum = sum(self._view[start:start + FRAME_SIZE - 1]) & 0xFF
+            if checksum != buf[start + FRAME_SIZE - 1]:
+                self.bad_frames += 1
+                start += 1 # Resync on the next sync byte
+                continue
+            _, kind, player, seq, micros = _HEADER.unpack_from(buf, start)
+            if self._last_seq is not None:
+                self.lost_frames += (seq - self._last_seq - 1) & 0xFFFF
+            self._last_seq = seq
+            frames.append((kind, player, seq, micros))
+            start += FRAME_SIZE
+        if start == end:
+            start = end = 0 # Buffer drained, rewind for free
+        self._start = start
+        self._end = end
+        return frames
+
+
+class DeviceClock:
+    """Maps a device's 32-bit micros() counter onto the host's monotonic_ns clock.
+
+    A frame's (arrival - device time) is the clock offset plus the time the
+    frame spent in transit, so the smallest one in each BUCKET_NS of device
+    time is that stretch's best offset sample. The board's clock also drifts
+    (an Uno's resonator can be off by thousands of ppm, seconds per hour), so
+    a least-squares line through the last `window` bucket minima gives the
+    offset and how fast it moves. Until the minima span MIN_DRIFT_SPAN_NS the
+    newest bucket's minimum is used on its own. A mapped time is never later
+    than the frame's arrival. Counter wrap-around (every ~71 minutes) is
+    unwrapped so the result keeps increasing.
+    """
+
+    BUCKET_NS = 1_000_000_000
+    MIN_DRIFT_SPAN_NS = 10_000_000_000
+
+    def __init__(self, window=32):
+        self.minima = deque(maxlen=window) # [bucket, device ns, smallest offset ns], oldest first
+        self.drift = 0.0 # Offset change per device ns (-0.002 for a board running 2000 ppm slow)
+        self._ref_device = 0
+        self._ref_offset = 0.0
+        self._last_micros = None
+        self._wraps = 0
+
+    def device_ns(self, micros):
+        """Unwrapped device time in ns. Call it for every frame, in arrival order."""
+        if self._last_micros is not None and micros < self._last_micros - 0x80000000:
+            self._wraps += 1
+        self._last_micros = micros
+        return ((self._wraps << 32) + micros) * 1000
+
+    def to_host_ns(self, micros, arrival_ns):
+        device_ns = self.device_ns(micros)
+        offset = arrival_ns - device_ns
+        bucket = device_ns // self.BUCKET_NS
+        minima = self.minima
+        if minima and minima[-1][0] == bucket:
+            if offset < minima[-1][2]:
+                minima[-1][1] = device_ns
+                minima[-1][2] = offset
+                self._fit()
+        else:
+            minima.append([bucket, device_ns, offset])
+            self._fit()
+        host_ns = device_ns + round(self._ref_offset + self.drift * (device_ns - self._ref_device))
+        return min(host_ns, arrival_ns)
+
+    def _fit(self):
+        minima = self.minima
+        newest = minima[-1]
+        if newest[1] - minima[0][1] < self.MIN_DRIFT_SPAN_NS:
+            self.drift = 0.0
+            self._ref_device = newest[1]
+            self._ref_offset = newest[2]
+            return
+        # Relative to the newest sample so the sums stay small enough for floats
+        xs = [device_ns - newest[1] for _, device_ns, _ in minima]
+        ys = [offset - newest[2] for _, _, offset in minima]
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(ys) / len(ys)
+        variance = sum((x - mean_x) ** 2 for x in xs)
+        drift = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / variance
+        self.drift = drift
+        self._ref_device = newest[1]
+        # The line runs through the middle of the minima; lower it onto the fastest one, as the offset is
+        self._ref_offset = newest[2] + min(y - drift * x for x, y in zip(xs, ys))
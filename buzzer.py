@@ -1,156 +1,267 @@
+from startup import PROFILE_STARTUP, StartupTimeline  # First, so the startup timeline covers the imports
+timeline = StartupTimeline()
+
 import pygame
+import signal
+import sys
 import time
-import serial
-import threading
-from collections import deque
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from analytics import Analytics
+from arbiter import CONFLICT
+from assets import SoundLoader
+from audio import AudioScheduler
+from broadcast import StateBroadcaster
+from buzz_protocol import BINARY_BAUD_RATE
+from core import GameCore
+from discovery import DeviceFinder
+from frame_profiler import FrameProfiler
+from journal import Journal
+from latency import LatencyTracker
+from recording import InputRecorder, recording_path
+from scoreboard import COMMAND, ScoreboardProcess
+from serial_reader import FrameReader, SerialReader
+from shared_state import SharedScoreboard
+timeline.step("imports")
+
+# This script is the headless game core: it reads the buzzers, decides and plays
+# the sounds. The window is scoreboard.py in its own process, reading the state
+# from shared memory, so drawing can never delay a buzz.
 
 # --- CONFIG ---
-BUZZ_WINDOW = 0.5  # seconds
-PORT = 'COM8'
-BAUDRATE = 9600
+TIE_WINDOW = 0.05  # seconds; other players pressing this soon after the first press cause a conflict (every buzz waits this long)
+BUZZ_WINDOW = 0.5  # seconds; presses that wait longer than this in the inbox (a stalled loop) are dropped as stale
+COOLDOWN = 5  # seconds presses are ignored after a buzz or conflict
+CONFLICT_MESSAGE_TIME = 1  # seconds the conflict message stays on the scoreboard
+PORTS = ['COM8']  # Tried first after the last port that worked; every other port is probed too
+PROTOCOL = "text"  # "text" for PLAYER_n lines, "binary" for timestamped frames (buzz_protocol.py)
+NUM_PLAYERS = 3  # Players P1..Pn; each plays playerN.wav if that file exists
+BAUDRATE = 9600 if PROTOCOL == "text" else BINARY_BAUD_RATE
+JOURNAL_FILE = "buzzer_journal.jsonl"  # Every buzz, conflict and score change, replayed on start; delete to start over
+LATENCY_CSV = "buzzer_latency.csv"  # Per-stage buzz latency histograms, written at exit; F3 shows them on screen
+STATS_FILE = "buzzer_stats.bin"  # Reaction times, contested wins and conflicts of every round, kept across sessions
+STATS_CSV = "buzzer_stats.csv"  # Per-player statistics and the time-of-session trend, written at exit; F4 shows them
+PROFILE_PREFIX = "buzzer_profile"  # F5 shows where the core loop's time goes (the window shows its own); F6 captures to <prefix>_<time>.prof
+BROADCAST_PORT = None  # UDP port remote scoreboards (viewer.py) subscribe to, e.g. 5005; None keeps broadcasting off
+RECORD_PREFIX = "buzzer_input"  # Serial bytes and scoreboard keys go to <prefix>_<time>.bzin for replay.py; None turns it off
 
 # --- INIT ---
-pygame.init()
-pygame.mixer.init()
-
-# Sounds
-buzzer_sound = pygame.mixer.Sound("buzzer.wav")
-sounds = {
-    "P1": pygame.mixer.Sound("player1.wav"),
-    "P2": pygame.mixer.Sound("player2.wav"),
-    "P3": pygame.mixer.Sound("player3.wav"),
-}
-
-# GUI setup
-WIDTH, HEIGHT = 500, 400
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Multiplayer Buzzer & Scoreboard")
-font = pygame.font.SysFont(None, 48)
+# With no window there is no QUIT event: Ctrl+C and kill end the game cleanly (set before SDL claims SIGTERM)
+signal.signal(signal.SIGTERM, signal.default_int_handler)
 
 # Serial setup
-arduino = serial.Serial(PORT, BAUDRATE, timeout=1)
-time.sleep(2)  # wait for Arduino reset
+# Probes all ports at once and waits for the sketch's ready banner instead of a fixed 2 s sleep.
+# That takes about 1.5 s (the board resets when its port opens), so it runs while the rest starts up.
+device_finder = DeviceFinder(PORTS, BAUDRATE, read_timeout=1)
+def find_device():
+    with timeline.phase("device connect"):
+        return device_finder.find()
+device_search = ThreadPoolExecutor(max_workers=1).submit(find_device)
+
+pygame.mixer.init()  # Only sound here; the display lives in the scoreboard process
+timeline.step("audio init")
+
+audio = AudioScheduler(gap=0.5)  # Buzzer, then the player's clip 0.5 s later
+
+# Sounds are loaded in the background from a pre-converted cache (see assets.py)
+PLAYERS = [f"P{n}" for n in range(1, NUM_PLAYERS + 1)]
+sounds = SoundLoader({"buzzer": "buzzer.wav", **{f"P{n}": f"player{n}.wav" for n in range(1, NUM_PLAYERS + 1)}},
+                     timeline=timeline).start()
+
+# Inbox
+class StampedQueue(queue.Queue):
+    """A Queue whose get() returns (item, monotonic ns it was put).
+
+    The readers put a press right after it arrived, so how long it waited is
+    judged on the host clock, whatever a board's own clock says about it.
+    """
+
+    def _put(self, item):
+        super()._put((item, time.monotonic_ns()))
+
+# Scoreboard window
+WIDTH, HEIGHT = 500, 400
+inbox = StampedQueue()  # (player_key, monotonic ns) from the serial reader, (COMMAND, words) from the scoreboard
+board = SharedScoreboard()
+scoreboard = ScoreboardProcess(board.name, WIDTH, HEIGHT, "Multiplayer Buzzer & Scoreboard", PLAYERS, inbox)
+broadcaster = StateBroadcaster(BROADCAST_PORT).start()  # Deltas to remote scoreboards, sent from its own thread
+timeline.step("scoreboard spawn")  # The window starts up in its own process meanwhile
+
+port, arduino = device_search.result()
+timeline.step("waiting for the board")
+if arduino is None:
+    print("Error: no Arduino found. Check the connection and close the Arduino IDE Serial Monitor.")
+    scoreboard.stop()
+    board.close()
+    broadcaster.stop()
+    pygame.quit()
+    sys.exit(1)
+print(f"Connected to {port}")
 
 # State
-scores = {"P1": 0, "P2": 0, "P3": 0}
-last_player = None
-cooldown_active = False
-last_play_time = 0
-conflict_message = None
-trigger_lock = threading.Lock()
-buzz_queue = deque()
-
-# Draw scoreboard
-def draw_scores(message=None):
-    screen.fill((30, 30, 30))
-    y = 80
-    for player, score in scores.items():
-        color = (255, 255, 255) if player != last_player else (255, 215, 0)
-        label = font.render(f"{player}: {score}", True, color)
-        screen.blit(label, (50, y))
-        y += 60
-
-    if message:
-        msg = font.render(message, True, (255, 100, 100))
-        screen.blit(msg, (50, HEIGHT - 60))
-
-    pygame.display.flip()
-
-# Trigger player
-def trigger_player(player_key):
-    global cooldown_active, last_play_time, last_player
-    if not cooldown_active:
-        with trigger_lock:
-            print(f"{player_key} triggered!")
-            buzzer_sound.play()
-            time.sleep(0.5)
-            sounds[player_key].play()
-            last_player = player_key
-            cooldown_active = True
-            last_play_time = time.time()
-
-# Resolution logic
-def trigger_resolution_loop():
-    global cooldown_active, last_play_time, last_player, conflict_message
-    while True:
-        if len(buzz_queue) > 0:
-            now = time.time()
-            recent_buzzes = [(p, t) for p, t in buzz_queue if now - t <= BUZZ_WINDOW]
-            buzz_queue.clear()
-
-            if len(recent_buzzes) >= 2:
-                conflicted_players = [p for p, _ in recent_buzzes]
-                conflict_message = f"\u26a0\ufe0f Conflict: {' & '.join(conflicted_players)}"
-                print(conflict_message)
-                with trigger_lock:
-                    cooldown_active = True
-                    last_player = None
-                    last_play_time = time.time()
-                time.sleep(1)
-                conflict_message = None
-
-            elif len(recent_buzzes) == 1:
-                player_key, _ = recent_buzzes[0]
-                trigger_player(player_key)
-
-        time.sleep(0.05)
-
-# Poller class
-class ButtonPoller(threading.Thread):
-    def __init__(self, player_key, match_string):
-        super().__init__(daemon=True)
-        self.player_key = player_key
-        self.match_string = match_string
-
-    def run(self):
-        while True:
-            if arduino.in_waiting > 0 and not cooldown_active:
-                line = arduino.readline().decode('utf-8').strip()
-                if line == self.match_string:
-                    buzz_queue.append((self.player_key, time.time()))
-
-# Start pollers and resolver
-pollers = [
-    ButtonPoller("P1", "PLAYER_1"),
-    ButtonPoller("P2", "PLAYER_2"),
-    ButtonPoller("P3", "PLAYER_3"),
-]
-for p in pollers:
-    p.start()
-
-threading.Thread(target=trigger_resolution_loop, daemon=True).start()
+journal = Journal(JOURNAL_FILE)  # Written by a background thread, never blocks the game
+analytics = Analytics(PLAYERS, STATS_FILE).open()  # Fed by the core at the end of every decided round
+core = GameCore(PLAYERS, tie_window_ns=int(TIE_WINDOW * 1_000_000_000), cooldown_ns=COOLDOWN * 1_000_000_000,
+                message_ns=CONFLICT_MESSAGE_TIME * 1_000_000_000, journal=journal, analytics=analytics)
+core.restore_scores(journal.open())
+core.round_start_ns = time.monotonic_ns()
+profiler = FrameProfiler(("commands", "arbitration", "publish"), PROFILE_PREFIX)  # Time blocked on the inbox is "idle"
+
+# Keys pressed on the scoreboard, by pygame key name
+KEYBOARD_BUZZERS = {"i": "P1", "o": "P2", "u": "P3"}  # Stand-ins for the first three buzzers
+SCORE_KEYS = {"1": 10, "2": 5, "3": -10}
+
+# Input recording: the raw serial bytes and the scoreboard's keys, plus the rules replay.py needs
+recorder = None
+if RECORD_PREFIX:
+    recorder = InputRecorder(recording_path(RECORD_PREFIX)).open({
+        "script": "buzzer", "protocol": PROTOCOL, "players": PLAYERS,
+        "lines": [[f"PLAYER_{n}", f"P{n}"] for n in range(1, NUM_PLAYERS + 1)],
+        "player_map": [[n, f"P{n}"] for n in range(1, NUM_PLAYERS + 1)],
+        "tie_window_ns": core.arbiter.tie_window_ns, "cooldown_ns": core.arbiter.cooldown_ns,
+        "message_ns": core.message_ns, "keyboard_buzzers": KEYBOARD_BUZZERS, "score_keys": SCORE_KEYS,
+        "journal": JOURNAL_FILE,
+    })
+    recorder.start(core.round_start_ns, scores=list(core.scores.items()), journal_seq=journal.seq)
+latency = LatencyTracker()  # Decisions include the TIE_WINDOW wait; display is when the scoreboard showed it
+
+# Start the serial reader
+# One thread blocks on the port, reads every line exactly once and queues it by player.
+# If the board is unplugged it keeps probing until it is back.
+if PROTOCOL == "binary":
+    reader = FrameReader(arduino, inbox, {n: f"P{n}" for n in range(1, NUM_PLAYERS + 1)},
+                         reconnect=device_finder.wait_for_device, recorder=recorder)
+else:
+    reader = SerialReader(arduino, {f"PLAYER_{n}".encode(): f"P{n}" for n in range(1, NUM_PLAYERS + 1)}, inbox,
+                          reconnect=device_finder.wait_for_device, recorder=recorder)
+reader.start()
+timeline.step("game state")  # Journal replay, statistics, serial reader
+
+# Publish to the scoreboard and the remote scoreboards
+def publish(now_ns):
+    message = f"\u26a0\ufe0f Conflict: {' & '.join(core.conflict)}" if core.conflict else ""
+    overlay = ["\t".join(cells) for cells in latency.rows()] if latency.visible else []
+    if analytics.visible:
+        overlay += ["\t".join(cells) for cells in analytics.screen_rows()]
+        overlay.append(f"{len(analytics)} rounds, {analytics.session + 1} sessions")
+    if profiler.visible:
+        overlay += ["\t".join(cells) for cells in profiler.rows()]
+    broadcaster.publish(core, now_ns, message)  # Only hands the state over
+    return board.publish(core, now_ns, message, overlay)
+
+# Handle a decision
+def on_decision(decision, picked):
+    latency.begin(decision.t_ns)
+    latency.mark("arrival", picked.get(decision.t_ns))
+    latency.mark("decision")
+    if decision.kind == CONFLICT:
+        print(f"\u26a0\ufe0f Conflict: {' & '.join(decision.players)}")
+        audio.cancel()  # Drop any clip still queued from an earlier buzz
+    else:
+        print(f"{decision.player} triggered!")
+        running_stats = analytics.running[decision.player]  # This buzz is counted when the round ends
+        if running_stats.buzzes:
+            print(f"{decision.player} average: {running_stats.mean_ms:.0f} ms over {running_stats.buzzes} buzzes")
+        audio.play_sequence(sounds.get("buzzer"), sounds.get(decision.player))  # Returns at once
+        latency.mark("sound")
 
 # Main loop
+# Blocks on the inbox until the next press, scoreboard command or core deadline (tie window, cooldown, message)
+picked = {}  # Press time -> when the loop got it, for presses that can still win
+published_version = None
+display_seq = None  # Scoreboard state that first shows the latest decision
+startup_reported = False
 running = True
-while running:
-    draw_scores(conflict_message)
+try:
+    while running:
+        profiler.begin()
+        deadline = core.next_deadline()
+        timeout = None if deadline is None else max(0, (deadline - time.monotonic_ns()) / 1_000_000_000)
+        if profiler.visible:
+            timeout = 0.5 if timeout is None else min(timeout, 0.5)  # Wake up to refresh the breakdown
+        try:
+            item, queued_ns = inbox.get(timeout=timeout)
+        except queue.Empty:
+            item = None
+        now = time.monotonic_ns()
+        profiler.lap("idle")
 
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        elif event.type == pygame.KEYDOWN:
-            key = event.key
-            if key == pygame.K_ESCAPE:
+        press = None
+        if item is not None and item[0] is COMMAND:
+            words = item[1]
+            if words[0] == "quit":
                 running = False
+            elif words[0] == "shown":
+                if PROFILE_STARTUP and not startup_reported:
+                    timeline.mark("first scoreboard frame")
+                    timeline.report()
+                    startup_reported = True
+                if display_seq is not None and int(words[1]) >= display_seq:
+                    latency.mark("display")
+                    display_seq = None
+            elif words[0] == "key":
+                if recorder is not None:
+                    recorder.command(now, words)
+                name = words[1]
+                if name == "escape":
+                    running = False
+                elif name == "f3":
+                    latency.toggle()
+                    published_version = None  # Republish with or without the overlay
+                elif name == "f4":
+                    analytics.toggle()
+                    published_version = None
+                elif name == "f5":
+                    profiler.toggle()
+                    published_version = None
+                elif name == "f6":
+                    profiler.toggle_capture()
+                    published_version = None
+                elif name in KEYBOARD_BUZZERS:
+                    press = (KEYBOARD_BUZZERS[name], int(words[2]))
+                elif name in SCORE_KEYS:
+                    core.score(SCORE_KEYS[name])
+        elif item is not None:
+            press = item
+        profiler.lap("commands")
+
+        pressed = None
+        if press is not None and now - queued_ns > BUZZ_WINDOW * 1_000_000_000:
+            press = None  # Stale: it sat in the inbox while the loop was held up
+        if press is not None:
+            player_key, t = press
+            if not core.locked(t):
+                picked[t] = now
+            pressed = core.press(player_key, t)  # May settle the previous tie window
+        decision = core.poll(now)  # May settle the window this press opened
+        for settled in (pressed, decision):
+            if settled is not None:
+                on_decision(settled, picked)
+        if pressed is not None or decision is not None:
+            picked.clear()
+            decision = decision or pressed
+        profiler.lap("arbitration")
 
-            elif key == pygame.K_i:
-                buzz_queue.append(("P1", time.time()))
-            elif key == pygame.K_o:
-                buzz_queue.append(("P2", time.time()))
-            elif key == pygame.K_u:
-                buzz_queue.append(("P3", time.time()))
-
-            elif last_player:
-                if key == pygame.K_1:
-                    scores[last_player] += 10
-                elif key == pygame.K_2:
-                    scores[last_player] += 5
-                elif key == pygame.K_3:
-                    scores[last_player] -= 10
-
-    if cooldown_active and time.time() - last_play_time >= 5:
-        cooldown_active = False
-        last_player = None
+        if core.version != published_version or profiler.due():
+            seq = publish(now)
+            published_version = core.version
+            if decision is not None:
+                display_seq = seq
+        profiler.lap("publish")
+except KeyboardInterrupt:
+    pass
 
+profiler.stop()  # Writes out a capture still running
+journal.close()  # Writes whatever is still queued
+if recorder is not None:
+    recorder.close(journal_seq=journal.seq)
+core.finish()  # Counts the last round
+analytics.close()
+analytics.export_csv(STATS_CSV)
+scoreboard.stop()
+board.close()
+broadcaster.stop()
+latency.dump_csv(LATENCY_CSV)
+latency.print_summary()
 pygame.quit()
@@ -0,0 +1,169 @@
+"""The game's buzz and score state machine, with no display, sound or serial I/O.
+
+GameCore is driven by plain calls carrying time.monotonic_ns() timestamps, so
+the same rules run inside a pygame script, in a headless process that only
+publishes its state to the scoreboard (see shared_state.py and scoreboard.py),
+or in a benchmark with no SDL at all.
+"""
+from arbiter import CONFLICT, BuzzArbiter
+
+# Game states
+WAITING = "waiting" # Buzzers are live (or locked out until the cooldown ends)
+BUZZED = "buzzed" # A player won the buzz; scoring keys apply to them
+CONFLICT_SHOWN = "conflict" # Several players pressed inside the tie window
+
+
+class GameCore:
+    """Rounds, buzzes, conflicts and scores for one game.
+
+    players: player ids, in scoreboard order.
+    tie_window_ns / cooldown_ns: passed to the BuzzArbiter. With cooldown_ns
+        None a round ends only when next_round() is called (the host presses
+        ESC); otherwise the game goes back to WAITING on its own once the
+        cooldown after a buzz or conflict is over.
+    message_ns: how long a conflict stays on the scoreboard.
+    journal: optional Journal that gets every buzz, conflict, score and round.
+    analytics: optional Analytics that gets every decided round when it ends.
+
+    press() and poll() return the arbiter's Decision when one is reached.
+    `version` goes up on every change the scoreboard shows, so a renderer
+    only has to redraw when it moved. On frames where nothing changes,
+    poll() and next_deadline() keep nothing alive, so an hour-long session
+    sets off no garbage collections (measured by bench/bench_alloc.py).
+    """
+
+    __slots__ = ("players", "scores", "arbiter", "auto_rounds", "message_ns", "journal", "analytics", "state",
+                 "winner", "conflict", "reaction_ms", "round_start_ns", "version", "pressed", "_outcome",
+                 "_round_end_ns", "_message_end_ns")
+
+    def __init__(self, players, tie_window_ns=0, cooldown_ns=None, message_ns=0, journal=None, analytics=None):
+        self.players = list(players)
+        self.scores = {player: 0 for player in self.players}
+        self.arbiter = BuzzArbiter(tie_window_ns=tie_window_ns, cooldown_ns=cooldown_ns)
+        self.auto_rounds = cooldown_ns is not None
+        self.message_ns = message_ns
+        self.journal = journal
+        self.analytics = analytics
+        self.state = WAITING
+        self.winner = None # Player who buzzed, while scoring applies to them
+        self.conflict = () # Players in the conflict on screen
+        self.reaction_ms = 0.0 # From the start of the round to the winning press
+        self.round_start_ns = 0
+        self.version = 0
+        self.pressed = set() # Everyone who pressed this round, including presses the arbiter ignored
+        self._outcome = None # (winner or None, reaction_ms, conflict players) once the round is decided
+        self._round_end_ns = None # When an automatic round ends
+        self._message_end_ns = None
+
+    def restore_scores(self, scores):
+        """Takes over scores replayed from a journal, for the players of this game."""
+        for player, score in scores.items():
+            if player in self.scores:
+                self.scores[player] = score
+        self.version += 1
+
+    def locked(self, now_ns):
+        """True while presses are ignored (a decision stands or the cooldown runs)."""
+        return self.arbiter.is_locked(now_ns)
+
+    def press(self, player, t_ns):
+        if player not in self.scores:
+            return None
+        self._advance(t_ns)
+        self.pressed.add(player)
+        decision = self.arbiter.press(player, t_ns)
+        if decision is not None:
+            self._decide(decision)
+        return decision
+
+    def poll(self, now_ns):
+        """Settles an expired tie window and ends rounds and messages that are due."""
+        decision = self.arbiter.poll(now_ns)
+        if decision is not None:
+            self._decide(decision)
+        self._advance(now_ns)
+        return decision
+
+    def next_deadline(self):
+        """Monotonic ns at which poll() has work to do, or None."""
+        deadline = self.arbiter.next_deadline()
+        for t in (self._round_end_ns, self._message_end_ns):
+            if t is not None and (deadline is None or t < deadline):
+                deadline = t
+        return deadline
+
+    def score(self, delta):
+        """Adds `delta` to the player who buzzed. Returns False if nobody can be scored."""
+        if self.winner is None:
+            return False
+        self.scores[self.winner] += delta
+        self.version += 1
+        if self.journal is not None:
+            self.journal.record("score", player=self.winner, delta=delta, score=self.scores[self.winner])
+        return True
+
+    def next_round(self, now_ns, cooldown_ns=0):
+        """Starts a new round; presses count again after `cooldown_ns`."""
+        self._close_round()
+        self.state = WAITING
+        self.winner = None
+        self.conflict = ()
+        self.round_start_ns = now_ns
+        self._round_end_ns = None
+        self._message_end_ns = None
+        self.arbiter.reset(now_ns, cooldown_ns)
+        self.version += 1
+        if self.journal is not None:
+            self.journal.record("round")
+
+    def finish(self):
+        """Hands the round in progress to the analytics, if it was decided (call at exit)."""
+        self._close_round()
+
+    def _close_round(self):
+        if self._outcome is not None and self.analytics is not None:
+            winner, reaction_ms, conflict = self._outcome
+            self.analytics.record_round(winner, reaction_ms, self.pressed, conflict)
+        self._outcome = None
+        self.pressed.clear() # Reused every round; record_round() has already read it
+
+    def _decide(self, decision):
+        if decision.kind == CONFLICT:
+            self.state = CONFLICT_SHOWN
+            self.winner = None
+            self.conflict = decision.players
+            self._outcome = (None, 0.0, decision.players)
+            if self.message_ns:
+                # The conflict is known once the window closes; show it from then on
+                self._message_end_ns = decision.t_ns + self.arbiter.tie_window_ns + self.message_ns
+            if self.journal is not None:
+                self.journal.record("conflict", players=list(decision.players))
+        else:
+            self.state = BUZZED
+            self.winner = decision.player
+            self.conflict = ()
+            self.reaction_ms = (decision.t_ns - self.round_start_ns) / 1_000_000
+            self._outcome = (decision.player, self.reaction_ms, ())
+            if self.journal is not None:
+                self.journal.record("buzz", player=decision.player, reaction_ms=round(self.reaction_ms, 3))
+        if self.auto_rounds:
+            self._round_end_ns = self.arbiter.next_deadline() # The arbiter's unlock time
+        self.version += 1
+
+    def _advance(self, now_ns):
+        if self._message_end_ns is not None and now_ns >= self._message_end_ns:
+            self._message_end_ns = None
+            self.conflict = ()
+            self.version += 1
+        if self._round_end_ns is not None and now_ns >= self._round_end_ns:
+            # Buzzers are live again: same as the host starting a round, minus the arbiter reset.
+            # Reaction times count from the moment they went live, however late this call comes.
+            self._close_round()
+            self.round_start_ns = self._round_end_ns
+            self._round_end_ns = None
+            self.state = WAITING
+            self.winner = None
+            self.conflict = ()
+            self.version += 1
+            if self.journal is not None:
+                self.journal.record("round")
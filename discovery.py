@@ -0,0 +1,111 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import serial
+from serial.tools import list_ports
+
+BANNER = b"Arduino Button Detector Ready" # Printed by BuzzerV2.ino in setup()
+LAST_PORT_FILE = ".last_port"
+
+
+class DeviceFinder:
+    """Finds the buzzer board among the serial ports.
+
+    Candidates are the last port that worked, then the configured ports, then
+    every port the OS reports. They are all opened at once and a port only
+    counts once the sketch's banner is read from it (opening an Uno resets it,
+    so the banner arrives about 1.5 s later). The winning port is remembered in
+    LAST_PORT_FILE for the next start.
+
+    With scan_all=False and last_port_file=None only the configured ports are
+    probed, which is how each board of a multi-board game finds its own port.
+    """
+
+    def __init__(self, ports=(), baud_rate=9600, banner=BANNER, timeout=3.0, read_timeout=0.1, last_port_file=LAST_PORT_FILE, scan_all=True):
+        self.ports = list(ports)
+        self.baud_rate = baud_rate
+        self.banner = banner
+        self.timeout = timeout # Seconds to wait for the banner on each port
+        self.read_timeout = read_timeout # Timeout of the returned Serial object
+        self.last_port_file = last_port_file # None to not remember the port
+        self.scan_all = scan_all # Also probe every port the OS reports
+
+    def candidates(self):
+        ports = []
+        last_port = self._load_last_port()
+        if last_port:
+            ports.append(last_port)
+        ports.extend(self.ports)
+        if self.scan_all:
+            try:
+                ports.extend(info.device for info in list_ports.comports())
+            except OSError:
+                pass
+        return list(dict.fromkeys(ports)) # Drop duplicates, keep order
+
+    def find(self):
+        """Probes every candidate concurrently. Returns (port, Serial), or (None, None)."""
+        ports = self.candidates()
+        if not ports:
+            return None, None
+        found = threading.Event()
+        with ThreadPoolExecutor(max_workers=len(ports)) as pool:
+            results = list(pool.map(lambda port: self._probe(port, found), ports))
+        # Several ports could have answered at the same moment; keep the first in priority order
+        winner = None
+        for port, ser in zip(ports, results):
+            if ser is None:
+                continue
+            if winner is None:
+                winner = (port, ser)
+            else:
+                ser.close()
+        if winner is None:
+            return None, None
+        self._save_last_port(winner[0])
+        return winner
+
+    def wait_for_device(self, stop_event, retry_interval=1.0):
+        """Keeps probing until the board is back. Returns a Serial, or None if stopped."""
+        while not stop_event.is_set():
+            port, ser = self.find()
+            if ser is not None:
+                print(f"Reconnected to serial port {port}")
+                return ser
+            stop_event.wait(retry_interval)
+        return None
+
+    def _probe(self, port, found):
+        try:
+            ser = serial.Serial(port, self.baud_rate, timeout=self.read_timeout)
+        except (serial.SerialException, OSError, ValueError):
+            return None
+        deadline = time.monotonic() + self.timeout
+        try:
+            while time.monotonic() < deadline and not found.is_set():
+                if self.banner in ser.readline():
+                    found.set() # Lets the other probes give up early
+                    return ser
+        except (serial.SerialException, OSError):
+            pass
+        ser.close()
+        return None
+
+    def _load_last_port(self):
+        if self.last_port_file is None:
+            return None
+        try:
+            with open(self.last_port_file) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def _save_last_port(self, port):
+        if self.last_port_file is None:
+            return
+        try:
+            with open(self.last_port_file, "w") as f:
+                f.write(port)
+        except OSError:
+            pass
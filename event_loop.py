@@ -0,0 +1,67 @@
+import time
+
+import pygame
+
+# --- Custom Events ---
+# Posted by input threads and timers so the main loops can sleep in
+# pygame.event.wait() and still wake up the moment something happens.
+SERIAL_PRESS = pygame.event.custom_type() # A serial reader queued a press
+BUZZ_DECIDED = pygame.event.custom_type() # A background thread changed the game state
+COOLDOWN_EXPIRED = pygame.event.custom_type()
+CONFLICT_CLEARED = pygame.event.custom_type()
+STATE_RECEIVED = pygame.event.custom_type() # A remote scoreboard got a state update
+
+
+def post_event(event_type):
+    """Thread-safe wake-up for the main loop."""
+    pygame.event.post(pygame.event.Event(event_type))
+
+
+class EventLoop:
+    """Sleeps until there is something to do and limits how often the screen is redrawn.
+
+    wait() blocks in pygame.event.wait() until an event arrives (keyboard,
+    joystick, or one of the custom events above), a pending redraw is allowed
+    by the frame cap, or `idle_timeout_ms` passes. Input is handled as soon as
+    it wakes the loop; only drawing is held to `max_fps`.
+    """
+
+    __slots__ = ("min_frame_ns", "idle_timeout_ms", "dirty", "idle_ns", "_last_draw_ns")
+
+    def __init__(self, max_fps=60, idle_timeout_ms=1000):
+        self.min_frame_ns = 1_000_000_000 // max_fps
+        self.idle_timeout_ms = idle_timeout_ms
+        self.dirty = True # Draw the first frame
+        self.idle_ns = 0 # Time the last wait() slept, for FrameProfiler.lap()
+        self._last_draw_ns = 0
+
+    def wait(self, timeout_ms=None):
+        """Returns every pending event, sleeping first if there are none."""
+        timeout = self.idle_timeout_ms if timeout_ms is None else timeout_ms
+        if self.dirty:
+            next_frame_ms = (self._last_draw_ns + self.min_frame_ns - time.monotonic_ns()) // 1_000_000
+            timeout = min(timeout, max(0, next_frame_ms))
+        events = pygame.event.get()
+        self.idle_ns = 0
+        if not events and timeout > 0: # wait(0) would block forever
+            slept = time.perf_counter_ns()
+            first = pygame.event.wait(timeout)
+            self.idle_ns = time.perf_counter_ns() - slept
+            if first.type != pygame.NOEVENT:
+                events.append(first)
+                events.extend(pygame.event.get())
+        return events
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def should_draw(self):
+        """True if a redraw is pending and the frame cap allows it now."""
+        if not self.dirty:
+            return False
+        now = time.monotonic_ns()
+        if now - self._last_draw_ns < self.min_frame_ns:
+            return False
+        self.dirty = False
+        self._last_draw_ns = now
+        return True
@@ -0,0 +1,219 @@
+import math
+import os
+import pty
+import random
+import select
+import threading
+import time
+import tty
+
+from buzz_protocol import FRAME_PING, FRAME_PONG, FRAME_PRESS, FRAME_RELEASE, FrameDecoder, encode_frame
+
+BANNER = b"Arduino Button Detector Ready\r\nPress Player 1 (Pin 2) or Player 2 (Pin 4) button.\r\n"
+
+# Text-mode press lines: what BuzzerV2.ino prints, and what buzzer.py expects
+ARDUINO_LINE = b"Player %d pressed\r\n"
+BUZZER_LINE = b"PLAYER_%d\r\n"
+
+# Timing of BuzzerV2.ino's loop(), used to turn press traces into what the board sends
+LOOP_S = 0.00002 # One pass over the buttons
+REPEAT_S = 0.1 # Text mode: delay(100) after every printed line
+DEBOUNCE_S = 0.005 # Binary mode: DEBOUNCE_US
+TEXT_BAUD = 9600
+BINARY_BAUD = 115200
+
+
+class FakeBuzzer:
+    """A stand-in for the BuzzerV2 board on a pseudo-terminal (POSIX only).
+
+    `port` is a device path that serial.Serial() can open just like the real
+    board, so the Python hosts, the decoder and the benchmarks can run without
+    hardware. Writes go straight to the pty, in the format selected by `protocol`
+    ("binary" frames or the sketch's "text" lines, formatted with `line_format`).
+
+    The device clock can be skewed on purpose: it starts at `offset_us` and runs
+    `drift_ppm` fast (or slow, if negative) compared to the host. In binary mode
+    a background thread answers the host's pings like the sketch does.
+
+    play_trace() acts out a list of button presses the way the sketch would
+    report them, see sketch_schedule().
+    """
+
+    def __init__(self, protocol="binary", offset_us=0, drift_ppm=0.0, line_format=ARDUINO_LINE):
+        self.protocol = protocol
+        self.line_format = line_format
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave) # No newline translation or echo on the device side
+        self.port = os.ttyname(self.slave)
+        self.seq = 0
+        self.offset_us = offset_us
+        self.rate = 1.0 + drift_ppm / 1e6
+        self._t0_ns = time.monotonic_ns()
+        self._lock = threading.Lock() # Pongs and presses come from different threads
+        self._closed = threading.Event()
+        self._pinger = None
+        if protocol == "binary":
+            self._pinger = threading.Thread(target=self._answer_pings, daemon=True)
+            self._pinger.start()
+
+    def micros(self):
+        """The device clock, like Arduino micros() (wraps at 32 bits)."""
+        return self.micros_at(time.monotonic_ns())
+
+    def micros_at(self, host_ns):
+        """What micros() read, or will read, at the given host monotonic_ns time."""
+        return (int((host_ns - self._t0_ns) * self.rate) // 1000 + self.offset_us) & 0xFFFFFFFF
+
+    def send_banner(self):
+        self.write(BANNER)
+
+    def press(self, player, micros=None):
+        if self.protocol == "binary":
+            self.send(FRAME_PRESS, player, micros)
+        else:
+            self.write(self.line_format % player)
+
+    def release(self, player, micros=None):
+        if self.protocol == "binary": # The text protocol has no release message
+            self.send(FRAME_RELEASE, player, micros)
+
+    def send(self, kind, player, micros=None):
+        with self._lock:
+            self.write(self.frame(kind, player, micros))
+
+    def frame(self, kind, player, micros=None):
+        """Encodes the next frame without sending it (used to batch writes)."""
+        frame = encode_frame(kind, player, self.seq, self.micros() if micros is None else micros)
+        self.seq = (self.seq + 1) & 0xFFFF
+        return frame
+
+    def play_trace(self, trace, num_buttons=None, jitter=0.0, rng=None):
+        """Sends what the sketch would for `trace` (see sketch_schedule), in real time.
+
+        Every delivery is delayed by a random 0..`jitter` seconds on top of
+        the modelled wire time, without reordering (like a USB link). Blocks
+        until the last byte is sent and returns the host monotonic_ns time
+        that trace time 0 corresponds to.
+        """
+        rng = rng or random.Random()
+        schedule = sketch_schedule(trace, self.protocol, num_buttons, len(self.line_format % 1))
+        start_ns = time.monotonic_ns() + 1_000_000 # Leave time to get going
+        due_ns = start_ns
+        for deliver_s, edge_s, kind, player in schedule:
+            due_ns = max(due_ns, start_ns + int((deliver_s + rng.uniform(0, jitter)) * 1e9))
+            remaining = due_ns - time.monotonic_ns()
+            if remaining > 2_000_000:
+                time.sleep((remaining - 1_000_000) / 1e9) # Sleep most of the way, then spin
+            while time.monotonic_ns() < due_ns:
+                pass
+            if self.protocol == "binary":
+                self.send(kind, player, self.micros_at(start_ns + int(edge_s * 1e9)))
+            else:
+                self.write(self.line_format % player)
+        return start_ns
+
+    def write(self, data):
+        view = memoryview(data)
+        while view:
+            written = os.write(self.master, view)
+            view = view[written:]
+
+    def close(self):
+        self._closed.set()
+        if self._pinger is not None:
+            self._pinger.join() # Before the fds go: the next pty opened may get the same numbers
+        with self._lock:
+            os.close(self.master)
+            os.close(self.slave)
+
+    def _answer_pings(self):
+        decoder = FrameDecoder()
+        while not self._closed.is_set():
+            try:
+                readable, _, _ = select.select([self.master], [], [], 0.1)
+                if not readable:
+                    continue
+                data = os.read(self.master, 4096)
+            except (OSError, ValueError): # Closed under us
+                return
+            for kind, ping_id, _, _ in decoder.feed(data):
+                if kind == FRAME_PING:
+                    try:
+                        self.send(FRAME_PONG, ping_id)
+                    except OSError:
+                        return
+
+
+# --- Press Traces ---
+# A trace is a list of (start seconds, player, hold seconds) button presses.
+
+def load_trace(path):
+    """Reads a trace from a text file with one "start,player,hold" line per press ('#' starts a comment)."""
+    trace = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                start, player, hold = line.split(",")
+                trace.append((float(start), int(player), float(hold)))
+    return trace
+
+
+def sketch_schedule(trace, protocol="text", num_buttons=None, line_length=len(ARDUINO_LINE % 1)):
+    """What BuzzerV2.ino sends for a press trace.
+
+    Returns a list of (delivery seconds, edge seconds, kind, player), in
+    delivery order. Text mode follows the sketch's loop(): all buttons are
+    sampled at the top of the loop, then each held one prints a line and
+    delays 100 ms, in pin order; so a held button repeats every 100 ms and
+    holds up the others. Binary mode reports debounced press and release
+    edges on the next loop pass. Either way the bytes queue up on a serial
+    line at the sketch's baud rate.
+    """
+    if not trace:
+        return []
+    num_buttons = num_buttons or max(player for _, player, _ in trace)
+    if protocol == "binary":
+        edges = _binary_edges(trace)
+        wire_s = 10 * 10 / BINARY_BAUD # 10-byte frame, 10 bits per byte
+    else:
+        edges = _text_edges(trace, num_buttons)
+        wire_s = line_length * 10 / TEXT_BAUD
+    schedule = []
+    line_free = 0.0
+    for edge_s, kind, player in edges:
+        line_free = max(line_free, edge_s) + wire_s # Bytes go out one frame after another
+        schedule.append((line_free, edge_s, kind, player))
+    return schedule
+
+
+def _text_edges(trace, num_buttons):
+    starts = sorted(start for start, _, _ in trace)
+    end = max(start + hold for start, _, hold in trace)
+    held = lambda player, t: any(p == player and start <= t < start + hold for start, p, hold in trace)
+    edges = []
+    t = 0.0
+    while t < end:
+        down = [player for player in range(1, num_buttons + 1) if held(player, t)]
+        if not down:
+            upcoming = [start for start in starts if start > t]
+            if not upcoming:
+                break
+            t += math.ceil((upcoming[0] - t) / LOOP_S) * LOOP_S # Next pass that sees the press
+            continue
+        for player in down:
+            edges.append((t, FRAME_PRESS, player))
+            t += REPEAT_S
+        t += LOOP_S
+    return edges
+
+
+def _binary_edges(trace):
+    edges = []
+    for start, player, hold in trace:
+        pressed = math.ceil(start / LOOP_S) * LOOP_S
+        released = max(math.ceil((start + hold) / LOOP_S) * LOOP_S, pressed + DEBOUNCE_S)
+        edges.append((pressed, FRAME_PRESS, player))
+        edges.append((released, FRAME_RELEASE, player))
+    edges.sort(key=lambda edge: (edge[0], edge[2]))
+    return edges
@@ -0,0 +1,131 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from array import array
+
+# The last FRAMES iterations of a main loop are kept, about 10 s at 60 fps
+FRAMES = 600
+REFRESH_NS = 500_000_000 # The overlay's numbers are recomputed at most this often, so they stay readable
+
+
+class FrameProfiler:
+    """Times each phase of every main-loop iteration into fixed ring buffers.
+
+    Call begin() at the top of the loop and lap(phase) at the end of each
+    phase; a phase that did not run in an iteration counts as 0. lap() can
+    be given the time the loop slept inside the phase (EventLoop.idle_ns),
+    which is kept apart as "idle" so the breakdown only shows work. While
+    the overlay is hidden both calls return at once.
+
+    toggle_capture() starts or stops a cProfile capture of the thread that
+    calls it (the main loop); the results go to <prefix>_<time>.prof, for
+    snakeviz or pstats, and a .txt summary next to it.
+    """
+
+    def __init__(self, phases, prefix, frames=FRAMES):
+        self.phases = tuple(phases)
+        self.prefix = prefix
+        self.frames = frames
+        self.samples = {phase: array("q", bytes(8 * frames)) for phase in self.phases + ("idle",)} # ns per frame
+        self.count = 0 # Frames recorded since the overlay was last shown
+        self.visible = False # Whether the overlay is shown (and frames are timed)
+        self._slot = 0
+        self._last_ns = 0
+        self._capture = None # cProfile.Profile while capturing
+        self._rows = None
+        self._rows_ns = 0
+
+    def begin(self):
+        if not self.visible:
+            return
+        self._slot = self.count % self.frames
+        self.count += 1
+        for samples in self.samples.values():
+            samples[self._slot] = 0
+        self._last_ns = time.perf_counter_ns()
+
+    def lap(self, phase, idle_ns=0):
+        if not self.visible:
+            return
+        now = time.perf_counter_ns()
+        self.samples[phase][self._slot] += now - self._last_ns - idle_ns
+        if idle_ns:
+            self.samples["idle"][self._slot] += idle_ns
+        self._last_ns = now
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.count = 0 # Start a fresh window rather than mixing in frames from before
+        self._rows = None
+
+    def due(self):
+        """True if the overlay is shown and its numbers are ready to be refreshed."""
+        return self.visible and time.perf_counter_ns() - self._rows_ns >= REFRESH_NS
+
+    @property
+    def capturing(self):
+        return self._capture is not None
+
+    def toggle_capture(self):
+        """Starts a capture, or stops the running one and writes it out in the background."""
+        if self._capture is None:
+            self._capture = cProfile.Profile()
+            self._capture.enable()
+            print("Profiling the main loop; press the key again to stop.")
+            return
+        self._capture.disable()
+        path = f"{self.prefix}_{time.strftime('%Y%m%d-%H%M%S')}.prof"
+        threading.Thread(target=self._write_capture, args=(self._capture, path), daemon=True).start()
+        self._capture = None
+
+    def stop(self):
+        """Writes out a capture that is still running (call at exit)."""
+        if self._capture is not None:
+            self._capture.disable()
+            self._write_capture(self._capture, f"{self.prefix}_{time.strftime('%Y%m%d-%H%M%S')}.prof")
+            self._capture = None
+
+    def _write_capture(self, profile, path):
+        summary = io.StringIO()
+        try:
+            profile.dump_stats(path)
+            pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(30)
+            with open(path[:-len(".prof")] + ".txt", "w") as f:
+                f.write(summary.getvalue())
+        except OSError as e:
+            print(f"Warning: Could not write {path}: {e}")
+            return
+        print(f"Profile written to {path}")
+
+    def rows(self):
+        """Header plus one row per phase over the recorded frames: mean, p99 and max in ms, and share of the work."""
+        now = time.perf_counter_ns()
+        if self._rows is None or now - self._rows_ns >= REFRESH_NS:
+            self._rows = self._compute_rows()
+            self._rows_ns = now
+        if self.capturing:
+            return self._rows + [["capturing..."]]
+        return self._rows
+
+    def _compute_rows(self):
+        n = min(self.count, self.frames)
+        rows = [[f"{n} frames", "mean", "p99", "max", "%"]]
+        if not n:
+            return rows
+        work = sum(sum(samples[:n]) for phase, samples in self.samples.items() if phase != "idle") or 1
+        for phase, samples in self.samples.items():
+            ordered = sorted(samples[:n])
+            total = sum(ordered)
+            share = "" if phase == "idle" else f"{100 * total / work:.0f}"
+            rows.append([phase, f"{total / n / 1e6:.2f}", f"{ordered[min(n - 1, n * 99 // 100)] / 1e6:.2f}",
+                         f"{ordered[-1] / 1e6:.2f}", share])
+        return rows
+
+    def draw_overlay(self, renderer, font, color, x, y, row_height=16, column_width=50):
+        """Lists the overlay's cells on a DirtyRenderer, laid out like LatencyTracker.draw_overlay."""
+        for row, cells in enumerate(self.rows()):
+            renderer.text(cells[0], font, color, x, y + row * row_height)
+            for column, cell in enumerate(cells[1:]):
+                renderer.text(cell, font, color, x + 70 + column * column_width, y + row * row_height)
@@ -0,0 +1,82 @@
+import time
+from array import array
+
+import pygame
+
+MAX_BUTTONS = 32 # Buttons per controller that can be mapped
+
+
+class GamepadInput:
+    """Maps (joystick instance id, button) pairs to players for any number of controllers.
+
+    The mapping is a flat array('B') indexed by instance_id * MAX_BUTTONS + button
+    (0 means unmapped), so looking up a press costs the same with 1 or 16
+    controllers. Controllers plugged in mid-game are opened on JOYDEVICEADDED.
+
+    presses() stamps every JOYBUTTONDOWN with time.monotonic_ns() as soon as
+    the main loop picks it up. SDL only reads controllers while events are
+    pumped on the main thread, so the loop should wait with a short timeout
+    (POLL_INTERVAL_MS) while a buzz is possible; that pumps at a fixed ~1 kHz
+    and keeps every stamp within about a millisecond of the real press.
+    """
+
+    POLL_INTERVAL_MS = 1
+
+    def __init__(self, open_devices=True):
+        self.joysticks = {} # Instance id -> Joystick
+        self._table = array("B")
+        self._assigned = {} # Player -> (instance id, button)
+        if open_devices: # Only the button mapping is needed to replay a recording
+            for index in range(pygame.joystick.get_count()):
+                self._open(index)
+
+    def handle_device_event(self, event):
+        """Opens or forgets controllers on hotplug events. Returns True if the event was one."""
+        if event.type == pygame.JOYDEVICEADDED:
+            self._open(event.device_index)
+            return True
+        if event.type == pygame.JOYDEVICEREMOVED:
+            joystick = self.joysticks.pop(event.instance_id, None)
+            if joystick is not None:
+                print(f"Joystick disconnected: {joystick.get_name()}")
+            return True
+        return False
+
+    def presses(self, events):
+        """(instance id, button, t_ns) for every button press in `events`, in queue order."""
+        if not events:
+            return () # Most wake-ups while polling the controllers have nothing in them
+        t_ns = time.monotonic_ns()
+        return [(event.instance_id, event.button, t_ns) for event in events if event.type == pygame.JOYBUTTONDOWN]
+
+    def assign(self, player, instance_id, button):
+        """Maps a button to a player. Returns False if it already belongs to another player."""
+        if button >= MAX_BUTTONS:
+            return False
+        index = instance_id * MAX_BUTTONS + button
+        current = self._table[index] if index < len(self._table) else 0
+        if current and current != player:
+            return False
+        if index >= len(self._table):
+            self._table.extend(bytes(index + MAX_BUTTONS - len(self._table)))
+        previous = self._assigned.get(player)
+        if previous is not None:
+            self._table[previous[0] * MAX_BUTTONS + previous[1]] = 0
+        self._table[index] = player
+        self._assigned[player] = (instance_id, button)
+        return True
+
+    def player_for(self, instance_id, button):
+        """The player mapped to this button, or 0."""
+        index = instance_id * MAX_BUTTONS + button
+        if button >= MAX_BUTTONS or index >= len(self._table):
+            return 0
+        return self._table[index]
+
+    def _open(self, device_index):
+        joystick = pygame.joystick.Joystick(device_index)
+        joystick.init()
+        instance_id = joystick.get_instance_id()
+        if instance_id not in self.joysticks:
+            self.joysticks[instance_id] = joystick
+            print(f"Detected Joystick {instance_id}: {joystick.get_name()}")
@@ -0,0 +1,230 @@
+import json
+import os
+import threading
+import time
+
+SNAPSHOT_EVERY = 1000 # Events between snapshots
+RETRY_INTERVAL = 1.0 # Seconds before a batch that could not be written is tried again
+CLOSE_RETRIES = 3 # Further tries close() waits for before giving up on what is still queued
+
+
+class Journal:
+    """Append-only JSONL record of a game: round starts, buzzes, conflicts and score changes.
+
+    record() only stamps the event and queues it, so the game loop never waits
+    on the disk. A writer thread takes everything queued since its last pass,
+    writes it with one write() and makes it durable with one fsync(); while
+    that fsync runs, new events pile up for the next batch (group commit).
+
+    Every `snapshot_every` events the writer also saves the scores and the
+    journal offset they correspond to in `path + ".snapshot"` (written to a
+    temporary file and renamed, so it is always complete). open() starts from
+    the snapshot and replays only the events after it, so starting up stays
+    fast however long the tournament has run. Delete both files to start over.
+
+    A batch that cannot be written (disk full, drive unplugged) stays queued,
+    ahead of anything recorded since, and is tried again every RETRY_INTERVAL
+    on a reopened file, so the journal never gets a hole in its sequence.
+    close() gives up after CLOSE_RETRIES more tries.
+    """
+
+    def __init__(self, path, snapshot_every=SNAPSHOT_EVERY):
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.snapshot_every = snapshot_every
+        self.state = None # Scores and round count as of the last written event
+        self._seq = 0
+        self._offset = 0
+        self._pending = []
+        self._closing = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._file = None
+        self._warned = False
+
+    def open(self):
+        """Replays the journal and starts the writer. Returns the restored scores."""
+        self.state, self._seq, self._offset = replay(self.path, self.snapshot_path)
+        self._file = open(self.path, "ab")
+        self._file.truncate(self._offset) # Drop a line cut short by a crash (only ever the last one)
+        self._thread.start()
+        return dict(self.state["scores"])
+
+    @property
+    def seq(self):
+        """Sequence number of the last event recorded (or replayed by open())."""
+        return self._seq
+
+    def record(self, kind, **fields):
+        """Queues one event; never blocks on I/O."""
+        event = {"t": round(time.time(), 3), "type": kind, **fields}
+        with self._cond:
+            self._seq += 1
+            event["seq"] = self._seq
+            self._pending.append(event)
+            self._cond.notify()
+
+    def close(self):
+        """Writes everything still queued and stops the writer."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+        if self._file is not None:
+            self._file.close()
+
+    def _write_loop(self):
+        since_snapshot = 0
+        close_retries = CLOSE_RETRIES
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                batch = self._pending
+                self._pending = []
+                closing = self._closing
+            if batch:
+                data = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in batch).encode()
+                try:
+                    if self._file is None:
+                        self._reopen()
+                    self._file.write(data)
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                    self._offset += len(data)
+                except OSError as e:
+                    self._warn(e)
+                    self._discard_file()
+                    if closing:
+                        if close_retries == 0:
+                            return # Given up; open() cuts off a line the last try left torn
+                        close_retries -= 1
+                    with self._cond:
+                        self._pending[:0] = batch # Retried first, so the file stays in seq order
+                        self._cond.wait(RETRY_INTERVAL)
+                    continue
+                for event in batch:
+                    apply_event(self.state, event)
+                since_snapshot += len(batch)
+                if since_snapshot >= self.snapshot_every:
+                    self._write_snapshot(batch[-1]["seq"])
+                    since_snapshot = 0
+            if closing:
+                return
+
+    def _reopen(self):
+        self._file = open(self.path, "ab")
+        self._file.truncate(self._offset) # Whatever part of the failed batch did reach the disk
+
+    def _discard_file(self):
+        file, self._file = self._file, None
+        if file is not None:
+            try:
+                file.close() # May fail again flushing the buffered part of the batch; it is rewritten anyway
+            except OSError:
+                pass
+
+    def _write_snapshot(self, seq):
+        snapshot = {
+            "seq": seq,
+            "offset": self._offset,
+            "rounds": self.state["rounds"],
+            "scores": list(self.state["scores"].items()), # Pairs keep integer player ids intact
+        }
+        tmp_path = self.snapshot_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(snapshot, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            self._warn(e)
+
+    def _warn(self, e):
+        if not self._warned: # Once is enough; the game keeps running either way
+            print(f"Warning: Could not write the journal {self.path}: {e}")
+            self._warned = True
+
+
+def new_state():
+    return {"scores": {}, "rounds": 0}
+
+
+def apply_event(state, event):
+    """Updates the replayed state with one event."""
+    kind = event["type"]
+    if kind == "score":
+        state["scores"][event["player"]] = event["score"]
+    elif kind == "round":
+        state["rounds"] += 1
+
+
+def replay(path, snapshot_path=None):
+    """Rebuilds the state from the journal. Returns (state, last seq, offset of the last whole line)."""
+    snapshot = _load_snapshot(snapshot_path) if snapshot_path else None
+    if snapshot is not None:
+        result = _replay_from(path, snapshot)
+        if result is not None:
+            return result
+        print(f"Warning: {snapshot_path} does not match {path}, replaying it all")
+    return _replay_from(path, None)
+
+
+def _replay_from(path, snapshot):
+    state = new_state()
+    seq = offset = 0
+    if snapshot is not None:
+        state["rounds"] = snapshot["rounds"]
+        state["scores"] = {player: score for player, score in snapshot["scores"]}
+        seq = snapshot["seq"]
+        offset = snapshot["offset"]
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return (state, seq, offset) if snapshot is None else None
+    damaged = 0 # Unreadable lines and missing or repeated seqs, skipped
+    with f:
+        if snapshot is not None:
+            f.seek(offset)
+            if offset > os.fstat(f.fileno()).st_size:
+                return None # The journal was replaced or truncated under the snapshot
+        for line in f:
+            if not line.endswith(b"\n"):
+                break # Torn write at the end; the only part open() cuts off
+            offset += len(line)
+            try:
+                event = json.loads(line)
+                event_seq = event["seq"]
+            except (ValueError, KeyError, TypeError):
+                damaged += 1
+                continue
+            if snapshot is not None:
+                if event_seq != seq + 1:
+                    return None # Not the event the snapshot was taken before
+                snapshot = None
+            if event_seq <= seq:
+                damaged += 1 # Written twice
+                continue
+            if event_seq != seq + 1:
+                damaged += 1 # Later events are still good: scores are stored whole, not as changes
+            try:
+                apply_event(state, event)
+            except KeyError:
+                damaged += 1
+            seq = event_seq
+    if damaged:
+        print(f"Warning: {path} has {damaged} damaged or missing events; everything else was replayed")
+    return state, seq, offset
+
+
+def _load_snapshot(snapshot_path):
+    try:
+        with open(snapshot_path) as f:
+            snapshot = json.load(f)
+        if all(key in snapshot for key in ("seq", "offset", "rounds", "scores")):
+            return snapshot
+    except (OSError, ValueError):
+        pass
+    return None
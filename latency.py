@@ -0,0 +1,120 @@
+import csv
+import time
+from array import array
+
+# Stages of a buzz, each measured from the press's own timestamp (the board's
+# edge time with the binary protocol, otherwise when the press was read):
+#   arrival  - the game loop (or resolver thread) picked the press up
+#   decision - the arbiter declared the winner
+#   sound    - the buzzer sound was started
+#   display  - the display update showing the winner returned
+STAGES = ("arrival", "decision", "sound", "display")
+
+# Buckets: exact below 8 us, then 8 per power of two (at most ~12% wide) up to ~4.7 hours
+_SUB_BUCKETS = 8
+NUM_BUCKETS = 256
+
+
+def _bucket(us):
+    if us < _SUB_BUCKETS:
+        return max(0, us)
+    shift = us.bit_length() - 4
+    return min(NUM_BUCKETS - 1, (shift + 1) * _SUB_BUCKETS + ((us >> shift) & 7))
+
+
+def _bucket_upper_us(index):
+    """Exclusive upper bound of a bucket, in microseconds."""
+    if index < _SUB_BUCKETS:
+        return index + 1
+    shift = index // _SUB_BUCKETS - 1
+    return (_SUB_BUCKETS + index % _SUB_BUCKETS + 1) << shift
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram: record() is a few integer operations and never allocates."""
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * NUM_BUCKETS))
+        self.count = 0
+        self.max_us = 0
+
+    def record(self, ns):
+        us = ns // 1000
+        self.counts[_bucket(us)] += 1
+        self.count += 1
+        if us > self.max_us:
+            self.max_us = us
+
+    def percentile(self, q):
+        """Upper bound (us) of the bucket holding the q-th quantile, or 0 if empty."""
+        if not self.count:
+            return 0
+        target = max(1, round(q * self.count))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return min(_bucket_upper_us(index), self.max_us)
+        return self.max_us
+
+
+class LatencyTracker:
+    """Per-stage latency histograms for every buzz.
+
+    Call begin(t_ns) with the winning press's timestamp, then mark(stage) as
+    each stage happens. Each stage is recorded at most once per buzz, so
+    mark("display") can simply be called after every present().
+    """
+
+    def __init__(self, stages=STAGES):
+        self.histograms = {stage: LatencyHistogram() for stage in stages}
+        self.visible = False # Whether the overlay is shown
+        self._start_ns = 0
+        self._pending = ()
+
+    def begin(self, t_ns):
+        self._start_ns = t_ns
+        self._pending = set(self.histograms)
+
+    def mark(self, stage, now_ns=None):
+        if stage in self._pending:
+            self._pending.discard(stage)
+            self.histograms[stage].record((time.monotonic_ns() if now_ns is None else now_ns) - self._start_ns)
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def rows(self):
+        """Header plus one row per stage: count and p50/p90/p99/max in ms."""
+        rows = [["ms", "n", "p50", "p90", "p99", "max"]]
+        for stage, histogram in self.histograms.items():
+            p = histogram.percentile
+            rows.append([stage, str(histogram.count)] +
+                        [f"{us / 1000:.2f}" for us in (p(0.5), p(0.9), p(0.99), histogram.max_us)])
+        return rows
+
+    def draw_overlay(self, renderer, font, color, x, y, row_height=16, column_width=50):
+        """Lists the overlay's cells on a DirtyRenderer, one column per statistic."""
+        for row, cells in enumerate(self.rows()):
+            renderer.text(cells[0], font, color, x, y + row * row_height)
+            for column, cell in enumerate(cells[1:]):
+                renderer.text(cell, font, color, x + 70 + column * column_width, y + row * row_height)
+
+    def print_summary(self):
+        for cells in self.rows():
+            print(f"{cells[0]:<9}" + "".join(f"{cell:>8}" for cell in cells[1:]))
+
+    def dump_csv(self, path):
+        """Writes every non-empty bucket as stage, bucket upper bound (ms), count, cumulative fraction."""
+        try:
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["stage", "bucket_upper_ms", "count", "cumulative_fraction"])
+                for stage, histogram in self.histograms.items():
+                    seen = 0
+                    for index, n in enumerate(histogram.counts):
+                        if n:
+                            seen += n
+                            writer.writerow([stage, _bucket_upper_us(index) / 1000, n, round(seen / histogram.count, 6)])
+        except OSError as e:
+            print(f"Warning: Could not write {path}: {e}")
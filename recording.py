@@ -0,0 +1,144 @@
+"""Raw input capture, so a session can be replayed through the game core (see replay.py).
+
+A recording holds everything the game was given, as it arrived: every chunk
+read from the serial port with its arrival time, every key and controller
+button with the time the main loop picked it up, and, for buzzer.py, every
+command from the scoreboard window. The first record describes the script
+and its rules, a START record the scores and round start once the game core
+was set up, and an END record (missing after a crash) how the session ended.
+
+File layout: MAGIC, then records of kind (1 byte), t_ns (monotonic ns,
+8 bytes), payload length (4 bytes) and the payload. A record cut short by a
+crash is ignored when reading.
+"""
+import json
+import struct
+import threading
+import time
+
+MAGIC = b"BZIN\x01\x00\x00\x00"
+FLUSH_INTERVAL = 0.2 # Seconds between writes; a crash loses at most this much
+
+# Record kinds and their payloads
+META = 0 # JSON: script, protocol, players and rules (see the scripts' recorder.open() calls)
+START = 1 # JSON: scores and journal position when the game core was ready; t_ns is the round start
+SERIAL = 2 # Raw bytes of one read from the port
+KEY = 3 # pygame key name (UTF-8)
+JOY_BUTTON = 4 # Joystick instance id and button (_JOY_BUTTON)
+COMMAND = 5 # A scoreboard command line (buzzer.py), UTF-8 words separated by spaces
+END = 6 # JSON: journal position at exit
+
+_HEADER = struct.Struct("<BqI")
+_JOY_BUTTON = struct.Struct("<iH")
+
+
+class InputRecorder:
+    """Appends raw input to a recording from any thread without waiting on the disk.
+
+    Each call packs one record into a shared buffer under a lock (about a
+    microsecond); a writer thread hands the buffer to the file every
+    FLUSH_INTERVAL. If the file cannot be written, a warning is printed once
+    and the game carries on without recording.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._buffer = bytearray()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._file = None
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+
+    def open(self, meta):
+        try:
+            self._file = open(self.path, "wb")
+            self._file.write(MAGIC)
+        except OSError as e:
+            print(f"Warning: Could not record the input to {self.path}: {e}")
+            self._file = None
+            return self
+        self._add(META, time.monotonic_ns(), json.dumps(meta).encode())
+        self._thread.start()
+        return self
+
+    def start(self, t_ns, **fields):
+        self._add(START, t_ns, json.dumps(fields).encode())
+
+    def serial(self, t_ns, data):
+        self._add(SERIAL, t_ns, data)
+
+    def key(self, t_ns, name):
+        self._add(KEY, t_ns, name.encode())
+
+    def joy_button(self, t_ns, instance_id, button):
+        self._add(JOY_BUTTON, t_ns, _JOY_BUTTON.pack(instance_id, button))
+
+    def command(self, t_ns, words):
+        self._add(COMMAND, t_ns, " ".join(words).encode())
+
+    def close(self, **fields):
+        """Adds the END record with `fields`, writes whatever is still buffered and closes the file."""
+        self._add(END, time.monotonic_ns(), json.dumps(fields).encode())
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+        if self._file is not None:
+            self._file.close()
+
+    def _add(self, kind, t_ns, payload):
+        if self._file is None:
+            return
+        with self._cond:
+            self._buffer += _HEADER.pack(kind, t_ns, len(payload))
+            self._buffer += payload
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                if not self._closing:
+                    self._cond.wait(FLUSH_INTERVAL)
+                data = self._buffer
+                self._buffer = bytearray()
+                closing = self._closing
+            if data:
+                try:
+                    self._file.write(data)
+                    self._file.flush()
+                except OSError as e:
+                    print(f"Warning: Could not write the input recording {self.path}: {e}")
+                    failed, self._file = self._file, None # Later records are dropped
+                    try:
+                        failed.close()
+                    except OSError:
+                        pass
+                    return
+            if closing:
+                return
+
+
+def read_recording(path):
+    """Yields (kind, t_ns, payload) for every whole record in the file, in the order recorded."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not an input recording")
+    offset = len(MAGIC)
+    while offset + _HEADER.size <= len(data):
+        kind, t_ns, size = _HEADER.unpack_from(data, offset)
+        offset += _HEADER.size
+        if offset + size > len(data):
+            break # Cut short by a crash
+        yield kind, t_ns, data[offset:offset + size]
+        offset += size
+
+
+def decode_joy_button(payload):
+    """(instance id, button) of a JOY_BUTTON record."""
+    return _JOY_BUTTON.unpack(payload)
+
+
+def recording_path(prefix):
+    """A new file name for this session's recording, e.g. arduino_input_20250101-120000.bzin."""
+    return f"{prefix}_{time.strftime('%Y%m%d-%H%M%S')}.bzin"
@@ -0,0 +1,157 @@
+from collections import OrderedDict
+
+import pygame
+
+
+_UNSET = object()
+_NO_RECTS = () # What present() returns for a frame that changed nothing
+
+
+class Label:
+    """Text built from a format template, formatted again only when its value changes.
+
+    The main loops draw the same scores and timers every frame; a Label hands
+    back the same string object until the value moves, so an unchanged frame
+    builds no new strings (and DirtyRenderer can compare them by identity).
+    `scale` is applied when formatting, so e.g. a countdown can be passed in
+    whole tenths (a small int) and shown with {:.1f}.
+    """
+
+    __slots__ = ("template", "scale", "value", "text")
+
+    def __init__(self, template, scale=1):
+        self.template = template
+        self.scale = scale
+        self.value = _UNSET
+        self.text = ""
+
+    def format(self, value):
+        if value != self.value:
+            self.value = value
+            self.text = self.template.format(value * self.scale if self.scale != 1 else value)
+        return self.text
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces keyed by (text, font, color)."""
+
+    __slots__ = ("max_entries", "_surfaces")
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._surfaces = OrderedDict()
+
+    def render(self, text, font, color):
+        key = (text, font, color)
+        surface = self._surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self._surfaces[key] = surface
+            if len(self._surfaces) > self.max_entries:
+                self._surfaces.popitem(last=False) # Drop the least recently used entry
+        else:
+            self._surfaces.move_to_end(key)
+        return surface
+
+
+class DirtyRenderer:
+    """Draws a screen made of text items and only pushes what changed.
+
+    Each frame the caller lists what should be on screen:
+
+        renderer.begin()
+        renderer.text("Player 1 Score: 10", font, WHITE, 50, 50)
+        ...
+        renderer.present()
+
+    present() compares the list with the previous frame, repaints just the
+    rectangles of items that appeared, disappeared or changed, and hands those
+    to pygame.display.update(). An unchanged frame costs no drawing at all,
+    and allocates nothing: items equal to the previous frame's reuse its tuples.
+    """
+
+    __slots__ = ("surface", "background", "cache", "_items", "_previous", "_changed", "_drawn", "_full_redraw")
+
+    def __init__(self, surface, background, cache=None):
+        self.surface = surface
+        self.background = background
+        self.cache = cache if cache is not None else TextCache()
+        self._items = []
+        self._previous = [] # Last frame's items; the two lists swap every frame
+        self._changed = False # An item differs from the previous frame's at the same position
+        self._drawn = {} # Items on screen -> (surface, rect)
+        self._full_redraw = True
+
+    def begin(self):
+        self._items, self._previous = self._previous, self._items
+        self._items.clear()
+        self._changed = False
+
+    def text(self, text, font, color, x, y):
+        index = len(self._items)
+        if index < len(self._previous):
+            item = self._previous[index]
+            if item[0] == text and item[1] is font and item[2] == color and item[3] == x and item[4] == y:
+                self._items.append(item)
+                return
+        self._items.append((text, font, color, x, y))
+        self._changed = True
+
+    def invalidate(self):
+        """Forces a full repaint on the next present() (e.g. after drawing outside the renderer)."""
+        self._full_redraw = True
+
+    def present(self):
+        """Updates the display and returns the list of rectangles that were pushed."""
+        if not (self._changed or self._full_redraw or len(self._items) != len(self._previous)):
+            return _NO_RECTS
+        current = {}
+        for item in self._items:
+            if item not in current:
+                text, font, color, x, y = item
+                rendered = self.cache.render(text, font, color)
+                current[item] = (rendered, rendered.get_rect(topleft=(x, y)))
+
+        if self._full_redraw:
+            self.surface.fill(self.background)
+            for rendered, rect in current.values():
+                self.surface.blit(rendered, rect)
+            pygame.display.flip()
+            self._full_redraw = False
+            self._drawn = current
+            return [self.surface.get_rect()]
+
+        dirty = [rect for item, (_, rect) in self._drawn.items() if item not in current]
+        dirty.extend(rect for item, (_, rect) in current.items() if item not in self._drawn)
+        self._drawn = current
+        if not dirty:
+            return dirty
+
+        # Repaint each dirty area clipped to itself, so overlapping antialiased text
+        # outside it is never blended twice
+        for area in dirty:
+            self.surface.set_clip(area)
+            self.surface.fill(self.background)
+            for rendered, rect in current.values():
+                if rect.colliderect(area):
+                    self.surface.blit(rendered, rect)
+        self.surface.set_clip(None)
+        pygame.display.update(dirty)
+        return dirty
+
+
+def score_grid(labels, fonts, left, top, width, height):
+    """Lays out one line per label in columns that fill the given area.
+
+    `fonts` is a list of (font, row height), largest first; the first one
+    whose widest label fits its column is used (the last one regardless).
+    Returns (font, [(x, y) of each label]). Measure with the widest score
+    expected (e.g. "Player 1: -0000") so the layout does not jump as scores change.
+    """
+    for font, row_height in fonts:
+        rows = max(1, height // row_height)
+        columns = max(1, -(-len(labels) // rows))
+        step = width // columns
+        if font is fonts[-1][0] or max((font.size(label)[0] for label in labels), default=0) < step:
+            break
+    return font, [(left + i // rows * step, top + i % rows * row_height) for i in range(len(labels))]
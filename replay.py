@@ -0,0 +1,274 @@
+"""Replays an input recording (see recording.py) through the game core, for auditing a disputed round.
+
+Every recorded serial chunk is decoded by the same reader code as live
+(SerialReader / FrameReader.feed), and every press, key and button goes to a
+GameCore with the recorded rules, handled the way the recording script
+handles it. Each buzz, conflict, score change and new round is printed with
+its time in the session.
+
+    python replay.py <recording.bzin> [--realtime] [--check]
+
+By default the recording is replayed as fast as possible; --realtime keeps
+the recorded pace. --check compares the replayed events with the ones the
+live game wrote to its journal and exits with status 1 on a difference, so
+recordings double as regression tests for the arbitration and scoring code.
+
+Inputs are replayed in timestamp order. Live, Arduino_Final.py handles a
+frame's keys before the serial presses it picked up, so a key and a press
+landing in the same frame can come out in the other order. Presses buzzer.py
+dropped because its loop stalled for over BUZZ_WINDOW are replayed as normal.
+"""
+import json
+import os
+import queue
+import sys
+import time
+
+from core import BUZZED, WAITING, GameCore
+from gamepad_input import GamepadInput
+from recording import COMMAND, END, JOY_BUTTON, KEY, META, SERIAL, START, decode_joy_button, read_recording
+from serial_reader import FrameReader, SerialReader
+
+SCORE_KEYS = {"f": 10, "g": 5, "h": -10} # Arduino_Final.py and Gamepad_Final.py
+
+
+class EventLog:
+    """Stands in for the Journal: keeps what the core records, stamped with the replay time."""
+
+    def __init__(self):
+        self.events = []
+        self.now_ns = 0
+
+    def record(self, kind, **fields):
+        self.events.append((self.now_ns, {"type": kind, **fields}))
+
+
+class Session:
+    """A recorded game being replayed. Subclasses handle the keys and buttons of each script."""
+
+    def __init__(self, meta):
+        self.meta = meta
+        self.log = EventLog()
+        self.core = None # Set up by the START record, as the script set up its own
+        self.start_ns = None # When the game core was ready; event times are printed from here
+        self.running = True # Cleared when the recording shows the host quitting
+        self.end = None # Fields of the END record, if the session ended cleanly
+        self.presses = queue.Queue()
+        self.reader = None
+        if meta.get("protocol") == "binary":
+            player_map = None if meta.get("player_map") is None else {n: player for n, player in meta["player_map"]}
+            self.reader = FrameReader(None, self.presses, player_map)
+        elif "lines" in meta:
+            self.reader = SerialReader(None, {line.encode(): player for line, player in meta["lines"]}, self.presses)
+
+    def handle(self, kind, t_ns, payload):
+        self.log.now_ns = t_ns
+        if kind == START:
+            self.start(t_ns, json.loads(payload))
+        elif kind == END:
+            self.end = json.loads(payload)
+            if self.core is not None:
+                self._poll_until(t_ns) # A tie window that ran out after the last input
+            return
+        if self.core is not None:
+            self._poll_until(t_ns) # Tie windows and cooldowns that ran out before this input
+        if kind == SERIAL and self.reader is not None:
+            self.reader.feed(payload, t_ns)
+        elif kind == KEY:
+            self.key(t_ns, payload.decode())
+        elif kind == JOY_BUTTON:
+            self.button(t_ns, *decode_joy_button(payload))
+        elif kind == COMMAND:
+            self.command(t_ns, payload.decode().split())
+        if self.core is not None:
+            while not self.presses.empty(): # Presses read before the core existed wait for it, as live
+                self.press(*self.presses.get_nowait())
+            self.core.poll(t_ns)
+
+    def start(self, t_ns, fields):
+        meta = self.meta
+        self.core = GameCore(meta["players"], tie_window_ns=meta["tie_window_ns"], cooldown_ns=meta["cooldown_ns"],
+                             message_ns=meta.get("message_ns", 0), journal=self.log)
+        self.core.restore_scores({player: score for player, score in fields["scores"]})
+        self.core.round_start_ns = t_ns
+        self.start_ns = t_ns
+
+    def _poll_until(self, t_ns):
+        deadline = self.core.next_deadline()
+        while deadline is not None and deadline <= t_ns:
+            self.log.now_ns = deadline
+            self.core.poll(deadline)
+            following = self.core.next_deadline()
+            if following == deadline:
+                break
+            deadline = following
+        self.log.now_ns = t_ns
+
+    def press(self, player, t_ns):
+        self.core.press(player, t_ns)
+
+    def key(self, t_ns, name):
+        pass
+
+    def button(self, t_ns, instance_id, button):
+        pass
+
+    def command(self, t_ns, words):
+        pass
+
+
+class ArduinoSession(Session):
+    """Arduino_Final.py: F/G/H score and ESC starts the next round once someone buzzed, P quits."""
+
+    def key(self, t_ns, name):
+        if name == "p":
+            self.running = False
+        elif self.core is not None and self.core.state == BUZZED:
+            if name in SCORE_KEYS:
+                self.core.score(SCORE_KEYS[name])
+            elif name == "escape":
+                self.core.next_round(t_ns)
+
+
+class GamepadSession(Session):
+    """Gamepad_Final.py: buttons are mapped to players first, then buzz after a cooldown."""
+
+    def __init__(self, meta):
+        super().__init__(meta)
+        self.gamepads = GamepadInput(open_devices=False)
+        self.mapping = True
+        self.mapping_player = 1
+        self.last_buzz_time = 0
+
+    def button(self, t_ns, instance_id, button):
+        core = self.core
+        if self.mapping:
+            if self.gamepads.assign(self.mapping_player, instance_id, button):
+                self.mapping_player += 1
+                if self.mapping_player > len(core.players):
+                    self.mapping = False
+                    core.round_start_ns = t_ns
+        elif core.state == WAITING:
+            if t_ns - self.last_buzz_time > self.meta["cooldown_ms"] * 1_000_000:
+                player = self.gamepads.player_for(instance_id, button)
+                decision = core.press(player, t_ns) if player else None
+                if decision is not None:
+                    self.last_buzz_time = decision.t_ns
+        elif core.state == BUZZED:
+            core.press(self.gamepads.player_for(instance_id, button), t_ns)
+
+    def key(self, t_ns, name):
+        core = self.core
+        if name == "escape":
+            if not self.mapping and core.state == BUZZED:
+                self.last_buzz_time = 0
+                core.next_round(t_ns)
+        elif not self.mapping and core.state == BUZZED:
+            if name in SCORE_KEYS:
+                core.score(SCORE_KEYS[name])
+        elif name == "p":
+            self.running = False
+
+
+class BuzzerSession(Session):
+    """buzzer.py: keys come from the scoreboard window; rounds end on their own after the cooldown."""
+
+    def command(self, t_ns, words):
+        if words[0] != "key" or self.core is None:
+            return
+        name = words[1]
+        if name == "escape":
+            self.running = False
+        elif name in self.meta["keyboard_buzzers"]:
+            self.press(self.meta["keyboard_buzzers"][name], int(words[2])) # The scoreboard's own timestamp
+        elif name in self.meta["score_keys"]:
+            self.core.score(self.meta["score_keys"][name])
+
+
+SESSIONS = {"arduino": ArduinoSession, "gamepad": GamepadSession, "buzzer": BuzzerSession}
+
+
+def replay_recording(path, realtime=False):
+    """Replays a recording; returns the Session, with the replayed events in session.log.events."""
+    records = read_recording(path)
+    kind, t_ns, payload = next(records, (None, 0, b""))
+    if kind != META:
+        raise ValueError(f"{path} has no description of the game")
+    meta = json.loads(payload)
+    session = SESSIONS[meta["script"]](meta)
+    first_ns = t_ns
+    wall_start = time.monotonic()
+    for kind, t_ns, payload in records:
+        if realtime:
+            delay = wall_start + (t_ns - first_ns) / 1e9 - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        session.handle(kind, t_ns, payload)
+        if not session.running:
+            break
+    return session
+
+
+def journal_events(path, after_seq, until_seq=None):
+    """The journal's events with a seq after `after_seq` (up to `until_seq`), without their time and seq."""
+    events = []
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue # Torn write at the end, or a damaged line the journal also skips
+            if event["seq"] > after_seq and (until_seq is None or event["seq"] <= until_seq):
+                del event["t"], event["seq"]
+                events.append(event)
+    return events
+
+
+def describe(event):
+    fields = " ".join(f"{key}={value}" for key, value in event.items() if key != "type")
+    return f"{event['type']} {fields}".rstrip()
+
+
+def main(args):
+    paths = [arg for arg in args if not arg.startswith("--")]
+    if len(paths) != 1:
+        print(__doc__)
+        return 2
+    path = paths[0]
+    started = time.perf_counter()
+    session = replay_recording(path, realtime="--realtime" in args)
+    took = time.perf_counter() - started
+    start_ns = session.start_ns or 0
+
+    replayed = []
+    for t_ns, event in session.log.events:
+        event = json.loads(json.dumps(event)) # Same types as read back from a journal (tuples become lists)
+        replayed.append(event)
+        print(f"{(t_ns - start_ns) / 1e9:10.3f} s  {describe(event)}")
+    if session.core is not None:
+        print("Final scores: " + ", ".join(f"{player}: {score}" for player, score in session.core.scores.items()))
+    print(f"{len(replayed)} events replayed in {took:.2f} s")
+
+    if "--check" not in args:
+        return 0
+    journal_path = os.path.join(os.path.dirname(path), session.meta["journal"])
+    start = next((json.loads(payload) for kind, _, payload in read_recording(path) if kind == START), None)
+    if start is None:
+        print("The recording ends before the game started; nothing to check.")
+        return 1
+    live = journal_events(journal_path, start["journal_seq"], session.end["journal_seq"] if session.end else None)
+    if session.end is None:
+        live = live[:len(replayed)] # Crashed: the recording may have lost its last moments
+    for index, (expected, got) in enumerate(zip(live, replayed)):
+        if expected != got:
+            print(f"Difference at event {index + 1}: journal has {describe(expected)}, replay gave {describe(got)}")
+            return 1
+    if len(live) != len(replayed):
+        print(f"The journal has {len(live)} events for this session, the replay {len(replayed)}")
+        return 1
+    print(f"Matches the {len(live)} events in {journal_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,79 @@
+"""Runs several quiz rooms at once for a tournament, without any window.
+
+Every room has its own board(s), arbitration, scores, journal and remote
+scoreboard port (viewer.py <host> <port>); the rooms are spread over WORKERS
+processes (see rooms.py). Buzzes and conflicts are printed here; the host
+scores and moves rooms on by typing commands:
+
+    <room> score <points>    e.g. "room1 score 10" for the player who buzzed
+    <room> next              start a new round (rooms without a COOLDOWN)
+    quit
+"""
+import sys
+import threading
+
+from rooms import RoomHost
+
+# --- CONFIG ---
+# One entry per room: a name (no spaces) and its boards as (port, protocol, player map).
+# Text boards map the sketch's lines to player ids, binary boards their player numbers.
+TEXT_PLAYERS = {b"Player 1 pressed": 1, b"Player 2 pressed": 2} # BuzzerV2.ino
+ROOMS = [
+    {"name": "room1", "devices": [("/dev/ttyACM0", "text", TEXT_PLAYERS)]},
+    {"name": "room2", "devices": [("/dev/ttyACM1", "text", TEXT_PLAYERS)]},
+]
+WORKERS = 2 # Processes the rooms are spread over; about one per CPU core
+BUZZ_WINDOW = 0 # seconds; presses this close to the first one are a conflict (0: first press wins)
+COOLDOWN = 5 # seconds presses are ignored after a buzz; None to wait for "<room> next"
+CONFLICT_MESSAGE_TIME = 1 # seconds a conflict stays on the remote scoreboards
+BROADCAST_BASE_PORT = None # Room n broadcasts on this port + n - 1 (e.g. 5005); None keeps broadcasting off
+
+
+def room_config(index, room):
+    """The room's Room arguments: the settings above, then whatever the entry sets itself."""
+    return {
+        "tie_window_ns": int(BUZZ_WINDOW * 1_000_000_000),
+        "cooldown_ns": None if COOLDOWN is None else int(COOLDOWN * 1_000_000_000),
+        "message_ns": int(CONFLICT_MESSAGE_TIME * 1_000_000_000),
+        "journal_file": f"{room['name']}_journal.jsonl", # Scores survive a restart, as in the other scripts
+        "stats_file": f"{room['name']}_stats.bin",
+        "broadcast_port": None if BROADCAST_BASE_PORT is None else BROADCAST_BASE_PORT + index,
+        **room,
+    }
+
+
+def read_commands(host, quit_event):
+    names = {room["name"] for room in ROOMS}
+    for line in sys.stdin:
+        words = line.split()
+        if words == ["quit"]:
+            break
+        if len(words) < 2 or words[0] not in names:
+            print(f"Unknown command: {line.strip()}")
+            continue
+        host.send(words[0], *words[1:])
+    quit_event.set()
+
+
+# Worker processes import this file again where they are spawned (Windows, macOS)
+if __name__ == "__main__":
+    host = RoomHost([room_config(i, room) for i, room in enumerate(ROOMS)], WORKERS).start()
+    quit_event = threading.Event()
+    print(f"{len(ROOMS)} rooms in {host.workers} worker processes. Commands: <room> score <points>, <room> next, quit")
+    threading.Thread(target=read_commands, args=(host, quit_event), daemon=True).start()
+    try:
+        while not quit_event.is_set():
+            for kind, room, fields in host.events(timeout=0.2):
+                if kind == "buzz":
+                    print(f"[{room}] Player {fields['player']} buzzed first ({fields['reaction_ms']:.0f} ms)")
+                elif kind == "conflict":
+                    print(f"[{room}] Conflict: {' & '.join(map(str, fields['players']))}")
+                elif kind == "score":
+                    print(f"[{room}] Player {fields['player']} score: {fields['score']}")
+                elif kind in ("connected", "disconnected"):
+                    print(f"[{room}] Board {fields['port']} {kind}")
+                elif kind == "exit":
+                    print("A worker process exited.")
+    except KeyboardInterrupt:
+        pass
+    host.stop() # The rooms write their journals and statistics
@@ -0,0 +1,386 @@
+"""Many quiz rooms in one process, and many processes for a tournament.
+
+A Room is one game: a GameCore with its own buzzer board(s), scores, journal,
+statistics and remote scoreboard port. Rooms have no thread or window of
+their own; they run on an asyncio loop that wakes them when a board has
+bytes (loop.add_reader on the serial port) or when their core has a
+deadline due (tie window, cooldown, conflict message; loop.call_at). So a
+room that nobody is pressing in costs nothing, and one loop serves many.
+
+RoomHost spreads the rooms over worker processes, each running one loop
+(run_worker), forwards host commands to them and collects their events.
+See room_host.py.
+"""
+import asyncio
+import multiprocessing
+import signal
+import threading
+import time
+from multiprocessing.connection import wait
+
+import serial
+
+from analytics import Analytics
+from arbiter import CONFLICT
+from broadcast import StateBroadcaster
+from buzz_protocol import BINARY_BAUD_RATE, FRAME_PRESS, DeviceClock, FrameDecoder
+from core import GameCore
+from journal import Journal
+from serial_reader import FrameReader, LineIngest, SerialReader
+
+RECONNECT_INTERVAL = 1.0 # Seconds between attempts to reopen a board that went away
+QUIT = "quit"
+
+
+class RoomDevice:
+    """One buzzer board of a room, read on the room's event loop.
+
+    protocol "text": `player_map` maps press lines (bytes, no line ending) to
+    player ids, as for SerialReader. "binary": it maps the board's player
+    numbers to player ids. Where the loop cannot watch a serial port (Windows)
+    the board gets the usual reader thread, which hands presses to the loop.
+    """
+
+    def __init__(self, room, port, protocol, player_map, hold_timeout_ns=None):
+        self.room = room
+        self.port = port
+        self.protocol = protocol
+        self.player_map = player_map
+        self.hold_timeout_ns = hold_timeout_ns
+        self.baud_rate = 9600 if protocol == "text" else BINARY_BAUD_RATE
+        self.ser = None
+        self.connected = False
+        self.ingest = None
+        self.decoder = None
+        self.clock = None
+        self._loop = None
+        self._thread = None
+        self._closed = False
+
+    def open(self, loop):
+        if self._closed:
+            return # A reconnect attempt that was still scheduled
+        self._loop = loop
+        try:
+            self.ser = serial.Serial(self.port, self.baud_rate, timeout=0)
+        except (serial.SerialException, OSError) as e:
+            print(f"[{self.room.name}] Could not open {self.port}: {e}")
+            loop.call_later(RECONNECT_INTERVAL, self.open, loop)
+            return
+        self.reset_stream()
+        try:
+            loop.add_reader(self.ser.fileno(), self._readable)
+        except (AttributeError, NotImplementedError): # No file descriptor, or a loop without add_reader
+            self._start_thread()
+        self.connected = True
+        self.room.on_event("connected", self.room.name, port=self.port)
+
+    def reset_stream(self):
+        if self.protocol == "text":
+            self.ingest = LineIngest(self.player_map, self.hold_timeout_ns)
+        else:
+            self.decoder = FrameDecoder()
+            self.clock = DeviceClock()
+
+    def close(self):
+        self._closed = True
+        if self._thread is not None:
+            self._thread.stop()
+            self._thread.join(timeout=1)
+            self.ser = self._thread.ser # May have been replaced by a reconnect
+            self._thread = None
+        elif self.connected:
+            self._loop.remove_reader(self.ser.fileno())
+        self.connected = False
+        if self.ser is not None:
+            self.ser.close()
+
+    def _readable(self):
+        try:
+            data = self.ser.read(self.ser.in_waiting or 1)
+        except (serial.SerialException, OSError) as e:
+            self._lost(e)
+            return
+        t_ns = time.monotonic_ns() # Stamp before any decoding work
+        if not data:
+            return
+        if self.ingest is not None:
+            for player in self.ingest.feed(data, t_ns):
+                self.room.press(player, t_ns)
+            return
+        for kind, player, seq, micros in self.decoder.feed(data):
+            press_ns = self.clock.to_host_ns(micros, t_ns) # Every frame keeps the clock's wrap tracking current
+            if kind == FRAME_PRESS and player in self.player_map:
+                self.room.press(self.player_map[player], press_ns)
+
+    def _lost(self, e):
+        print(f"[{self.room.name}] Serial read error on {self.port}: {e}")
+        self._loop.remove_reader(self.ser.fileno())
+        self.connected = False
+        self.ser.close()
+        self.room.on_event("disconnected", self.room.name, port=self.port)
+        self._loop.call_later(RECONNECT_INTERVAL, self.open, self._loop)
+
+    # --- Reader thread fallback ---
+
+    def _start_thread(self):
+        self.ser.timeout = 0.1 # The thread blocks on the port
+        presses = _LoopPresses(self._loop, self.room)
+        if self.protocol == "text":
+            self._thread = SerialReader(self.ser, self.player_map, presses, reconnect=self._wait_for_port,
+                                        hold_timeout_ns=self.hold_timeout_ns)
+        else:
+            self._thread = FrameReader(self.ser, presses, self.player_map, reconnect=self._wait_for_port)
+        self._thread.start()
+
+    def _wait_for_port(self, stop_event):
+        while not stop_event.wait(RECONNECT_INTERVAL):
+            try:
+                return serial.Serial(self.port, self.baud_rate, timeout=0.1)
+            except (serial.SerialException, OSError):
+                pass
+        return None
+
+
+class _LoopPresses:
+    """Stands in for the reader threads' queue: hands every press to the room on its loop."""
+
+    def __init__(self, loop, room):
+        self.loop = loop
+        self.room = room
+
+    def put(self, item):
+        self.loop.call_soon_threadsafe(self.room.press, *item)
+
+
+class Room:
+    """One quiz room: a GameCore fed by its own boards, on the running asyncio loop.
+
+    devices: (port, protocol, player_map) per board, see RoomDevice; the
+        room's players are the map's player ids, in order.
+    tie_window_ns / cooldown_ns / message_ns: as for GameCore. With a
+        cooldown the rounds run on their own; otherwise the host sends "next".
+    hold_timeout_ns: held-button repeat filter of the text protocol (LineIngest).
+    journal_file / stats_file / broadcast_port: optional Journal, Analytics
+        and StateBroadcaster for the room (None to do without).
+    on_event(kind, room_name, **fields) is called for every buzz, conflict,
+        score and board connection change.
+
+    start() must be awaited on the loop; press() and command() are then
+    called from it.
+    """
+
+    def __init__(self, name, devices, tie_window_ns=0, cooldown_ns=None, message_ns=0, hold_timeout_ns=None,
+                 journal_file=None, stats_file=None, broadcast_port=None, on_event=None):
+        players = list(dict.fromkeys(player for _, _, player_map in devices for player in player_map.values()))
+        self.name = name
+        self.journal = Journal(journal_file) if journal_file else None
+        self.analytics = Analytics(players, stats_file) if stats_file else None
+        self.core = GameCore(players, tie_window_ns=tie_window_ns, cooldown_ns=cooldown_ns, message_ns=message_ns,
+                             journal=self.journal, analytics=self.analytics)
+        self.devices = [RoomDevice(self, port, protocol, player_map, hold_timeout_ns)
+                        for port, protocol, player_map in devices]
+        self.broadcaster = StateBroadcaster(broadcast_port) if broadcast_port is not None else None
+        self.on_event = on_event or (lambda kind, room, **fields: None)
+        self.loop = None
+        self._deadline = None # Core deadline the timer is set for
+        self._timer = None
+        self._published_version = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        if self.journal is not None:
+            self.core.restore_scores(self.journal.open())
+        if self.analytics is not None:
+            self.analytics.open()
+        if self.broadcaster is not None:
+            try:
+                await self.broadcaster.serve()
+            except OSError as e:
+                print(f"[{self.name}] Warning: Could not open the scoreboard broadcast port {self.broadcaster.port}: {e}")
+        self.core.round_start_ns = time.monotonic_ns()
+        for device in self.devices:
+            device.open(self.loop)
+        self._changed()
+
+    def press(self, player, t_ns):
+        decision = self.core.press(player, t_ns)
+        if decision is not None:
+            self._decided(decision)
+        self._changed()
+
+    def command(self, words):
+        """Host commands: ["score", "<points>"] for the player who buzzed, ["next"] for a new round."""
+        if words[0] == "score" and len(words) == 2:
+            if self.core.score(int(words[1])):
+                self.on_event("score", self.name, player=self.core.winner, score=self.core.scores[self.core.winner])
+        elif words[0] == "next":
+            self.core.next_round(time.monotonic_ns())
+        self._changed()
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        for device in self.devices:
+            device.close()
+        if self.broadcaster is not None:
+            self.broadcaster.stop()
+        self.core.finish() # Counts the last round
+        if self.journal is not None:
+            self.journal.close() # Writes whatever is still queued
+        if self.analytics is not None:
+            self.analytics.close()
+
+    def _on_deadline(self):
+        self._timer = None
+        self._deadline = None
+        decision = self.core.poll(time.monotonic_ns())
+        if decision is not None:
+            self._decided(decision)
+        self._changed()
+
+    def _decided(self, decision):
+        decided_ns = time.monotonic_ns()
+        if decision.kind == CONFLICT:
+            self.on_event("conflict", self.name, players=list(decision.players), t_ns=decision.t_ns, decided_ns=decided_ns)
+        else:
+            self.on_event("buzz", self.name, player=decision.player, reaction_ms=round(self.core.reaction_ms, 3),
+                          t_ns=decision.t_ns, decided_ns=decided_ns)
+
+    def _changed(self):
+        # Wake up for the core's next deadline; asyncio's clock is time.monotonic(), like the core's
+        deadline = self.core.next_deadline()
+        if deadline != self._deadline:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._deadline = deadline
+            self._timer = None if deadline is None else self.loop.call_at(deadline / 1e9, self._on_deadline)
+        if self.broadcaster is not None and self.core.version != self._published_version:
+            message = f"Conflict: {' & '.join(map(str, self.core.conflict))}" if self.core.conflict else ""
+            self.broadcaster.publish(self.core, time.monotonic_ns(), message) # Only hands the state over
+            self._published_version = self.core.version
+
+
+# --- Worker processes ---
+
+def run_worker(configs, commands, events):
+    """Worker process: serves the rooms in `configs` (Room keyword arguments) on one loop.
+
+    Commands arrive on `commands` as (room name, words) until (None, ["quit"]);
+    events go out on `events` as (kind, room name, fields), starting with
+    ("ready", None, {"rooms": [...]}) once every room has started.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # Ctrl+C is for the host, which then tells us to quit
+    asyncio.run(_serve(configs, commands, events))
+
+
+async def _serve(configs, commands, events):
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def on_event(kind, room, **fields):
+        events.send((kind, room, fields))
+
+    rooms = {config["name"]: Room(**config, on_event=on_event) for config in configs}
+    for room in rooms.values():
+        await room.start()
+    events.send(("ready", None, {"rooms": list(rooms)}))
+
+    def dispatch(room, words):
+        if words == [QUIT]:
+            if not done.done():
+                done.set_result(None)
+        elif room in rooms:
+            rooms[room].command(words)
+
+    def relay(): # The pipe is read on a thread of its own: a loop cannot watch it on every platform
+        while True:
+            try:
+                room, words = commands.recv()
+            except (EOFError, OSError): # The host is gone
+                room, words = None, [QUIT]
+            loop.call_soon_threadsafe(dispatch, room, words)
+            if words == [QUIT]:
+                return
+
+    threading.Thread(target=relay, daemon=True).start()
+    await done
+    for room in rooms.values():
+        room.close()
+
+
+class RoomHost:
+    """Runs `rooms` (Room keyword arguments, each with a distinct "name") in `workers` processes.
+
+    Rooms are dealt out round robin. start() returns once every room is up;
+    send() forwards a command to a room; events() returns the (kind, room,
+    fields) events that came in, waiting up to `timeout` for the first one.
+    A worker that exits unexpectedly shows up as an ("exit", None, {}) event.
+    """
+
+    def __init__(self, rooms, workers=1):
+        self.rooms = list(rooms)
+        self.workers = max(1, min(workers, len(self.rooms)))
+        self.processes = []
+        self._commands = {} # Room name -> its worker's command pipe
+        self._pipes = [] # Every worker's command pipe
+        self._events = [] # Event pipes of the running workers
+        self._backlog = []
+
+    def start(self):
+        for i in range(self.workers):
+            configs = self.rooms[i::self.workers]
+            commands_in, commands_out = multiprocessing.Pipe(duplex=False)
+            events_in, events_out = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=run_worker, args=(configs, commands_in, events_out), daemon=True)
+            process.start()
+            commands_in.close() # The worker's ends; ours are closed so EOF is seen when either side exits
+            events_out.close()
+            self.processes.append(process)
+            self._pipes.append(commands_out)
+            self._events.append(events_in)
+            for config in configs:
+                self._commands[config["name"]] = commands_out
+        waiting = len(self._events)
+        while waiting:
+            for event in self._receive(None):
+                if event[0] in ("ready", "exit"):
+                    waiting -= 1
+                else:
+                    self._backlog.append(event) # A room got a press before its neighbours started
+        return self
+
+    def send(self, room, *words):
+        self._commands[room].send((room, list(words)))
+
+    def events(self, timeout=None):
+        if self._backlog:
+            events, self._backlog = self._backlog, []
+            return events
+        return self._receive(timeout)
+
+    def stop(self, timeout=5):
+        for pipe in self._pipes:
+            try:
+                pipe.send((None, [QUIT]))
+            except OSError:
+                pass # That worker is already gone
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+
+    def _receive(self, timeout):
+        if not self._events:
+            return [] # Every worker has exited
+        events = []
+        for pipe in wait(self._events, timeout):
+            try:
+                while True:
+                    events.append(pipe.recv())
+                    if not pipe.poll():
+                        break
+            except EOFError:
+                self._events.remove(pipe)
+                events.append(("exit", None, {}))
+        return events
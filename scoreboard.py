@@ -0,0 +1,153 @@
+"""Scoreboard window for a headless game core (used by buzzer.py).
+
+The window runs in its own process so drawing, font rendering and its GC
+pauses can never delay buzz handling. It reads the game state from the
+shared block (see shared_state.py) and redraws when its sequence counter
+moves. F5 and F6 profile this window's own loop (see frame_profiler.py).
+Keys go back to the core as lines on stdout:
+
+    key <pygame key name> <monotonic ns>   a key was pressed
+    shown <seq>                            a frame showing state <seq> was presented
+    quit                                   the window was closed
+
+Run by ScoreboardProcess as:
+    python scoreboard.py <shared memory name> <width> <height> <title> <player names...>
+"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pygame
+
+from event_loop import EventLoop, post_event
+from frame_profiler import FrameProfiler
+from render import DirtyRenderer, score_grid
+from shared_state import ScoreboardReader
+
+MAX_FPS = 60
+PROFILE_PREFIX = "scoreboard_profile" # F6 captures are written to <prefix>_<time>.prof
+
+COMMAND = object() # Marks the scoreboard's entries in the core's inbox
+
+
+class ScoreboardProcess:
+    """Starts the scoreboard as a child process and relays its commands into `inbox`.
+
+    Commands arrive as (COMMAND, words) tuples, e.g. (COMMAND, ["key", "i", "123"]).
+    """
+
+    def __init__(self, shm_name, width, height, title, names, inbox):
+        env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1") # Keep stdout for commands
+        self.process = subprocess.Popen(
+            [sys.executable, "-u", os.path.abspath(__file__), shm_name, str(width), str(height), title, *names],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, env=env)
+        self.inbox = inbox
+        threading.Thread(target=self._relay, daemon=True).start()
+
+    def _relay(self):
+        for line in self.process.stdout:
+            words = line.split()
+            if words:
+                self.inbox.put((COMMAND, words))
+        self.inbox.put((COMMAND, ["quit"])) # The window is gone
+
+    def stop(self):
+        self.process.stdin.close() # The window closes itself when its stdin ends
+        if self.process.poll() is None:
+            self.process.terminate()
+        try:
+            self.process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+def watch_core():
+    """Closes the window once the core's end of stdin is gone, even if the core crashed."""
+    for _ in sys.stdin:
+        pass
+    post_event(pygame.QUIT)
+
+
+def send(line):
+    sys.stdout.write(line + "\n")
+    sys.stdout.flush()
+
+
+def main(shm_name, width, height, title, names):
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((width, height))
+    pygame.display.set_caption(title)
+    font = pygame.font.SysFont(None, 48)
+    small_font = pygame.font.SysFont(None, 20)
+    # Columns of up to five lines; smaller lines in more rows when that is too wide for the window
+    score_font, score_positions = score_grid([f"{name}: -0000" for name in names],
+                                             [(font, 60), (pygame.font.SysFont(None, 28), 24), (small_font, 16)],
+                                             50, 20, width - 50, min(300, height - 100))
+    renderer = DirtyRenderer(screen, (30, 30, 30))
+    board = ScoreboardReader(shm_name)
+    threading.Thread(target=watch_core, daemon=True).start()
+
+    # Wake up at the frame rate to look at the counter; reading it costs nanoseconds
+    event_loop = EventLoop(max_fps=MAX_FPS, idle_timeout_ms=1000 // MAX_FPS)
+    profiler = FrameProfiler(("events", "read", "draw", "present"), PROFILE_PREFIX)
+    shown_seq = None
+    running = True
+    while running:
+        profiler.begin()
+        events = event_loop.wait()
+        profiler.lap("events", event_loop.idle_ns)
+        for event in events:
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                renderer.invalidate()
+                event_loop.mark_dirty()
+            elif event.type == pygame.KEYDOWN:
+                send(f"key {pygame.key.name(event.key).replace(' ', '_')} {time.monotonic_ns()}")
+                if event.key == pygame.K_F5: # The core gets these too, and profiles its own loop
+                    profiler.toggle()
+                elif event.key == pygame.K_F6:
+                    profiler.toggle_capture()
+
+        if board.seq() != shown_seq or profiler.due():
+            event_loop.mark_dirty()
+        if not event_loop.should_draw():
+            continue
+
+        state = board.read()
+        profiler.lap("read")
+        renderer.begin()
+        for i, (name, score) in enumerate(zip(names, state.scores)):
+            color = (255, 215, 0) if i + 1 == state.winner else (255, 255, 255)
+            x, y = score_positions[i]
+            renderer.text(f"{name}: {score}", score_font, color, x, y)
+        if state.message:
+            renderer.text(state.message, font, (255, 100, 100), 50, height - 60)
+        rows = [line.split("\t") for line in state.overlay] # Tab-separated cells, laid out like LatencyTracker.draw_overlay
+        left = width - 80 - 50 * max(map(len, rows), default=0) # Right-aligned, however many columns
+        for row, cells in enumerate(rows):
+            for column, cell in enumerate(cells):
+                renderer.text(cell, small_font, (200, 200, 200), left + (column and 20 + column * 50), 10 + row * 16)
+        if profiler.visible:
+            profiler.draw_overlay(renderer, small_font, (200, 200, 200), width - 330, height - 120)
+        profiler.lap("draw")
+        renderer.present()
+        profiler.lap("present")
+        if state.seq != shown_seq:
+            shown_seq = state.seq
+            send(f"shown {state.seq}")
+
+    profiler.stop()
+    board.close()
+    try:
+        send("quit")
+    except OSError:
+        pass # The core is already gone
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4], sys.argv[5:])
@@ -0,0 +1,235 @@
+import abc
+import queue
+import threading
+import time
+
+import serial
+
+from buzz_protocol import FRAME_PRESS, DeviceClock, FrameDecoder
+
+# While a button is held, the text sketch prints its line again after every
+# pass, and each printed line costs a delay(100) plus ~20 ms on the wire. With
+# n buttons held a line therefore repeats about every n * REPEAT_NS.
+REPEAT_NS = 120_000_000
+MAX_LINE = 256 # Bytes kept without a line ending before the buffer is treated as noise
+
+
+class LineIngest:
+    """Turns bulk reads of the text protocol into press edges.
+
+    feed(data, t_ns) appends a chunk to a reusable buffer and returns the
+    players whose button went down in it. Every line in a chunk shares the
+    chunk's timestamp, so only a player's first line in it can be a new
+    press: feed() looks each known line up once per chunk with bytes.find
+    (anchored on the previous line ending, so lines match exactly) instead
+    of splitting and decoding line by line. Lines end in "\\n" or "\\r\\n".
+
+    A line for a player whose previous line came less than `hold_timeout_ns`
+    ago is the sketch repeating a held button and is dropped; the button
+    counts as released once the repeats stop. So a held or stuck button makes
+    one press, not ten a second. With hold_timeout_ns=0 every line is a press.
+    """
+
+    def __init__(self, line_map, hold_timeout_ns=None):
+        self.line_map = line_map
+        self._needles = [(b"\n" + line + b"\r\n", b"\n" + line + b"\n", player) for line, player in line_map.items()]
+        self._exact = {**line_map, **{line + b"\r": player for line, player in line_map.items()}}
+        if hold_timeout_ns is None:
+            hold_timeout_ns = (len(set(line_map.values())) + 0.5) * REPEAT_NS # Every button held, plus slack
+        self.hold_timeout_ns = hold_timeout_ns
+        self.buffer = bytearray(b"\n") # Always starts with the previous line ending
+        self.last_seen = {} # Player -> t_ns of their latest line
+        self.lines = 0 # Complete lines seen
+        self.dropped = 0 # Lines that were not a new press (repeats, banners, noise)
+        self._presses = [] # Reused result list
+        self._found = []
+
+    def feed(self, data, t_ns):
+        """Adds a chunk stamped `t_ns`; returns the players whose button went down, in line order.
+
+        The returned list is reused by the next call.
+        """
+        buf = self.buffer
+        buf += data
+        presses = self._presses
+        presses.clear()
+        end = buf.rfind(b"\n") + 1 # Complete lines end here
+        if end <= 1:
+            if len(buf) > MAX_LINE:
+                buf[:] = b"\n" # Line noise (e.g. the wrong baud rate); resynchronise on the next line ending
+            return presses
+        lines = buf.count(b"\n", 1, end)
+        if self.hold_timeout_ns > 0:
+            found = self._found
+            found.clear()
+            find = buf.find
+            for crlf, lf, player in self._needles:
+                at = find(crlf, 0, end)
+                at_lf = find(lf, 0, end)
+                if at < 0 or 0 <= at_lf < at:
+                    at = at_lf
+                if at >= 0:
+                    found.append((at, player))
+            found.sort()
+            for _, player in found:
+                last = self.last_seen.get(player)
+                self.last_seen[player] = t_ns
+                if last is None or t_ns - last >= self.hold_timeout_ns:
+                    presses.append(player)
+        else:
+            get = self._exact.get
+            for line in bytes(buf[1:end - 1]).split(b"\n"):
+                player = get(line)
+                if player is not None:
+                    presses.append(player)
+        self.lines += lines
+        self.dropped += lines - len(presses)
+        del buf[:end - 1] # Keep the last line ending as the anchor
+        return presses
+
+    def held(self, now_ns):
+        """Players whose button is still down, judging by the repeats."""
+        return [player for player, t_ns in self.last_seen.items() if now_ns - t_ns < self.hold_timeout_ns]
+
+    def reset(self):
+        self.buffer[:] = b"\n"
+        self.last_seen.clear()
+
+
+class _ReaderThread(threading.Thread, abc.ABC):
+    """Shared plumbing for the serial reader threads.
+
+    read_once() blocks on the port for at most its read timeout and passes
+    what it read, stamped on arrival, to feed(), which subclasses implement
+    to decode it and hand (player, t_ns) records to put_press(). The optional
+    `notify` callable is invoked after every queued press and whenever the
+    connection state changes, e.g. to wake an event loop that is sleeping.
+
+    If `reconnect` is given and the port fails (board unplugged), the thread
+    calls reconnect(stop_event) to get a new Serial object and carries on;
+    `connected` is False meanwhile. Without it, the thread stops and sets `error`.
+
+    With a `recorder` (recording.InputRecorder) every chunk read is also
+    recorded with its arrival time. feed() decodes a chunk as if it had just
+    been read, which is how replay.py puts a recording through the same code.
+    """
+
+    def __init__(self, ser, presses=None, notify=None, reconnect=None, recorder=None):
+        super().__init__(daemon=True)
+        self.ser = ser
+        self.presses = presses if presses is not None else queue.Queue()
+        self.notify = notify
+        self.reconnect = reconnect
+        self.recorder = recorder
+        self.connected = True
+        self.error = None # Set to the SerialException if the port fails for good
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.read_once()
+            except serial.SerialException as e:
+                print(f"Serial read error: {e}")
+                if self.reconnect is None or not self._reconnect():
+                    self.error = e
+                    self._notify()
+                    break
+
+    def _reconnect(self):
+        self.connected = False
+        self._notify()
+        try:
+            self.ser.close()
+        except (serial.SerialException, OSError):
+            pass
+        ser = self.reconnect(self._stop_event)
+        if ser is None:
+            return False
+        self.ser = ser
+        self.reset_stream()
+        self.connected = True
+        self._notify()
+        return True
+
+    def reset_stream(self):
+        """Forgets any per-connection decoding state after a reconnect."""
+
+    def put_press(self, player, t_ns):
+        self.presses.put((player, t_ns))
+        self._notify()
+
+    def _notify(self):
+        if self.notify is not None:
+            self.notify()
+
+    def read_once(self):
+        data = self.ser.read(self.ser.in_waiting or 1) # Blocks for the first byte, then takes the rest
+        t_ns = time.monotonic_ns() # Stamp before any decoding work
+        if not data:
+            return
+        if self.recorder is not None:
+            self.recorder.serial(t_ns, data)
+        self.feed(data, t_ns)
+
+    @abc.abstractmethod
+    def feed(self, data, t_ns):
+        """Decodes a chunk that arrived at `t_ns` and queues its presses."""
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class SerialReader(_ReaderThread):
+    """Reads text lines ("Player 1 pressed") from a serial port on a background thread.
+
+    Whatever the port has is read in one go and stamped with time.monotonic_ns()
+    the moment it arrives; every new press in it (see LineIngest, which drops
+    held-button repeats) is handed to the game loop as a (player, t_ns) record
+    through `presses`, so buzzes are judged by real arrival order instead of by frame.
+    """
+
+    def __init__(self, ser, line_map, presses=None, notify=None, reconnect=None, hold_timeout_ns=None, recorder=None):
+        super().__init__(ser, presses, notify, reconnect, recorder)
+        self.line_map = line_map # Raw line (bytes, no line ending) -> player id
+        self.ingest = LineIngest(line_map, hold_timeout_ns)
+
+    def reset_stream(self):
+        self.ingest.reset() # Drop the half line and the held buttons of the old connection
+
+    def feed(self, data, t_ns):
+        for player in self.ingest.feed(data, t_ns):
+            self.put_press(player, t_ns)
+
+
+class FrameReader(_ReaderThread):
+    """Reads binary buzz frames (see buzz_protocol.py) on a background thread.
+
+    Presses are timestamped with the device's own micros() value, mapped onto
+    the host clock, so two presses in the same USB packet keep their real order.
+    """
+
+    def __init__(self, ser, presses=None, player_map=None, notify=None, reconnect=None, recorder=None):
+        super().__init__(ser, presses, notify, reconnect, recorder)
+        self.player_map = player_map # Optional device player number -> caller's player id
+        self.decoder = FrameDecoder()
+        self.clock = DeviceClock()
+
+    def reset_stream(self):
+        # The board restarted: its micros() and sequence numbers start over
+        self.decoder = FrameDecoder()
+        self.clock = DeviceClock()
+
+    def feed(self, data, arrival_ns):
+        for kind, player, seq, micros in self.decoder.feed(data):
+            self.handle_frame(kind, player, micros, arrival_ns)
+
+    def handle_frame(self, kind, player, micros, arrival_ns):
+        """Called for every decoded frame, in order; queues the presses."""
+        t_ns = self.clock.to_host_ns(micros, arrival_ns) # Every frame keeps the clock's wrap tracking current
+        if kind == FRAME_PRESS:
+            if self.player_map is not None:
+                player = self.player_map.get(player)
+                if player is None:
+                    return
+            self.put_press(player, t_ns)
@@ -0,0 +1,116 @@
+"""Game state shared with the scoreboard process through multiprocessing.shared_memory.
+
+The block starts with a 64-bit sequence counter (a seqlock): the writer makes
+it odd, writes the fields, then makes it even again. The counter is only
+read and written as one 8-byte item through a memoryview cast, since
+struct.pack_into zero-fills its target before writing it. A reader copies the
+fields and keeps the copy only if the counter was even and unchanged around
+it, so it never sees half an update and the writer never waits for it.
+"""
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+
+MAX_PLAYERS = 32
+MESSAGE_BYTES = 128
+OVERLAY_BYTES = 1024
+
+_SEQ = struct.Struct("Q") # Native order: written and read through memoryview.cast("Q")
+# state, locked, winner (1-based index, 0 for none), player count, reaction (us),
+# scores, message, overlay (UTF-8, zero padded)
+_BODY = struct.Struct(f"<BBBBq{MAX_PLAYERS}i{MESSAGE_BYTES}s{OVERLAY_BYTES}s")
+SIZE = _SEQ.size + _BODY.size
+
+STATE_CODES = {"waiting": 0, "buzzed": 1, "conflict": 2}
+STATE_NAMES = {code: name for name, code in STATE_CODES.items()}
+
+
+class Snapshot:
+    """One consistent copy of the shared fields."""
+
+    __slots__ = ("seq", "state", "locked", "winner", "reaction_ms", "scores", "message", "overlay")
+
+    def __init__(self, seq, fields):
+        state, locked, winner, count, reaction_us = fields[:5]
+        self.seq = seq
+        self.state = STATE_NAMES.get(state, "waiting")
+        self.locked = bool(locked)
+        self.winner = winner # 1-based index into the player list, 0 for none
+        self.reaction_ms = reaction_us / 1000
+        self.scores = fields[5:5 + count]
+        self.message = fields[5 + MAX_PLAYERS].rstrip(b"\0").decode("utf-8", "replace")
+        self.overlay = fields[6 + MAX_PLAYERS].rstrip(b"\0").decode("utf-8", "replace").splitlines()
+
+
+class SharedScoreboard:
+    """The writer's (core's) side: creates the block and publishes GameCore state to it."""
+
+    def __init__(self):
+        self.shm = shared_memory.SharedMemory(create=True, size=SIZE)
+        self.name = self.shm.name
+        self._counter = self.shm.buf[:_SEQ.size].cast("Q")
+        self._seq = 0
+        self._publish_raw(0, False, 0, 0, [], "", "")
+
+    def publish(self, core, now_ns, message="", overlay_lines=()):
+        """Writes the core's state; returns the sequence number readers will report for it."""
+        winner = core.players.index(core.winner) + 1 if core.winner is not None else 0
+        scores = [core.scores[player] for player in core.players[:MAX_PLAYERS]]
+        return self._publish_raw(STATE_CODES[core.state], core.locked(now_ns), winner, int(core.reaction_ms * 1000),
+                          scores, message, "\n".join(overlay_lines))
+
+    def _publish_raw(self, state, locked, winner, reaction_us, scores, message, overlay):
+        seq = self._seq + 1
+        self._counter[0] = seq # Odd: readers retry until it is even again
+        _BODY.pack_into(self.shm.buf, _SEQ.size, state, locked, winner, len(scores), reaction_us,
+                        *scores, *[0] * (MAX_PLAYERS - len(scores)),
+                        message.encode()[:MESSAGE_BYTES], overlay.encode()[:OVERLAY_BYTES])
+        self._seq = seq + 1
+        self._counter[0] = self._seq
+        return self._seq
+
+    def close(self):
+        self._counter.release()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ScoreboardReader:
+    """The renderer's side: attaches to the block by name and takes consistent snapshots."""
+
+    def __init__(self, name):
+        self.shm = _attach(name)
+        self._counter = self.shm.buf[:_SEQ.size].cast("Q")
+        self.retries = 0 # Reads that overlapped a write and were repeated
+
+    def seq(self):
+        return self._counter[0]
+
+    def read(self):
+        buf = self.shm.buf
+        counter = self._counter
+        while True:
+            before = counter[0]
+            if not before & 1:
+                fields = _BODY.unpack_from(buf, _SEQ.size)
+                if counter[0] == before:
+                    return Snapshot(before, fields)
+            self.retries += 1
+            time.sleep(0) # Let the writer finish
+
+    def close(self):
+        self._counter.release()
+        self.shm.close()
+
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False) # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":
+            # Older Pythons would unlink the block when this process exits; only the creator should
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
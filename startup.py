@@ -0,0 +1,88 @@
+"""Startup timeline and lean pygame initialisation for the front-ends.
+
+pygame.init() starts every SDL subsystem, joysticks and haptics included,
+whether a script uses them or not. The front-ends call init_pygame() with
+only what they need, start the mixer and look for their devices on
+background threads while the window comes up, and record each step on a
+StartupTimeline. Run a script with --profile-startup to print the timeline
+once its window is usable.
+
+Import this module before anything else so the timeline covers the imports.
+"""
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+_START_NS = time.perf_counter_ns()
+PROFILE_STARTUP = "--profile-startup" in sys.argv
+
+
+class StartupTimeline:
+    """Phases of a script's startup, on any thread, in ms since this module was imported.
+
+    step(name) closes a main-thread phase that ran since the previous step;
+    phase(name) is a context manager for work on other threads; mark(name)
+    records a moment such as the first frame on screen.
+    """
+
+    def __init__(self, start_ns=_START_NS):
+        self.start_ns = start_ns
+        self.entries = [] # (name, thread name, start ns, end ns or None for a mark)
+        self._last_step_ns = start_ns
+        self._lock = threading.Lock()
+
+    def step(self, name):
+        now = time.perf_counter_ns()
+        self._add(name, self._last_step_ns, now)
+        self._last_step_ns = now
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._add(name, start, time.perf_counter_ns())
+
+    def mark(self, name):
+        self._add(name, time.perf_counter_ns(), None)
+
+    def elapsed_ms(self):
+        return (time.perf_counter_ns() - self.start_ns) / 1e6
+
+    def report(self):
+        """Prints every phase and mark in start order, with a bar per 10 ms."""
+        with self._lock:
+            entries = sorted(self.entries, key=lambda entry: entry[2])
+        print(f"{'startup':<26}{'thread':<26}{'start ms':>9}{'took ms':>9}")
+        for name, thread, start, end in entries:
+            at = (start - self.start_ns) / 1e6
+            if end is None:
+                print(f"* {name:<50}{at:9.1f}")
+            else:
+                took = (end - start) / 1e6
+                print(f"  {name:<24}{thread[:25]:<26}{at:9.1f}{took:9.1f}  {'#' * min(40, round(took / 10))}")
+
+    def _add(self, name, start, end):
+        with self._lock:
+            self.entries.append((name, threading.current_thread().name, start, end))
+
+
+def init_pygame(timeline, display=True, font=True, joystick=False):
+    """Starts only the given pygame modules, each as a step of `timeline`.
+
+    The mixer is left to SoundLoader, which starts it on its own thread. The
+    SDL timer is not started either, so pygame.time.get_ticks() stays 0; the
+    scripts time things with time.monotonic_ns().
+    """
+    import pygame # Here rather than at the top: the timeline has to start before pygame is imported
+    if display:
+        pygame.display.init()
+        timeline.step("SDL video")
+    if joystick:
+        pygame.joystick.init()
+        timeline.step("SDL joystick")
+    if font:
+        pygame.font.init()
+        timeline.step("SDL_ttf")
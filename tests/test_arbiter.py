@@ -0,0 +1,72 @@
+from arbiter import CONFLICT, WIN, BuzzArbiter
+
+MS = 1_000_000
+
+
+def test_first_press_wins_at_once_without_a_tie_window():
+    arbiter = BuzzArbiter()
+    decision = arbiter.press(2, 10 * MS)
+    assert (decision.kind, decision.player, decision.t_ns) == (WIN, 2, 10 * MS)
+    assert arbiter.press(1, 11 * MS) is None # Locked until reset
+    assert arbiter.ignored == 1
+
+
+def test_lone_press_wins_when_the_window_closes():
+    arbiter = BuzzArbiter(tie_window_ns=50 * MS)
+    assert arbiter.press(1, 0) is None
+    assert arbiter.next_deadline() == 50 * MS
+    assert arbiter.poll(49 * MS) is None
+    decision = arbiter.poll(50 * MS)
+    assert (decision.kind, decision.player) == (WIN, 1)
+
+
+def test_presses_inside_the_window_conflict():
+    arbiter = BuzzArbiter(tie_window_ns=50 * MS)
+    arbiter.press(1, 0)
+    arbiter.press(3, 20 * MS)
+    arbiter.press(1, 30 * MS) # Same player again adds nothing
+    decision = arbiter.poll(50 * MS)
+    assert (decision.kind, decision.player, decision.players) == (CONFLICT, None, (1, 3))
+
+
+def test_earlier_press_arriving_late_leads_the_conflict():
+    arbiter = BuzzArbiter(tie_window_ns=50 * MS)
+    arbiter.press(1, 20 * MS)
+    arbiter.press(2, 5 * MS)
+    decision = arbiter.poll(100 * MS)
+    assert decision.players == (2, 1) and decision.t_ns == 5 * MS
+
+
+def test_press_after_the_window_settles_it_first():
+    arbiter = BuzzArbiter(tie_window_ns=50 * MS)
+    arbiter.press(1, 0)
+    decision = arbiter.press(2, 60 * MS) # Nobody polled in between
+    assert (decision.kind, decision.player) == (WIN, 1)
+    assert arbiter.is_locked(60 * MS)
+
+
+def test_cooldown_ignores_presses_then_unlocks():
+    arbiter = BuzzArbiter(cooldown_ns=1000 * MS)
+    arbiter.press(1, 0)
+    assert arbiter.press(2, 999 * MS) is None
+    assert arbiter.is_locked(999 * MS)
+    assert arbiter.next_deadline() == 1000 * MS
+    decision = arbiter.press(2, 1000 * MS)
+    assert (decision.kind, decision.player) == (WIN, 2)
+
+
+def test_cooldown_after_a_window_counts_from_its_end():
+    arbiter = BuzzArbiter(tie_window_ns=50 * MS, cooldown_ns=1000 * MS)
+    arbiter.press(1, 0)
+    arbiter.poll(50 * MS)
+    assert arbiter.next_deadline() == 1050 * MS
+
+
+def test_reset_with_a_cooldown():
+    arbiter = BuzzArbiter()
+    arbiter.press(1, 0)
+    arbiter.reset(now_ns=100 * MS, cooldown_ns=200 * MS)
+    assert arbiter.press(2, 250 * MS) is None
+    arbiter.poll(300 * MS)
+    assert not arbiter.is_locked(300 * MS)
+    assert arbiter.press(2, 310 * MS).player == 2
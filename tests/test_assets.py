@@ -0,0 +1,50 @@
+import os
+import struct
+import wave
+
+import pytest
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+
+from assets import SoundLoader
+
+
+def write_wav(path, value):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(22050)
+        f.writeframes(struct.pack("<h", value) * 2205)
+
+
+@pytest.fixture
+def mixer():
+    try:
+        pygame.mixer.init()
+    except pygame.error as e:
+        pytest.skip(f"no audio device: {e}")
+    yield
+    pygame.mixer.quit()
+
+
+def load_all(files, cache_dir):
+    loader = SoundLoader(files, cache_dir=str(cache_dir)).start()
+    assert loader.ready.wait(5)
+    return {key: loader.get(key).get_raw() for key in files}
+
+
+def test_same_file_name_in_two_folders_gets_two_cache_entries(tmp_path, mixer):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    write_wav(tmp_path / "a" / "buzzer.wav", 1000)
+    write_wav(tmp_path / "b" / "buzzer.wav", -1000)
+    files = {"a": str(tmp_path / "a" / "buzzer.wav"), "b": str(tmp_path / "b" / "buzzer.wav")}
+    cache_dir = tmp_path / "cache"
+
+    first = load_all(files, cache_dir)
+    assert first["a"] != first["b"]
+    assert len(os.listdir(cache_dir)) == 2
+    assert load_all(files, cache_dir) == first # Served from the cache, each its own
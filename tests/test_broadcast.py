@@ -0,0 +1,82 @@
+import asyncio
+
+from broadcast import HELLO, KEYFRAME_REQUEST, REQUEST_SIZE, StateBroadcaster, _request, follow, state_fields
+from core import GameCore
+
+
+class SentPackets:
+    """Stands in for the broadcaster's UDP transport."""
+
+    def __init__(self):
+        self.sent = []
+
+    def sendto(self, data, address):
+        self.sent.append((data, address))
+
+
+def broadcaster_with_state(players, **kwargs):
+    broadcaster = StateBroadcaster(**kwargs)
+    broadcaster._transport = SentPackets()
+    broadcaster._state = state_fields(GameCore(players), 0)
+    return broadcaster
+
+
+def test_unpadded_requests_are_ignored():
+    broadcaster = broadcaster_with_state([1, 2])
+    broadcaster._received(HELLO, ("10.0.0.2", 4000))
+    broadcaster._received(HELLO.ljust(REQUEST_SIZE - 1), ("10.0.0.2", 4000))
+    assert broadcaster.subscribers == {}
+    assert broadcaster._transport.sent == []
+
+
+def test_padded_hello_subscribes_and_gets_a_keyframe_no_larger():
+    broadcaster = broadcaster_with_state([1, 2])
+    hello = _request(HELLO)
+    broadcaster._received(hello, ("10.0.0.2", 4000))
+    assert ("10.0.0.2", 4000) in broadcaster.subscribers
+    [(data, address)] = broadcaster._transport.sent
+    assert address == ("10.0.0.2", 4000)
+    assert len(data) <= len(hello)
+
+
+def test_keyframe_larger_than_the_request_waits_for_the_tick():
+    broadcaster = broadcaster_with_state([f"Player with a long name {n}" for n in range(40)])
+    broadcaster._received(_request(HELLO), ("10.0.0.2", 4000))
+    assert ("10.0.0.2", 4000) in broadcaster.subscribers
+    assert broadcaster._transport.sent == []
+
+
+def test_keyframe_requests_only_from_subscribers():
+    broadcaster = broadcaster_with_state([1, 2])
+    broadcaster._received(_request(KEYFRAME_REQUEST), ("10.0.0.3", 4000))
+    assert broadcaster._transport.sent == []
+
+
+def test_subscribers_are_capped():
+    broadcaster = broadcaster_with_state([1, 2], max_subscribers=3)
+    for port in range(4000, 4005):
+        broadcaster._received(_request(HELLO), ("10.0.0.2", port))
+    assert sorted(broadcaster.subscribers) == [("10.0.0.2", port) for port in range(4000, 4003)]
+    broadcaster._received(_request(HELLO), ("10.0.0.2", 4000)) # Renewals still count
+    assert len(broadcaster._transport.sent) == 4
+
+
+def test_viewer_follows_the_host_on_localhost():
+    async def main():
+        broadcaster = StateBroadcaster(port=0, host="127.0.0.1")
+        await broadcaster.serve()
+        core = GameCore([1, 2])
+        broadcaster.publish(core, 0)
+        client = await follow("127.0.0.1", broadcaster.port)
+        for _ in range(100):
+            if client.state is not None:
+                break
+            await asyncio.sleep(0.01)
+        client.renew_task.cancel()
+        client.transport.close()
+        broadcaster.stop()
+        return client.state
+
+    state = asyncio.run(main())
+    assert state["players"] == [1, 2]
+    assert state["scores"] == [0, 0]
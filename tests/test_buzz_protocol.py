@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from buzz_protocol import FRAME_PING, FRAME_PRESS, FRAME_RELEASE, FRAME_SIZE, DeviceClock, FrameDecoder, encode_frame
+
+
+def test_frames_decode_across_chunk_boundaries():
+    decoder = FrameDecoder()
+    data = encode_frame(FRAME_PRESS, 1, 7, 1000) + encode_frame(FRAME_RELEASE, 1, 8, 2000)
+    assert decoder.feed(data[:3]) == []
+    assert decoder.feed(data[3:FRAME_SIZE + 4]) == [(FRAME_PRESS, 1, 7, 1000)]
+    assert decoder.feed(data[FRAME_SIZE + 4:]) == [(FRAME_RELEASE, 1, 8, 2000)]
+    assert decoder.bad_frames == 0 and decoder.lost_frames == 0
+
+
+def test_resyncs_after_banner_text():
+    decoder = FrameDecoder()
+    frames = decoder.feed(b"Arduino Button Detector Ready\r\n" + encode_frame(FRAME_PRESS, 2, 0, 5))
+    assert frames == [(FRAME_PRESS, 2, 0, 5)]
+
+
+def test_bad_checksum_is_skipped_and_counted():
+    decoder = FrameDecoder()
+    corrupt = bytearray(encode_frame(FRAME_PRESS, 1, 0, 100))
+    corrupt[-1] ^= 0xFF
+    frames = decoder.feed(bytes(corrupt) + encode_frame(FRAME_PRESS, 2, 1, 200))
+    assert frames == [(FRAME_PRESS, 2, 1, 200)]
+    assert decoder.bad_frames == 1
+
+
+def test_sync_byte_inside_a_frame_does_not_lose_the_next_one():
+    decoder = FrameDecoder()
+    # 0xA5 as the player id: a resync that lands on it must still find the real frame after the truncated one
+    truncated = encode_frame(FRAME_PRESS, 0xA5, 0, 0)[:6]
+    assert decoder.feed(truncated + encode_frame(FRAME_PING, 3, 1, 42)) == [(FRAME_PING, 3, 1, 42)]
+
+
+def test_sequence_gaps_count_lost_frames():
+    decoder = FrameDecoder()
+    decoder.feed(encode_frame(FRAME_PRESS, 1, 0xFFFE, 0))
+    decoder.feed(encode_frame(FRAME_PRESS, 1, 2, 0)) # 0xFFFF, 0 and 1 went missing across the wrap
+    assert decoder.lost_frames == 3
+
+
+def test_large_feed_grows_the_buffer():
+    decoder = FrameDecoder(capacity=16)
+    data = b"".join(encode_frame(FRAME_PRESS, n % 4 + 1, n, n) for n in range(100))
+    assert len(decoder.feed(data)) == 100
+
+
+def test_device_clock_unwraps_micros():
+    clock = DeviceClock()
+    assert clock.device_ns(0xFFFFFF00) == 0xFFFFFF00 * 1000
+    assert clock.device_ns(0x10) == ((1 << 32) + 0x10) * 1000
+
+
+def _session(drift_ppm, minutes, seed=2):
+    """(true host ns, micros, arrival ns) for presses a few seconds apart on a drifting board."""
+    rng = random.Random(seed)
+    t = 0
+    while t < minutes * 60e9:
+        t += rng.uniform(0.5e9, 10e9)
+        true_ns = 1_000_000_000 + int(t)
+        micros = (int(t * (1 + drift_ppm / 1e6)) // 1000 + 4_000_000_000) & 0xFFFFFFFF # Wraps during the session
+        yield true_ns, micros, true_ns + rng.randint(200_000, 3_000_000) # 0.2-3 ms in transit
+
+
+@pytest.mark.parametrize("drift_ppm", [-2000, 0, 3000])
+def test_device_clock_follows_a_drifting_board(drift_ppm):
+    clock = DeviceClock()
+    for true_ns, micros, arrival_ns in _session(drift_ppm, 30):
+        host_ns = clock.to_host_ns(micros, arrival_ns)
+        assert host_ns <= arrival_ns
+        # A fixed offset would be 2 ms a second off; the estimate settles as the drift fit spans more time
+        if true_ns > 10 * 60e9:
+            assert abs(host_ns - true_ns) < 1_500_000 # About the spread of the fastest transits
+        elif true_ns > 60e9:
+            assert abs(host_ns - true_ns) < 3_000_000
+    assert abs(clock.drift * 1e6 + drift_ppm) < 50
+
+
+def test_device_clock_maps_frames_of_one_read_by_device_time():
+    clock = DeviceClock()
+    clock.to_host_ns(0, 9_000_000) # Offset 9 ms
+    first = clock.to_host_ns(1000, 12_000_000)
+    second = clock.to_host_ns(1400, 12_000_000) # Same USB packet
+    assert (first, second) == (10_000_000, 10_400_000)
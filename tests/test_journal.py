@@ -0,0 +1,108 @@
+import json
+
+import journal
+from journal import Journal, replay
+
+
+class FailingFile:
+    """Writes the first half of one batch to the real journal file, then fails like a full disk."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def write(self, data):
+        with open(self.path, "ab") as f:
+            f.write(data[:len(data) // 2])
+        raise OSError(28, "No space left on device")
+
+    def close(self):
+        pass
+
+
+def read_events(path):
+    with open(path, "rb") as f:
+        return [json.loads(line) for line in f]
+
+
+def write_lines(path, events, tail=b""):
+    with open(path, "wb") as f:
+        for event in events:
+            f.write(json.dumps(event).encode() + b"\n")
+        f.write(tail)
+
+
+def score(seq, player, value):
+    return {"t": 0, "type": "score", "player": player, "score": value, "seq": seq}
+
+
+def test_failed_write_is_retried_without_a_seq_gap(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(journal, "RETRY_INTERVAL", 0.01)
+    path = str(tmp_path / "game.jsonl")
+    j = Journal(path, snapshot_every=2)
+    j.open()
+    j.record("score", player=1, score=10)
+    j.close()
+    j = Journal(path, snapshot_every=2)
+    j.open()
+    j._file.close()
+    j._file = FailingFile(path)
+    for n in range(2, 6):
+        j.record("score", player=n, score=n * 10)
+    j.close()
+    assert "No space left" in capsys.readouterr().out
+    assert [event["seq"] for event in read_events(path)] == [1, 2, 3, 4, 5]
+    state, seq, _ = replay(path, path + ".snapshot")
+    assert seq == 5
+    assert state["scores"] == {1: 10, 2: 20, 3: 30, 4: 40, 5: 50}
+
+
+def test_gap_in_the_middle_keeps_the_later_events(tmp_path, capsys):
+    path = str(tmp_path / "game.jsonl")
+    write_lines(path, [score(1, 1, 10), score(2, 2, 5), score(5, 1, 20), score(6, 3, -10)])
+    size = (tmp_path / "game.jsonl").stat().st_size
+    j = Journal(path)
+    scores = j.open()
+    j.record("score", player=2, score=15)
+    j.close()
+    assert "damaged or missing" in capsys.readouterr().out
+    assert scores == {1: 20, 2: 5, 3: -10}
+    assert j.seq == 7
+    with open(path, "rb") as f:
+        assert len(f.read()) > size # Appended to, not cut back to the gap
+    assert [event["seq"] for event in read_events(path)] == [1, 2, 5, 6, 7]
+
+
+def test_damaged_line_in_the_middle_is_skipped(tmp_path):
+    path = str(tmp_path / "game.jsonl")
+    with open(path, "wb") as f:
+        f.write(json.dumps(score(1, 1, 10)).encode() + b"\n")
+        f.write(b"\x00\x00garbage\n")
+        f.write(json.dumps(score(2, 2, 5)).encode() + b"\n")
+    state, seq, offset = replay(path)
+    assert (state["scores"], seq) == ({1: 10, 2: 5}, 2)
+    assert offset == (tmp_path / "game.jsonl").stat().st_size
+
+
+def test_only_a_torn_final_line_is_cut_off(tmp_path):
+    path = str(tmp_path / "game.jsonl")
+    write_lines(path, [score(1, 1, 10), score(2, 2, 5)], tail=b'{"t":0,"type":"sco')
+    j = Journal(path)
+    assert j.open() == {1: 10, 2: 5}
+    j.record("round")
+    j.close()
+    assert [event["seq"] for event in read_events(path)] == [1, 2, 3]
+
+
+def test_snapshot_skips_the_events_before_it(tmp_path):
+    path = str(tmp_path / "game.jsonl")
+    j = Journal(path, snapshot_every=3)
+    j.open()
+    for n in range(1, 5):
+        j.record("score", player=n, score=n)
+    j.close()
+    with open(path + ".snapshot") as f:
+        assert json.load(f)["seq"] == 4
+    j = Journal(path, snapshot_every=3)
+    assert j.open() == {1: 1, 2: 2, 3: 3, 4: 4}
+    assert j.seq == 4
+    j.close()
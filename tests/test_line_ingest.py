@@ -0,0 +1,55 @@
+from serial_reader import LineIngest
+
+MS = 1_000_000
+LINES = {b"Player 1 pressed": 1, b"Player 2 pressed": 2}
+
+
+def test_held_button_repeats_make_one_press():
+    ingest = LineIngest(LINES, hold_timeout_ns=300 * MS)
+    assert ingest.feed(b"Player 1 pressed\r\n", 0) == [1]
+    assert ingest.feed(b"Player 1 pressed\r\n", 120 * MS) == []
+    assert ingest.feed(b"Player 1 pressed\r\n", 240 * MS) == []
+    assert ingest.dropped == 2
+    assert ingest.held(250 * MS) == [1]
+
+
+def test_press_after_the_repeats_stop_counts_again():
+    ingest = LineIngest(LINES, hold_timeout_ns=300 * MS)
+    ingest.feed(b"Player 1 pressed\r\n", 0)
+    assert ingest.held(400 * MS) == []
+    assert list(ingest.feed(b"Player 1 pressed\r\n", 400 * MS)) == [1]
+
+
+def test_one_chunk_with_both_players_keeps_line_order():
+    ingest = LineIngest(LINES, hold_timeout_ns=300 * MS)
+    assert ingest.feed(b"Player 2 pressed\r\nPlayer 1 pressed\r\nPlayer 2 pressed\r\n", 0) == [2, 1]
+
+
+def test_partial_lines_wait_for_their_ending():
+    ingest = LineIngest(LINES)
+    assert ingest.feed(b"Player 1 pre", 0) == []
+    assert ingest.feed(b"ssed\n", 1) == [1]
+
+
+def test_similar_lines_do_not_match():
+    ingest = LineIngest(LINES)
+    assert ingest.feed(b"xPlayer 1 pressed\r\nPlayer 1 pressed!\r\n", 0) == []
+
+
+def test_zero_hold_timeout_reports_every_line():
+    ingest = LineIngest(LINES, hold_timeout_ns=0)
+    assert ingest.feed(b"Player 1 pressed\r\nPlayer 1 pressed\r\nbanner\r\n", 0) == [1, 1]
+    assert ingest.dropped == 1
+
+
+def test_noise_without_line_endings_is_discarded():
+    ingest = LineIngest(LINES)
+    ingest.feed(b"\xff" * 1000, 0)
+    assert ingest.feed(b"\nPlayer 2 pressed\r\n", 1) == [2]
+
+
+def test_reset_forgets_held_buttons_and_half_lines():
+    ingest = LineIngest(LINES, hold_timeout_ns=300 * MS)
+    ingest.feed(b"Player 1 pressed\r\nPlayer 2 pr", 0)
+    ingest.reset()
+    assert ingest.feed(b"Player 1 pressed\r\n", 10 * MS) == [1]
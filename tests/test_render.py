@@ -0,0 +1,41 @@
+from render import score_grid
+
+
+class FixedFont:
+    """Stands in for a pygame font: every character is `advance` pixels wide."""
+
+    def __init__(self, advance):
+        self.advance = advance
+
+    def size(self, text):
+        return len(text) * self.advance, self.advance
+
+
+BIG, MEDIUM, SMALL = FixedFont(20), FixedFont(12), FixedFont(8)
+FONTS = [(BIG, 60), (MEDIUM, 24), (SMALL, 16)]
+
+
+def labels(count):
+    return [f"P{n}: -0000" for n in range(1, count + 1)]
+
+
+def test_few_players_keep_one_column_of_the_largest_font():
+    font, positions = score_grid(labels(3), FONTS, 50, 20, 450, 300)
+    assert font is BIG
+    assert positions == [(50, 20), (50, 80), (50, 140)]
+
+
+def test_every_player_fits_the_window():
+    for count in range(1, 33):
+        font, positions = score_grid(labels(count), FONTS, 50, 20, 450, 300)
+        row_height = dict((f, h) for f, h in FONTS)[font]
+        assert len(set(positions)) == count
+        for label, (x, y) in zip(labels(count), positions):
+            assert x + font.size(label)[0] <= 500
+            assert y + row_height <= 320
+
+
+def test_smallest_font_is_used_when_nothing_fits():
+    font, positions = score_grid(labels(200), FONTS, 0, 0, 100, 100)
+    assert font is SMALL
+    assert len(positions) == 200
@@ -0,0 +1,120 @@
+"""The reader threads against FakeBuzzer boards on pseudo-terminals."""
+import queue
+import sys
+import time
+
+import pytest
+
+if sys.platform == "win32":
+    pytest.skip("FakeBuzzer needs a POSIX pseudo-terminal", allow_module_level=True)
+
+import serial
+
+from aggregator import BuzzAggregator
+from buzz_protocol import BINARY_BAUD_RATE, FRAME_PRESS
+from fake_device import BUZZER_LINE, FakeBuzzer
+from serial_reader import FrameReader, SerialReader
+
+MS = 1_000_000
+
+
+@pytest.fixture
+def devices():
+    opened = []
+
+    def open_device(*args, **kwargs):
+        device = FakeBuzzer(*args, **kwargs)
+        opened.append(device)
+        return device
+
+    yield open_device
+    for device in opened:
+        device.close()
+
+
+def stop(reader):
+    reader.stop()
+    reader.join(timeout=1)
+    reader.ser.close()
+
+
+def test_serial_reader_stamps_presses_on_arrival(devices):
+    device = devices("text", line_format=BUZZER_LINE)
+    presses = queue.Queue()
+    reader = SerialReader(serial.Serial(device.port, 9600, timeout=0.1),
+                          {b"PLAYER_%d" % n: n for n in (1, 2)}, presses)
+    reader.start()
+    try:
+        device.send_banner()
+        before = time.monotonic_ns()
+        device.press(2)
+        device.press(2) # A held button's repeat
+        player, t_ns = presses.get(timeout=2)
+        assert player == 2 and before <= t_ns <= time.monotonic_ns()
+        device.press(1)
+        assert presses.get(timeout=2)[0] == 1
+        assert presses.empty()
+    finally:
+        stop(reader)
+
+
+def test_serial_reader_loses_no_line_under_load(devices):
+    device = devices("text", line_format=BUZZER_LINE)
+    presses = queue.Queue()
+    reader = SerialReader(serial.Serial(device.port, 9600, timeout=0.1),
+                          {b"PLAYER_%d" % n: n for n in (1, 2, 3)}, presses, hold_timeout_ns=0)
+    reader.start()
+    try:
+        sent = [n % 3 + 1 for n in range(5000)]
+        started = time.monotonic()
+        for at in range(0, len(sent), 50): # Thousands of lines a second, in bursts like a USB link
+            device.write(b"".join(BUZZER_LINE % player for player in sent[at:at + 50]))
+        got = [presses.get(timeout=2)[0] for _ in sent]
+        assert got == sent
+        assert len(sent) / (time.monotonic() - started) > 2000
+        assert reader.ingest.dropped == 0
+    finally:
+        stop(reader)
+
+
+def test_frame_reader_keeps_device_order_within_one_read(devices):
+    device = devices("binary")
+    presses = queue.Queue()
+    reader = FrameReader(serial.Serial(device.port, BINARY_BAUD_RATE, timeout=0.1), presses, {1: "P1", 2: "P2"})
+    reader.start()
+    try:
+        device.send_banner() # Text before the first frame is skipped
+        now = device.micros()
+        device.write(device.frame(FRAME_PRESS, 2, now + 500) + device.frame(FRAME_PRESS, 1, now + 100)
+                     + device.frame(FRAME_PRESS, 5, now + 900)) # Player 5 is not in the map
+        first, second = presses.get(timeout=2), presses.get(timeout=2)
+        assert (first[0], second[0]) == ("P2", "P1")
+        assert first[1] - second[1] == 400_000 # Device time, not arrival time
+        time.sleep(0.1)
+        assert presses.empty()
+    finally:
+        stop(reader)
+
+
+def test_aggregator_orders_presses_from_skewed_boards(devices):
+    boards = [devices("binary", offset_us=1_000_000_000, drift_ppm=2000), devices("binary", drift_ppm=-2000)]
+    aggregator = BuzzAggregator([(serial.Serial(board.port, BINARY_BAUD_RATE, timeout=0.1), 1 + i * 2, 2, None)
+                                 for i, board in enumerate(boards)],
+                                settle_ns=100 * MS) # Room for a busy test machine to deliver the second press
+    aggregator.start()
+    try:
+        time.sleep(5.0) # Pings well past ClockSync.MIN_DRIFT_SPAN_NS, so the drift estimate has settled
+        for _ in range(5):
+            true_ns = time.monotonic_ns() + 2 * MS
+            # Board 0's press happens 10 ms later but is sent first
+            boards[0].press(1, boards[0].micros_at(true_ns + 10 * MS))
+            time.sleep(0.015)
+            boards[1].press(2, boards[1].micros_at(true_ns))
+            first, second = aggregator.presses.get(timeout=1), aggregator.presses.get(timeout=1)
+            assert (first[0], second[0]) == (4, 1)
+            assert abs(first[1] - true_ns) < 5 * MS # Pty scheduling jitter on a loaded machine
+    finally:
+        aggregator.stop()
+        aggregator.join(timeout=1)
+        for reader in aggregator.readers:
+            reader.ser.close()
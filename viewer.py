@@ -0,0 +1,117 @@
+"""Remote scoreboard for audience screens and host tablets.
+
+Mirrors the game broadcast by buzzer.py, Arduino_Final.py or Gamepad_Final.py
+(see broadcast.py) instead of capturing the host's window. Run it on any
+machine on the venue network:
+
+    python viewer.py <host address> [port] [--profile-startup]
+"""
+from startup import PROFILE_STARTUP, StartupTimeline, init_pygame # First, so the startup timeline covers the imports
+timeline = StartupTimeline()
+
+import asyncio
+import sys
+import threading
+import time
+
+import pygame
+
+from broadcast import BROADCAST_PORT, KEYFRAME_INTERVAL, follow
+from event_loop import STATE_RECEIVED, EventLoop, post_event
+from render import DirtyRenderer, score_grid
+timeline.step("imports")
+
+# --- CONFIG ---
+ARGS = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+HOST = ARGS[0] if ARGS else "127.0.0.1"
+PORT = int(ARGS[1]) if len(ARGS) > 1 else BROADCAST_PORT
+WIDTH, HEIGHT = 600, 400
+MAX_FPS = 60
+STALE_AFTER = 3 * KEYFRAME_INTERVAL # seconds without a packet before the connection counts as lost
+
+# --- INIT ---
+init_pygame(timeline, display=True, font=True) # No sound or joysticks here
+screen = pygame.display.set_mode((WIDTH, HEIGHT))
+pygame.display.set_caption(f"Scoreboard - {HOST}")
+timeline.step("window")
+font = pygame.font.SysFont(None, 48)
+small_font = pygame.font.SysFont(None, 28)
+score_fonts = [(font, 50), (small_font, 24), (pygame.font.SysFont(None, 20), 16)] # Largest that fits the players
+timeline.step("fonts")
+renderer = DirtyRenderer(screen, (30, 30, 30))
+
+# Network thread: receives state packets and wakes the main loop
+client = None
+def run_network():
+    global client
+    loop = asyncio.new_event_loop()
+    client = loop.run_until_complete(follow(HOST, PORT, on_update=lambda _: post_event(STATE_RECEIVED)))
+    loop.run_forever()
+
+threading.Thread(target=run_network, daemon=True).start()
+
+def label(player):
+    return player if isinstance(player, str) else f"Player {player}"
+
+def layout(players):
+    """Score font and positions for these players: columns of up to five, smaller when they do not fit."""
+    return score_grid([f"{label(player)}: -0000" for player in players], score_fonts, 50, 20, WIDTH - 50, HEIGHT - 150)
+
+# Main loop
+event_loop = EventLoop(max_fps=MAX_FPS)
+shown_stale = False
+laid_out_players = None # The players score_positions were computed for; the host may change them
+startup_reported = False
+running = True
+while running:
+    events = event_loop.wait()
+    if events:
+        event_loop.mark_dirty()
+    for event in events:
+        if event.type == pygame.QUIT:
+            running = False
+        elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            renderer.invalidate()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            running = False
+
+    state = client.state if client is not None else None
+    cooldown = client.cooldown_left_s() if state is not None else 0
+    stale = state is not None and time.monotonic() - client.received_at > STALE_AFTER # Keyframes stopped coming
+    if cooldown > 0 or stale != shown_stale:
+        event_loop.mark_dirty() # Keep the countdown ticking
+
+    if event_loop.should_draw():
+        renderer.begin()
+        if state is None:
+            renderer.text(f"Connecting to {HOST}:{PORT}...", small_font, (200, 200, 200), 50, HEIGHT // 2)
+        else:
+            if state["players"] != laid_out_players:
+                laid_out_players = state["players"]
+                score_font, score_positions = layout(laid_out_players)
+            for i, (player, score) in enumerate(zip(state["players"], state["scores"])):
+                color = (255, 215, 0) if player == state["winner"] else (255, 255, 255)
+                x, y = score_positions[i]
+                renderer.text(f"{label(player)}: {score}", score_font, color, x, y)
+
+            if state["state"] == "buzzed":
+                renderer.text(f"{label(state['winner'])} BUZZED FIRST! ({state['reaction_ms']:.0f} ms)",
+                              small_font, (100, 150, 255), 50, HEIGHT - 100)
+            elif cooldown > 0:
+                renderer.text(f"Next buzz in: {cooldown:.1f} s", small_font, (255, 100, 100), 50, HEIGHT - 100)
+            elif not state["locked"]:
+                renderer.text("Waiting for a buzz...", small_font, (0, 255, 0), 50, HEIGHT - 100)
+
+            if state["message"]:
+                renderer.text(state["message"], font, (255, 100, 100), 50, HEIGHT - 60)
+
+            if stale:
+                renderer.text("Connection lost - waiting for the host...", small_font, (255, 0, 0), 50, HEIGHT - 25)
+        renderer.present()
+        if PROFILE_STARTUP and not startup_reported:
+            timeline.mark("first frame")
+            timeline.report()
+            startup_reported = True
+        shown_stale = stale
+
+pygame.quit()